@@ -0,0 +1,103 @@
+"""Benchmark for converting a large playlist response to models.
+
+Compares the old per-track ``to_songinfo(json.dumps(song))`` round trip with
+the converters working on the parsed response.
+
+    python benchmarks/bench_convert.py [tracks]
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api.models import AlbumInfo, SingerInfo, SongInfo  # noqa: E402
+from api.utils import load_json, to_play_list_detail, to_song_info  # noqa: E402
+
+
+def make_payload(count: int) -> bytes:
+    """Build a playlist detail response with ``count`` tracks."""
+    tracks = [
+        {
+            "id": 100000 + i,
+            "name": f"Song {i}",
+            "dt": 200000 + i,
+            "ar": [
+                {"id": 2000 + i % 50, "name": f"Artist {i % 50}", "tns": [], "alias": []},
+                {"id": 3000 + i % 7, "name": f"Feat {i % 7}", "tns": [], "alias": []},
+            ],
+            "al": {
+                "id": 5000 + i % 80,
+                "name": f"Album {i % 80}",
+                "picUrl": f"https://p1.music.126.net/{i % 80}/cover.jpg",
+                "tns": [],
+            },
+            "pop": 100,
+            "fee": 8,
+            "mv": 0,
+            "publishTime": 1600000000000,
+        }
+        for i in range(count)
+    ]
+    return json.dumps(
+        {
+            "code": 200,
+            "playlist": {
+                "id": 1,
+                "name": "bench",
+                "coverImgUrl": "",
+                "tracks": tracks,
+                "trackCount": count,
+                "creator": {"nickname": "bench"},
+            },
+        }
+    ).encode()
+
+
+def legacy_songinfo(json_str: str) -> SongInfo:
+    """to_songinfo as implemented before the parsed-dict converters."""
+    song = json.loads(json_str)
+    return SongInfo(
+        id=song.get("id", 0),
+        name=song.get("name", ""),
+        album=AlbumInfo(
+            id=(song.get("album", {}) if song.get("album") else song.get("al", {})).get("id", 0),
+            name=(song.get("album", {}) if song.get("album") else song.get("al", {})).get("name", ""),
+            picUrl=(song.get("album", {}) if song.get("album") else song.get("al", {})).get("picUrl", ""),
+        ),
+        duration=song.get("duration", 0),
+        pic_url=song.get("album", {}).get("picUrl", ""),
+        artists=[
+            SingerInfo(id=a.get("id", 0), name=a.get("name", ""), picUrl=a.get("picUrl", ""))
+            for a in (song.get("artists", []) if song.get("artists") else song.get("ar", []))
+        ],
+    )
+
+
+def legacy(raw: bytes):
+    data = json.loads(raw)["playlist"]
+    return [legacy_songinfo(json.dumps(song)) for song in data.get("tracks", [])]
+
+
+def main(count: int = 1000):
+    raw = make_payload(count)
+    parsed = json.loads(raw)
+    cases = {
+        "legacy (dumps/loads per track)": lambda: legacy(raw),
+        "parse once + convert": lambda: to_play_list_detail(load_json(raw)["playlist"]),
+        "convert parsed dict": lambda: to_play_list_detail(parsed["playlist"]),
+        "to_song_info(bytes)": lambda: to_song_info(raw, "playlist"),
+        "json.loads only": lambda: json.loads(raw),
+    }
+    print(f"{count} tracks, {len(raw) / 1024:.0f} KiB payload, best of 5")
+    baseline = None
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        baseline = baseline or best
+        print(f"{name:<32} {best * 1000:8.2f} ms  x{baseline / best:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
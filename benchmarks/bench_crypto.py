@@ -0,0 +1,78 @@
+"""Microbenchmark for request encryption.
+
+Compares the per-request WEAPI path used before CryptoEngine (RSA key parsed
+and secret key encrypted on every call) with the engine's cached path, and
+times linux_api / eapi through the engine.
+
+    python benchmarks/bench_crypto.py [requests]
+"""
+
+import base64
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from Crypto.Cipher import AES, PKCS1_v1_5  # noqa: E402
+from Crypto.PublicKey import RSA  # noqa: E402
+from Crypto.Util.Padding import pad  # noqa: E402
+
+from api.encrypt import (  # noqa: E402
+    IV,
+    KEY_CHARS,
+    RSA_PUBLIC_KEY,
+    WEAPI_KEY,
+    Crypto,
+    CryptoEngine,
+)
+
+
+def legacy_weapi(params):
+    """WEAPI encryption as implemented before CryptoEngine."""
+
+    def aes_encrypt(text, key):
+        cipher = AES.new(key.encode(), AES.MODE_CBC, IV.encode())
+        return base64.b64encode(cipher.encrypt(pad(text.encode(), 16))).decode()
+
+    text = json.dumps(params)
+    sec_key = "".join(random.choice(KEY_CHARS) for _ in range(16))
+    enc_text = aes_encrypt(aes_encrypt(text, WEAPI_KEY), sec_key)
+    cipher = PKCS1_v1_5.new(RSA.import_key(RSA_PUBLIC_KEY))
+    enc_sec_key = base64.b64encode(cipher.encrypt(sec_key[::-1].encode())).decode()
+    return {"params": enc_text, "encSecKey": enc_sec_key}
+
+
+def main(count: int = 500):
+    payloads = [
+        {"c": json.dumps([{"id": i} for i in range(i, i + 50)]), "csrf_token": ""}
+        for i in range(count)
+    ]
+    engine = CryptoEngine()
+    engine.weapi(payloads[0])  # fill the key pool outside the timing
+
+    cases = {
+        "legacy weapi": lambda: [legacy_weapi(p) for p in payloads],
+        "engine weapi": lambda: [engine.weapi(p) for p in payloads],
+        "engine weapi_many": lambda: engine.weapi_many(payloads),
+        "Crypto.linux_api": lambda: [
+            Crypto.linux_api({"method": "POST", "url": "/api/song/detail", "params": p})
+            for p in payloads
+        ],
+        "Crypto.eapi": lambda: [
+            Crypto.eapi({"url": "/api/song/detail", "params": p}) for p in payloads
+        ],
+    }
+    print(f"{count} requests per run, best of 5")
+    baseline = None
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        baseline = baseline or best
+        print(f"{name:<20} {best * 1000:8.2f} ms  "
+              f"{best / count * 1e6:7.1f} us/req  x{baseline / best:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
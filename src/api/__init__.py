@@ -2,7 +2,15 @@
 NetEase Cloud Music API client.
 """
 
-from .client import MusicApi
+from .client import MusicApi, ApiSession, ApiError
+from .async_client import AsyncMusicApi
+from .cache import ResponseCache
+from .transport import HttpTransport
+from .resilience import Resilience, RetryPolicy, CircuitOpenError
+from .singleflight import SingleFlight, AsyncSingleFlight
+from .encrypt import CryptoEngine
+from .tracks import TrackTable
+from .lyrics import LyricTimeline, parse_lrc
 from .models import (
     Msg,
     SongUrl,
@@ -22,6 +30,20 @@ from .models import (
 
 __all__ = [
     "MusicApi",
+    "AsyncMusicApi",
+    "ApiSession",
+    "ApiError",
+    "ResponseCache",
+    "HttpTransport",
+    "Resilience",
+    "RetryPolicy",
+    "CircuitOpenError",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "CryptoEngine",
+    "TrackTable",
+    "LyricTimeline",
+    "parse_lrc",
     "Msg",
     "SongUrl",
     "Lyrics",
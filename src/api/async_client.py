@@ -0,0 +1,221 @@
+"""
+Asynchronous API client for NetEase Cloud Music.
+Runs the endpoints of BaseMusicApi over httpx.AsyncClient; every endpoint
+returns an awaitable, so several can be awaited concurrently, e.g.::
+
+    banners, playlists = await asyncio.gather(api.banners(), api.top_song_list())
+"""
+
+import asyncio
+import os
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, List, TypeVar, Union
+import httpx
+
+from .constants import (
+    SONG_DETAIL_BATCH,
+    MAX_CONCURRENT_REQUESTS,
+    PLAYLIST_FIRST_PAGE,
+)
+from .cache import ResponseCache
+from .transport import HttpTransport
+from .resilience import Resilience, is_idempotent
+from .singleflight import AsyncSingleFlight, flight_key
+from .client import ApiCall, ApiSession, BaseMusicApi, CryptoApi, Flow
+from .models import PlayListDetail
+from .utils import chunked, sized_image_url
+
+T = TypeVar("T")
+
+
+class AsyncMusicApi(BaseMusicApi):
+    """NetEase Cloud Music API client built on httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        session: Optional[ApiSession] = None,
+        cache: Optional[ResponseCache] = None,
+        transport: Optional[HttpTransport] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        """Initialize client with httpx async client and settings.
+
+        Args:
+            max_connections: Connection limit of the client's own pool; None
+                uses the default limit
+            session: Session to share cookies with another client
+            cache: Response cache for read-only endpoints
+            transport: Transport to share pooled connections with; the client
+                creates its own when omitted, since an async pool is bound to
+                one event loop
+            resilience: Retry, hedging and circuit breaker settings
+        """
+        super().__init__(session, cache, resilience)
+        self._flight = AsyncSingleFlight()  # coalesces identical in-flight requests
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = (
+                HttpTransport(max_connections=max_connections)
+                if max_connections is not None
+                else HttpTransport()
+            )
+        self.transport = transport
+        self.client = transport.async_client
+
+    async def __aenter__(self) -> "AsyncMusicApi":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool unless it is shared."""
+        if self._owns_transport:
+            await self.transport.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        crypto_type: CryptoApi = CryptoApi.API,
+        ua_type: str = "",
+        append_csrf: bool = True,
+        basic_url: Optional[str] = None,
+        hedge: bool = False,
+    ) -> Dict[str, Any]:
+        """Make an HTTP request to the API.
+
+        Idempotent endpoints are retried with backoff; ``hedge`` sends a
+        duplicate request when the first one is slow. Identical idempotent
+        requests running at the same time share one network request.
+        """
+        scope = self._cache_scope(basic_url)
+        cached = await self._acache_get(path, params, scope)
+        if cached is not None:
+            return cached
+
+        def send():
+            return self._send(
+                method, path, params, crypto_type, ua_type, append_csrf, basic_url, hedge,
+                scope,
+            )
+
+        if is_idempotent(path):
+            return await self._flight.do(flight_key(path, params, scope), send)
+        return await send()
+
+    async def _acache_get(
+        self, path: str, params: Optional[Dict[str, Any]], scope: str
+    ) -> Optional[Dict[str, Any]]:
+        """Look up the response cache in a worker thread, off the event loop."""
+        if self.cache is None or not self.cache.ttl_for(path):
+            return None
+        return await asyncio.to_thread(self._cache_get, path, params, scope)
+
+    async def _acache_set(
+        self, path: str, params: Optional[Dict[str, Any]], scope: str, result: Dict[str, Any]
+    ) -> None:
+        """Store a response in a worker thread; SQLite writes and eviction block."""
+        if self.cache is None or not self.cache.ttl_for(path) or result.get("code") != 200:
+            return
+        await asyncio.to_thread(self._cache_set, path, params, scope, result)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        crypto_type: CryptoApi,
+        ua_type: str,
+        append_csrf: bool,
+        basic_url: Optional[str],
+        hedge: bool,
+        scope: str,
+    ) -> Dict[str, Any]:
+        """Send one API request and cache its response in ``scope``."""
+        url, data, headers = self._build_request(
+            path, params, crypto_type, ua_type, append_csrf, basic_url
+        )
+
+        try:
+            resp = await self.resilience.asend(
+                path,
+                httpx.URL(url).host,
+                lambda: self.client.request(
+                    method=method,
+                    url=url,
+                    data=data,
+                    headers=headers,
+                ),
+                hedge,
+            )
+            resp.raise_for_status()
+            self._update_cookies(resp)
+            result = resp.json()
+            await self._acache_set(path, params, scope, result)
+            return result
+        except Exception as e:
+            return self._request_failed(e)
+
+    def _run(self, flow: Flow[T]) -> Awaitable[T]:
+        """Drive an endpoint flow, returning an awaitable of its result."""
+        return self._arun(flow)
+
+    async def _arun(self, flow: Flow[T]) -> T:
+        """Send the requests of an endpoint flow and return its result."""
+        try:
+            calls = next(flow)
+            while True:
+                calls = flow.send(await self._answer(calls))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _answer(self, calls: Union[ApiCall, List[ApiCall]]) -> Any:
+        """Send the requests yielded by a flow, MAX_CONCURRENT_REQUESTS at a time."""
+        if isinstance(calls, ApiCall):
+            return await self._request(*calls)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def send(call: ApiCall) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._request(*call)
+
+        return list(await asyncio.gather(*(send(call) for call in calls)))
+
+    async def playlist_stream(
+        self,
+        songlist_id: int,
+        as_table: bool = False,
+        first_page: int = PLAYLIST_FIRST_PAGE,
+    ) -> AsyncIterator[PlayListDetail]:
+        """Load a playlist progressively, see ``MusicApi.playlist_stream``."""
+        detail = await self._run(self._playlist_page(songlist_id, first_page, as_table))
+        yield detail
+        for chunk in chunked(detail.trackIds[len(detail.tracks):], SONG_DETAIL_BATCH):
+            result = await self._answer(self._song_detail_call(chunk))
+            self._add_playlist_batch(songlist_id, detail, chunk, result)
+            yield detail
+
+    async def fetch_img(self, url: str, width: int, height: int) -> bytes:
+        """Download a server-resized image."""
+        response = await self.client.get(sized_image_url(url, width, height))
+        response.raise_for_status()
+        return response.content
+
+    async def download_img(self, url: str, path: str, width: int, height: int) -> None:
+        """Download an image from network and save to local path."""
+        if not os.path.exists(path):
+            content = await self.fetch_img(url, width, height)
+
+            with open(path, "wb") as f:
+                f.write(content)
+
+    async def download_song(self, url: str, path: str) -> None:
+        """Download a song from network and save to local path."""
+        if not os.path.exists(path):
+            response = await self.client.get(url)
+            response.raise_for_status()
+
+            with open(path, "wb") as f:
+                f.write(response.content)
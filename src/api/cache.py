@@ -0,0 +1,166 @@
+"""
+Persistent response cache for read-only API endpoints.
+Responses are stored in a single SQLite file, expire per endpoint and are
+evicted least-recently-used when the cache grows over its limits.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any
+from logging import info, warning
+
+from .constants import CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+
+
+def cache_key(path: str, params: Optional[Dict[str, Any]] = None, scope: str = "") -> str:
+    """Build a canonical key for a request.
+
+    Args:
+        path: API endpoint path
+        params: Request parameters, ``csrf_token`` is ignored
+        scope: Partition of the key, the logged-in account and API host, so
+            responses are never shared across logins or hosts
+    Returns:
+        Key string, equal for equal requests regardless of parameter order
+    """
+    canonical = {
+        k: str(v) for k, v in (params or {}).items() if k != "csrf_token"
+    }
+    return f"{scope}|{path}?{json.dumps(canonical, sort_keys=True, ensure_ascii=False)}"
+
+
+class ResponseCache:
+    """SQLite backed response cache with per-endpoint TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[Dict[str, int]] = None,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        """Open (or create) the cache database.
+
+        Args:
+            path: Database file path, ":memory:" for a process-local cache
+            ttl: Lifetime in seconds per endpoint path, defaults to CACHE_TTL
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached (compressed) responses
+        """
+        self.ttl = dict(CACHE_TTL if ttl is None else ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+        )
+        self._db.commit()
+
+    def ttl_for(self, path: str) -> int:
+        """Get the lifetime of an endpoint, 0 if it must not be cached."""
+        ttl = self.ttl.get(path)
+        if ttl is not None:
+            return ttl
+        for prefix, ttl in self.ttl.items():
+            if prefix.endswith("/") and path.startswith(prefix):
+                return ttl
+        return 0
+
+    def get(
+        self, path: str, params: Optional[Dict[str, Any]] = None, scope: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """Get a cached response of a scope, None on miss or expiry."""
+        if not self.ttl_for(path):
+            return None
+        key = cache_key(path, params, scope)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError) as e:
+            warning(f"Broken cache entry {key}: {e}")
+            return None
+
+    def set(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        result: Dict[str, Any],
+        scope: str = "",
+    ) -> None:
+        """Store a successful response of a cacheable endpoint in a scope."""
+        ttl = self.ttl_for(path)
+        if not ttl or result.get("code") != 200:
+            return
+        key = cache_key(path, params, scope)
+        body = zlib.compress(json.dumps(result, ensure_ascii=False).encode())
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now + ttl, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones over the limits."""
+        self._db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        drop = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            drop.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", drop)
+        info(f"响应缓存淘汰 {len(drop)} 项")
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
@@ -5,16 +5,46 @@ This is a Python implementation of the Rust netease-cloud-music-api library.
 
 import re
 import json
+import functools
+import hashlib
 import os
 import random
 import string
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Optional, Dict, Any, List, Union, Tuple
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    ParamSpec,
+    Union,
+    Tuple,
+    TypeVar,
+)
 import httpx
 from logging import info, warning, error
 
-from .constants import BASE_URL, TIMEOUT, USER_AGENT_LIST, LINUX_USER_AGENT
+from .constants import (
+    BASE_URL,
+    USER_AGENT_LIST,
+    LINUX_USER_AGENT,
+    SONG_DETAIL_BATCH,
+    SONG_URL_BATCH,
+    SONG_URL_BR_LADDER,
+    MAX_CONCURRENT_REQUESTS,
+    PLAYLIST_FIRST_PAGE,
+    PLAYLIST_FULL_PAGE,
+)
 from .encrypt import Crypto
+from .cache import ResponseCache
+from .transport import HttpTransport, default_transport
+from .resilience import Resilience, is_idempotent
+from .singleflight import SingleFlight, flight_key
 from .models import (
     Msg,
     LoginInfo,
@@ -36,7 +66,9 @@ from .models import (
 from .utils import (
     choose_user_agent,
     build_url,
+    sized_image_url,
     build_linux_api_data,
+    chunked,
     to_login_info,
     to_msg,
     to_song_id_list,
@@ -45,7 +77,20 @@ from .utils import (
     to_play_list_detail,
     to_album_detail,
     to_banners_info,
-    to_song_list_from_songs,
+    to_song_info,
+    to_songs_detail,
+    order_song_entries,
+    extend_tracks,
+    to_playlists,
+    to_song_lists,
+    to_search_songs,
+    to_search_suggest,
+    to_song_url,
+    to_song_urls,
+    to_lyrics,
+    to_toplists,
+    to_play_list_detail_dynamic,
+    to_album_detail_dynamic,
 )
 
 
@@ -63,18 +108,105 @@ class CryptoApi(Enum):
     API = "api"
 
 
-class MusicApi:
-    """NetEase Cloud Music API client."""
+class ApiError(Exception):
+    """API response with a code other than 200.
+
+    Failed requests (connection errors, timeouts, HTTP errors) are reported
+    with code -1.
+    """
+
+    def __init__(self, code: int, msg: str = ""):
+        super().__init__(f"API error {code}: {msg}" if msg else f"API error {code}")
+        self.code = code
+        self.msg = msg
+
+
+def check_code(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a response, raising ApiError when its code is not 200."""
+    code = result.get("code")
+    if code != 200:
+        raise ApiError(code if isinstance(code, int) else -1, str(result.get("msg") or ""))
+    return result
+
+
+class ApiCall(NamedTuple):
+    """One API request of an endpoint, in the argument order of ``_request``."""
+
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    crypto_type: CryptoApi = CryptoApi.API
+    ua_type: str = ""
+    append_csrf: bool = True
+    basic_url: Optional[str] = None
+    hedge: bool = False
+
+
+T = TypeVar("T")
+P = ParamSpec("P")
+
+# An endpoint flow yields an ApiCall and receives its response, or yields a
+# list of ApiCalls, sent concurrently, and receives their responses in order.
+# Its return value is the result of the endpoint.
+Flow = Generator[Union[ApiCall, List[ApiCall]], Any, T]
 
-    def __init__(self, max_connections: int = 0):
-        """Initialize client with httpx client and settings."""
-        self.client = httpx.Client(
-            timeout=TIMEOUT,
-            follow_redirects=True,
-            limits=httpx.Limits(max_connections=max_connections or None),
-        )
-        self._csrf_token = ""
-        self._cookies = None
+
+def endpoint(flow: Callable[P, Flow[T]]) -> Callable[P, T]:
+    """Turn an endpoint flow into a public client method.
+
+    The client's ``_run`` sends the requests of the flow: MusicApi returns
+    the result, AsyncMusicApi returns an awaitable of it.
+    """
+
+    @functools.wraps(flow)
+    def method(self, *args, **kwargs):
+        return self._run(flow(self, *args, **kwargs))
+
+    return method  # type: ignore[return-value]
+
+
+class ApiSession:
+    """Cookies and CSRF token shared by API clients."""
+
+    def __init__(self):
+        self.csrf_token = ""
+        self.cookies = None
+
+
+class BaseMusicApi:
+    """Endpoints, request building and cookie handling shared by all clients.
+
+    Every endpoint is written once, as a flow that yields the requests it
+    needs and builds the result from their responses (see ``endpoint``). The
+    sync and async clients only differ in ``_run``, which sends the requests.
+    """
+
+    def __init__(
+        self,
+        session: Optional[ApiSession] = None,
+        cache: Optional[ResponseCache] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        """Initialize shared client state."""
+        self.session = session if session else ApiSession()
+        self.cache = cache
+        self.resilience = resilience if resilience else Resilience()
+
+    @property
+    def _csrf_token(self) -> str:
+        return self.session.csrf_token
+
+    @_csrf_token.setter
+    def _csrf_token(self, value: str) -> None:
+        self.session.csrf_token = value
+
+    @property
+    def _cookies(self):
+        return self.session.cookies
+
+    @_cookies.setter
+    def _cookies(self, value) -> None:
+        self.session.cookies = value
 
     def _extract_csrf_token(self, cookies: Dict[str, str]) -> None:
         """Extract CSRF token from cookies."""
@@ -83,17 +215,16 @@ class MusicApi:
         if csrf_match:
             self._csrf_token = csrf_match.group(1)
 
-    def _request(
+    def _build_request(
         self,
-        method: str,
         path: str,
         params: Optional[Dict[str, Any]] = None,
         crypto_type: CryptoApi = CryptoApi.API,
         ua_type: str = "",
         append_csrf: bool = True,
         basic_url: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Make an HTTP request to the API."""
+    ) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, str]]:
+        """Build url, encrypted body and headers for an API request."""
         url = build_url(basic_url if basic_url else BASE_URL, path)
         if append_csrf and self._csrf_token:
             if "?" in url:
@@ -114,6 +245,9 @@ class MusicApi:
                 else choose_user_agent(ua_type)
             ),
         }
+        cookie = self._cookie_header()
+        if cookie:
+            headers["Cookie"] = cookie
 
         data = None
         if params is not None:
@@ -130,35 +264,68 @@ class MusicApi:
             else:
                 data = params
 
-        try:
-            resp = self.client.request(
-                method=method,
-                url=url,
-                data=data,
-                headers=headers,
-                cookies=self._cookies,
-            )
-            resp.raise_for_status()
+        return url, data, headers
 
-            # Update cookies and CSRF token
-            if resp.cookies.get("__csrf") is not None or resp.cookies.get("NMTID") is not None:
-                info("服务更新cookies")
-                self._cookies = resp.cookies
-                self._csrf_token = self._cookies.get("__csrf")
-                info(f"当前cookies: {self._cookies} && csrf: {self._csrf_token}")
+    def _cookie_header(self) -> str:
+        """Cookie header of the session.
 
-            result = resp.json()
-            return result
-        except Exception as e:
-            error(f"Request failed: {str(e)}")
-            if isinstance(e, httpx.HTTPError) and hasattr(e, "response"):
-                response = getattr(e, "response", None)
-                if response:
-                    error(f"Response status: {response.status_code}")
-                    error(f"Response text: {response.text}")
-            return {"code": -1, "msg": str(e)}
-
-    def login(self, username: str, password: str) -> LoginInfo:
+        The session's cookies are sent explicitly instead of through the
+        client's cookie jar, because the client is shared by every session.
+        """
+        if not self._cookies:
+            return ""
+        jar = httpx.Cookies(self._cookies).jar
+        return "; ".join(f"{cookie.name}={cookie.value}" for cookie in jar)
+
+    def _update_cookies(self, resp: httpx.Response) -> None:
+        """Update cookies and CSRF token from a response."""
+        if resp.cookies.get("__csrf") is not None or resp.cookies.get("NMTID") is not None:
+            info("服务更新cookies")
+            self._cookies = resp.cookies
+            self._csrf_token = self._cookies.get("__csrf")
+            info(f"当前cookies: {self._cookies} && csrf: {self._csrf_token}")
+
+    def _cache_scope(self, basic_url: Optional[str]) -> str:
+        """Scope of cached and coalesced responses: account and API host.
+
+        The account is a hash of the ``MUSIC_U`` auth cookie, so responses
+        of user-specific endpoints are not served to another login.
+        """
+        token = self._cookies.get("MUSIC_U") if self._cookies else None
+        account = hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+        return f"{account}@{basic_url or BASE_URL}"
+
+    def _cache_get(
+        self, path: str, params: Optional[Dict[str, Any]], scope: str
+    ) -> Optional[Dict[str, Any]]:
+        """Look up a response in the response cache."""
+        if self.cache is None:
+            return None
+        return self.cache.get(path, params, scope)
+
+    def _cache_set(
+        self, path: str, params: Optional[Dict[str, Any]], scope: str, result: Dict[str, Any]
+    ) -> None:
+        """Store a response in the response cache."""
+        if self.cache is not None:
+            self.cache.set(path, params, result, scope)
+
+    def _request_failed(self, e: Exception) -> Dict[str, Any]:
+        """Log a failed request and build the error result."""
+        error(f"Request failed: {str(e)}")
+        if isinstance(e, httpx.HTTPError) and hasattr(e, "response"):
+            response = getattr(e, "response", None)
+            if response:
+                error(f"Response status: {response.status_code}")
+                error(f"Response text: {response.text}")
+        return {"code": -1, "msg": str(e)}
+
+    def _run(self, flow: Flow[T]) -> Any:
+        """Send the requests of an endpoint flow, implemented by each client."""
+        raise NotImplementedError
+
+    @endpoint
+    def login(self, username: str, password: str) -> Flow[LoginInfo]:
         """Login with username (email/phone) and password."""
         params = {"password": password, "rememberLogin": "true"}
 
@@ -174,10 +341,11 @@ class MusicApi:
                 "1_jVUMqWEPke0/1/Vu56xCmJpo5vP1grjn_SOVVDzOc78w8OKLVZ2JH7IfkjSXqgfmh"
             )
 
-        result = self._request("POST", path, params)
-        return to_login_info(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        return to_login_info(result)
 
-    def login_cellphone(self, ctcode: str, phone: str, captcha: str) -> LoginInfo:
+    @endpoint
+    def login_cellphone(self, ctcode: str, phone: str, captcha: str) -> Flow[LoginInfo]:
         """Login with phone number and verification code."""
         path = "/api/login/cellphone"
         params = {
@@ -186,207 +354,276 @@ class MusicApi:
             "captcha": captcha,
             "rememberLogin": "true",
         }
-        result = self._request("POST", path, params)
-        return to_login_info(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        return to_login_info(result)
 
-    def captcha(self, ctcode: str, phone: str) -> None:
+    @endpoint
+    def captcha(self, ctcode: str, phone: str) -> Flow[None]:
         """Request SMS verification code."""
         path = "/api/sms/captcha/sent"
         params = {"cellphone": phone, "ctcode": ctcode}
-        self._request("POST", path, params)
+        yield ApiCall("POST", path, params)
 
-    def login_qr_create(self) -> Tuple[str, str]:
+    @endpoint
+    def login_qr_create(self) -> Flow[Tuple[str, str]]:
         """Create QR code for login."""
         path = "/api/login/qrcode/unikey"
         params = {"type": "1"}
-        result = self._request("POST", path, params)
+        result = yield ApiCall("POST", path, params)
         unikey = result["unikey"]
         return (f"https://music.163.com/login?codekey={unikey}", unikey)
 
-    def login_qr_check(self, key: str) -> Tuple[Msg, LoginInfo]:
+    @endpoint
+    def login_qr_check(self, key: str) -> Flow[Tuple[Msg, LoginInfo]]:
         """Check QR code login status."""
         path = "/api/login/qrcode/client/login"
         params = {"key": key, "type": "1"}
-        result = self._request("POST", path, params)
-        return (to_msg(json.dumps(result)), self.login_status())
+        result = yield ApiCall("POST", path, params)
+        return (to_msg(result), (yield from self._login_status()))
 
-    def login_status(self) -> LoginInfo:
+    @endpoint
+    def login_status(self) -> Flow[LoginInfo]:
         """Get current login status."""
+        return (yield from self._login_status())
+
+    def _login_status(self) -> Flow[LoginInfo]:
+        """Request the login status of the session."""
         path = "/api/nuser/account/get"
-        result = self._request("POST", path)
-        return to_login_info(json.dumps(result))
+        result = yield ApiCall("POST", path)
+        return to_login_info(result)
 
-    def logout(self) -> None:
+    @endpoint
+    def logout(self) -> Flow[None]:
         """Logout current user."""
         path = "/api/logout"
-        self._request("POST", path)
+        yield ApiCall("POST", path)
 
-    def daily_task(self) -> Msg:
+    @endpoint
+    def daily_task(self) -> Flow[Msg]:
         """Sign in for daily task."""
         path = "/api/point/dailyTask"
         params = {"type": "0"}
-        result = self._request("POST", path, params)
-        return to_msg(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        return to_msg(result)
 
-    def user_song_id_list(self, uid: int) -> List[int]:
+    @endpoint
+    def user_song_id_list(self, uid: int) -> Flow[List[int]]:
         """Get user's liked song IDs."""
         path = "/api/song/like/get"
         params = {"uid": str(uid)}
-        result = self._request("POST", path, params)
-        return to_song_id_list(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        return to_song_id_list(result)
 
+    @endpoint
     def user_song_list(
-        self, uid: int, offset: int = 0, limit: int = 30
-    ) -> List[SongList]:
-        """Get user's playlists."""
+        self, uid: int, offset: int = 0, limit: int = 30, as_table: bool = False
+    ) -> Flow[List[SongList]]:
+        """Get user's playlists.
+
+        Args:
+            uid: User ID
+            offset: Start offset
+            limit: Number of playlists
+            as_table: Store the songs of each playlist as a TrackTable
+        """
         path = "/api/user/playlist"
         params = {"uid": str(uid), "offset": str(offset), "limit": str(limit)}
-        result = self._request("POST", path, params)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Process each playlist
-            for playlist in result.get("playlist", []):
-                created_song_list = {
-                    "id": playlist.get("id", 0),
-                    "name": playlist.get("name", ""),
-                    "coverImgUrl": playlist.get("coverImgUrl", ""),
-                    "description": playlist.get("description", ""),
-                    "creator": playlist.get("creator", {}),
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps(
-                        {
-                            "code": 200,
-                            "playlist": {"tracks": playlist.get("tracks", [])},
-                        }
-                    ),
-                    "playlist",
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
-
-    def album_sublist(self, offset: int = 0, limit: int = 30) -> List[SongList]:
+        result = yield ApiCall("POST", path, params)
+        return to_song_lists(
+            result, result.get("playlist", []), "playlist", "playlist", as_table
+        )
+
+    @endpoint
+    def album_sublist(self, offset: int = 0, limit: int = 30) -> Flow[List[SongList]]:
         """Get user's subscribed albums."""
         path = "/api/album/sublist"
         params = {"total": "true", "offset": str(offset), "limit": str(limit)}
-        result = self._request("POST", path, params)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Extract subscribed album data which contains the album metadata
-            for album in result.get("data", []):
-                # Create metadata for a single album
-                created_song_list = {
-                    "id": album.get("id", 0),
-                    "name": album.get("name", ""),
-                    "coverImgUrl": album.get("picUrl", ""),
-                    "description": album.get("description", ""),
-                    "creator": {
-                        "nickname": album.get("artist", {}).get("name", "Unknown")
-                    },
-                }
-
-                # Get songs for this album
-                songs_in_album = to_song_info(
-                    json.dumps({"code": 200, "songs": [album]}), "album"
-                )
-                # Add the album as a song list
-                song_lists.extend(
-                    to_song_list_from_songs(songs_in_album, created_song_list)
-                )
-
-        return song_lists
-
-    def user_cloud_disk(self) -> List[SongInfo]:
+        result = yield ApiCall("POST", path, params)
+        return to_song_lists(result, result.get("data", []), "album", "album")
+
+    @endpoint
+    def user_cloud_disk(self) -> Flow[List[SongInfo]]:
         """Get user's cloud disk songs."""
         path = "/api/v1/cloud/get"
         params = {"offset": "0", "limit": "10000"}
-        result = self._request("POST", path, params)
-        return to_song_info(json.dumps(result), "cloud")
+        result = yield ApiCall("POST", path, params)
+        return to_song_info(result, "cloud")
 
-    def playlist_detail(self, songlist_id: int) -> PlayListDetail:
-        """Get playlist details."""
+    @endpoint
+    def playlist_detail(
+        self, songlist_id: int, as_table: bool = False
+    ) -> Flow[PlayListDetail]:
+        """Get playlist details with all of its tracks.
+
+        Tracks beyond the first PLAYLIST_FULL_PAGE are hydrated from
+        ``trackIds`` through concurrent song detail batches.
+
+        Args:
+            songlist_id: Playlist ID
+            as_table: Return the tracks as a TrackTable instead of a list
+
+        Raises:
+            ApiError: When the playlist itself could not be loaded
+        """
+        return (yield from self._playlist_detail(songlist_id, as_table))
+
+    def _playlist_detail(self, songlist_id: int, as_table: bool) -> Flow[PlayListDetail]:
+        """Request a playlist and hydrate all of its tracks."""
+        detail = yield from self._playlist_page(songlist_id, PLAYLIST_FULL_PAGE, as_table)
+        remaining = detail.trackIds[len(detail.tracks):]
+        if remaining:
+            results = yield self._song_detail_calls(remaining)
+            entries, _ = order_song_entries(remaining, results)
+            extend_tracks(detail.tracks, entries)
+        return detail
+
+    def _playlist_page(
+        self, songlist_id: int, n: int, as_table: bool
+    ) -> Flow[PlayListDetail]:
+        """Request playlist metadata, all track IDs and the first ``n`` tracks."""
         path = "/api/v6/playlist/detail"
         params = {
             "id": str(songlist_id),
             "offset": "0",
             "total": "true",
-            "limit": "1000",
-            "n": "1000",
+            "limit": str(n),
+            "n": str(n),
         }
-        result = self._request("POST", path, params)
-        return to_play_list_detail(result.get("playlist", {}))
+        result = check_code((yield ApiCall("POST", path, params)))
+        return to_play_list_detail(result.get("playlist", {}), as_table)
+
+    def _add_playlist_batch(
+        self,
+        songlist_id: int,
+        detail: PlayListDetail,
+        ids: List[int],
+        result: Dict[str, Any],
+    ) -> None:
+        """Add one song detail batch of a streamed playlist to its tracks."""
+        entries, missing = order_song_entries(ids, [result])
+        if missing:
+            warning(f"Songs not found in playlist {songlist_id}: {missing}")
+        extend_tracks(detail.tracks, entries)
+
+    @endpoint
+    def song_detail(self, id: int) -> Flow[SongInfo]:
+        """Get details for one song.
+
+        Raises:
+            ApiError: When the request failed or the song was not found
+        """
+        songs = check_code((yield self._song_detail_call([id]))).get("songs") or []
+        if not songs:
+            raise ApiError(404, f"song {id} not found")
+        return to_songinfo(songs[0])
 
-    def song_detail(self, id: int) -> SongInfo:
-        """Get details for multiple songs."""
+    @endpoint
+    def songs_detail(self, ids: List[int]) -> Flow[Tuple[List[SongInfo], List[int]]]:
+        """Get details for many songs.
+
+        IDs are sent in batches of SONG_DETAIL_BATCH, at most
+        MAX_CONCURRENT_REQUESTS batches are in flight at once.
+
+        Args:
+            ids: Song IDs
+
+        Returns:
+            Songs in the order of ``ids`` and the IDs that were not found
+        """
+        return to_songs_detail(ids, (yield self._song_detail_calls(ids)))
+
+    def _song_detail_calls(self, ids: List[int]) -> List[ApiCall]:
+        """Song detail requests in batches of SONG_DETAIL_BATCH."""
+        return [self._song_detail_call(chunk) for chunk in chunked(list(ids), SONG_DETAIL_BATCH)]
+
+    def _song_detail_call(self, ids: List[int]) -> ApiCall:
+        """Request for the details of one batch of songs."""
         path = "/api/v3/song/detail"
-        c = [{"id": str(id)}]
+        c = [{"id": str(id)} for id in ids]
         params = {"c": json.dumps(c)}
-        result = self._request("POST", path, params)
-        return to_songinfo(json.dumps(result.get("songs", [])[0]))
+        # a single song is on the playback path, hedge it against slow responses
+        return ApiCall("POST", path, params, hedge=len(ids) == 1)
+
+    @endpoint
+    def songs_url(self, id: int, br: str = "320000") -> Flow[SongUrl]:
+        """Get the URL of one song, ``url`` is None when it is not playable.
+
+        Raises:
+            ApiError: When the request failed or returned no entry
+        """
+        result = check_code((yield self._song_url_call([id], br)))
+        if not result.get("data"):
+            raise ApiError(404, f"no url for song {id}")
+        return to_song_url(result)
 
-    def songs_url(self, id: int, br: str = "320000") -> SongUrl:
-        """Get song URLs."""
+    @endpoint
+    def songs_urls(
+        self, ids: List[int], br_ladder: Tuple[int, ...] = SONG_URL_BR_LADDER
+    ) -> Flow[Dict[int, SongUrl]]:
+        """Get playable URLs for many songs.
+
+        All songs are first requested at the highest bitrate of the ladder,
+        the server answers with the best quality available up to it. Only
+        songs that got no URL are requested again at the next bitrate.
+
+        Args:
+            ids: Song IDs
+            br_ladder: Bitrates to try, highest first
+
+        Returns:
+            Mapping of song ID to SongUrl, unresolvable songs are left out
+        """
+        urls: Dict[int, SongUrl] = {}
+        pending = list(dict.fromkeys(ids))
+        for br in br_ladder:
+            if not pending:
+                break
+            results = yield [
+                self._song_url_call(chunk, str(br)) for chunk in chunked(pending, SONG_URL_BATCH)
+            ]
+            urls.update(to_song_urls(results))
+            pending = [id for id in pending if id not in urls]
+        return urls
+
+    def _song_url_call(self, ids: List[int], br: str) -> ApiCall:
+        """Request for the URLs of one batch of songs."""
         path = "/api/song/enhance/player/url"
-        params = {"ids": json.dumps([id]), "br": br}
-        result = self._request(
+        params = {"ids": json.dumps(ids), "br": br}
+        return ApiCall(
             "POST",
             path,
             params,
             # crypto_type=CryptoApi.EAPI,
             basic_url="https://interface3.music.163.com",
-        )
-        result = result.get("data", [])[0]
-        return SongUrl(
-            id=result.get("id"),
-            url=result.get("url"),
-            br=result.get("br"),
-            size=result.get("size"),
-            md5=result.get("md5"),
-            type=result.get("type"),
+            hedge=len(ids) == 1,
         )
 
-    def recommend_resource(self) -> List[SongList]:
+    @endpoint
+    def recommend_resource(self) -> Flow[List[SongList]]:
         """Get daily recommended playlists."""
         path = "/api/v1/discovery/recommend/resource"
-        result = self._request("POST", path)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Process each recommended resource
-            for rec in result.get("recommend", []):
-                created_song_list = {
-                    "id": rec.get("id", 0),
-                    "name": rec.get("name", ""),
-                    "coverImgUrl": rec.get("picUrl", ""),
-                    "description": rec.get("copywriter", ""),
-                    "creator": rec.get("creator", {}),
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps({"code": 200, "recommend": [rec]}), "recommend"
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
-
-    def recommend_songs(self) -> List[SongInfo]:
+        result = yield ApiCall("POST", path)
+        return to_song_lists(
+            result, result.get("recommend", []), "recommend", "recommend"
+        )
+
+    @endpoint
+    def recommend_songs(self) -> Flow[List[SongInfo]]:
         """Get daily recommended songs."""
         path = "/api/v2/discovery/recommend/songs"
         params = {"total": "true"}
-        result = self._request("POST", path, params)
-        return to_song_info(json.dumps(result), "recommend_songs")
+        result = yield ApiCall("POST", path, params)
+        return to_song_info(result, "recommend_songs")
 
-    def personal_fm(self) -> List[SongInfo]:
+    @endpoint
+    def personal_fm(self) -> Flow[List[SongInfo]]:
         """Get personal FM playlist."""
         path = "/api/v1/radio/get"
-        result = self._request("POST", path)
-        return to_song_info(json.dumps(result), "personal_fm")
+        result = yield ApiCall("POST", path)
+        return to_song_info(result, "personal_fm")
 
-    def like(self, songid: int, like: bool = True) -> bool:
+    @endpoint
+    def like(self, songid: int, like: bool = True) -> Flow[bool]:
         """Like/unlike a song."""
         path = "/api/radio/like"
         params = {
@@ -395,22 +632,34 @@ class MusicApi:
             "like": str(like).lower(),
             "time": "25",
         }
-        result = self._request("POST", path, params)
-        msg = to_msg(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        msg = to_msg(result)
         return msg.code == 200
 
-    def fm_trash(self, songid: int) -> bool:
+    @endpoint
+    def fm_trash(self, songid: int) -> Flow[bool]:
         """Add song to FM trash."""
         path = "/api/radio/trash/add"
         params = {"alg": "RT", "songId": str(songid), "time": "25"}
-        result = self._request("POST", path, params)
-        msg = to_msg(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        msg = to_msg(result)
         return msg.code == 200
 
+    @endpoint
     def search(
         self, keywords: str, type_: int = 1, offset: int = 0, limit: int = 30
-    ) -> str:
+    ) -> Flow[str]:
         """Search for music/albums/artists/playlists/etc."""
+        return json.dumps((yield from self._search(keywords, type_, offset, limit)))
+
+    def _search(
+        self, keywords: str, type_: int, offset: int, limit: int
+    ) -> Flow[Dict[str, Any]]:
+        """Run a search and return the parsed response.
+
+        Raises:
+            ApiError: When the request failed
+        """
         path = "/api/search/get"
         params = {
             "s": keywords,
@@ -418,12 +667,27 @@ class MusicApi:
             "offset": str(offset),
             "limit": str(limit),
         }
-        result = self._request("POST", path, params)
-        return json.dumps(result)
+        return check_code((yield ApiCall("POST", path, params)))
+
+    @endpoint
+    def search_suggest(self, keywords: str) -> Flow[List[str]]:
+        """Get keyword suggestions for a partial search query.
+
+        Args:
+            keywords: Text typed so far
 
+        Returns:
+            Suggested search keywords
+        """
+        path = "/api/search/suggest/keyword"
+        params = {"s": keywords}
+        result = yield ApiCall("POST", path, params)
+        return to_search_suggest(result)
+
+    @endpoint
     def search_song(
         self, keywords: str, offset: int = 0, limit: int = 30
-    ) -> List[SongInfo]:
+    ) -> Flow[List[SongInfo]]:
         """Search for songs.
 
         Args:
@@ -433,20 +697,17 @@ class MusicApi:
 
         Returns:
             List of matched songs
-        """
-        result = self.search(keywords, 1, offset, limit)
-        result = json.loads(result)
-        song_list = []
 
-        if result and "code" in result and result["code"] == 200:
-            # Process each song in search results
-            for song in result.get("result", {}).get("songs", []):
-                song_list.append(to_songinfo(json.dumps(song)))
-        return song_list
+        Raises:
+            ApiError: When the request failed
+        """
+        result = yield from self._search(keywords, 1, offset, limit)
+        return to_search_songs(result)
 
+    @endpoint
     def search_singer(
         self, keywords: str, offset: int = 0, limit: int = 30
-    ) -> List[SingerInfo]:
+    ) -> Flow[List[SingerInfo]]:
         """Search for singers.
 
         Args:
@@ -456,16 +717,25 @@ class MusicApi:
 
         Returns:
             List of matched singers
+
+        Raises:
+            ApiError: When the request failed
         """
-        result = self.search(keywords, 100, offset, limit)
+        result = yield from self._search(keywords, 100, offset, limit)
         return [
-            SingerInfo(**singer)
-            for singer in json.loads(result).get("result", {}).get("artists", [])
+            SingerInfo(
+                id=singer.get("id", 0),
+                name=singer.get("name", ""),
+                picUrl=singer.get("picUrl"),
+                alias=singer.get("alias") or [],
+            )
+            for singer in result.get("result", {}).get("artists", [])
         ]
 
+    @endpoint
     def search_album(
         self, keywords: str, offset: int = 0, limit: int = 30
-    ) -> List[SongList]:
+    ) -> Flow[List[SongList]]:
         """Search for albums.
 
         Args:
@@ -475,34 +745,22 @@ class MusicApi:
 
         Returns:
             List of matched albums
+
+        Raises:
+            ApiError: When the request failed
         """
-        result = self.search(keywords, 10, offset, limit)
-        result_data = json.loads(result)
-        song_lists = []
-
-        if result_data and "code" in result_data and result_data["code"] == 200:
-            # Process each album in search results
-            for album in result_data.get("result", {}).get("albums", []):
-                created_song_list = {
-                    "id": album.get("id", 0),
-                    "name": album.get("name", ""),
-                    "coverImgUrl": album.get("picUrl", ""),
-                    "description": album.get("description", ""),
-                    "creator": {
-                        "nickname": album.get("artist", {}).get("name", "Unknown")
-                    },
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps({"code": 200, "songs": [album]}), "album"
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
+        result_data = yield from self._search(keywords, 10, offset, limit)
+        return to_song_lists(
+            result_data,
+            result_data.get("result", {}).get("albums", []),
+            "album",
+            "album",
+        )
 
+    @endpoint
     def search_songlist(
         self, keywords: str, offset: int = 0, limit: int = 30
-    ) -> List[SongList]:
+    ) -> Flow[List[SongList]]:
         """Search for playlists.
 
         Args:
@@ -512,32 +770,22 @@ class MusicApi:
 
         Returns:
             List of matched playlists
+
+        Raises:
+            ApiError: When the request failed
         """
-        result = self.search(keywords, 1000, offset, limit)
-        result_data = json.loads(result)
-        song_lists = []
-
-        if result_data and "code" in result_data and result_data["code"] == 200:
-            # Process each playlist in search results
-            for playlist in result_data.get("result", {}).get("playlists", []):
-                created_song_list = {
-                    "id": playlist.get("id", 0),
-                    "name": playlist.get("name", ""),
-                    "coverImgUrl": playlist.get("coverImgUrl", ""),
-                    "description": playlist.get("description", ""),
-                    "creator": playlist.get("creator", {}),
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps({"code": 200, "playlist": playlist}), "playlist"
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
+        result_data = yield from self._search(keywords, 1000, offset, limit)
+        return to_song_lists(
+            result_data,
+            result_data.get("result", {}).get("playlists", []),
+            "playlist",
+            "playlist",
+        )
 
+    @endpoint
     def search_lyrics(
         self, keywords: str, offset: int = 0, limit: int = 30
-    ) -> List[SongInfo]:
+    ) -> Flow[List[SongInfo]]:
         """Search for lyrics.
 
         Args:
@@ -547,23 +795,28 @@ class MusicApi:
 
         Returns:
             List of songs matched by lyrics
+
+        Raises:
+            ApiError: When the request failed
         """
-        result = self.search(keywords, 1006, offset, limit)
-        return to_song_info(json.dumps(result), "search")
+        result = yield from self._search(keywords, 1006, offset, limit)
+        return to_song_info(result, "search")
 
-    def singer_songs(self, id: int) -> List[SongInfo]:
+    @endpoint
+    def singer_songs(self, id: int) -> Flow[List[SongInfo]]:
         """Get singer's hot songs.
 
         Args:
             id: Singer ID
         """
         path = f"/api/v1/artist/{id}"
-        result = self._request("POST", path, {}, append_csrf=False)
-        return to_song_info(json.dumps(result), "singer")
+        result = yield ApiCall("POST", path, {}, append_csrf=False)
+        return to_song_info(result, "singer")
 
+    @endpoint
     def singer_all_songs(
         self, id: int, order: str = "hot", offset: int = 0, limit: int = 30
-    ) -> List[SongInfo]:
+    ) -> Flow[List[SongInfo]]:
         """Get all songs of a singer.
 
         Args:
@@ -581,12 +834,13 @@ class MusicApi:
             "offset": str(offset),
             "limit": str(limit),
         }
-        result = self._request("POST", path, params, append_csrf=False)
-        return to_song_info(json.dumps(result), "singer_songs")
+        result = yield ApiCall("POST", path, params, append_csrf=False)
+        return to_song_info(result, "singer_songs")
 
+    @endpoint
     def new_albums(
         self, area: str = "ALL", offset: int = 0, limit: int = 30
-    ) -> List[SongList]:
+    ) -> Flow[List[SongList]]:
         """Get new albums.
 
         Args:
@@ -601,40 +855,22 @@ class MusicApi:
             "limit": str(limit),
             "total": "true",
         }
-        result = self._request("POST", path, params)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Process each new album
-            for album in result.get("albums", []):
-                created_song_list = {
-                    "id": album.get("id", 0),
-                    "name": album.get("name", ""),
-                    "coverImgUrl": album.get("picUrl", ""),
-                    "description": album.get("description", ""),
-                    "creator": {
-                        "nickname": album.get("artist", {}).get("name", "Unknown")
-                    },
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps({"code": 200, "songs": [album]}), "album"
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
-
-    def album(self, album_id: int) -> AlbumDetail:
+        result = yield ApiCall("POST", path, params)
+        return to_song_lists(result, result.get("albums", []), "album", "album")
+
+    @endpoint
+    def album(self, album_id: int) -> Flow[AlbumDetail]:
         """Get album details.
 
         Args:
             album_id: Album ID
         """
         path = f"/api/v1/album/{album_id}"
-        result = self._request("POST", path, {})
+        result = yield ApiCall("POST", path, {})
         return to_album_detail(result)
 
-    def songlist_detail_dynamic(self, songlist_id: int) -> PlayListDetailDynamic:
+    @endpoint
+    def songlist_detail_dynamic(self, songlist_id: int) -> Flow[PlayListDetailDynamic]:
         """Get dynamic details of a playlist.
 
         Args:
@@ -642,15 +878,11 @@ class MusicApi:
         """
         path = "/api/playlist/detail/dynamic"
         params = {"id": str(songlist_id)}
-        result = self._request("POST", path, params)
-        return PlayListDetailDynamic(
-            subscribed=result.get("subscribed", False),
-            shareCount=result.get("shareCount", 0),
-            commentCount=result.get("commentCount", 0),
-            playCount=result.get("playCount", 0),
-        )
+        result = yield ApiCall("POST", path, params)
+        return to_play_list_detail_dynamic(result)
 
-    def album_detail_dynamic(self, album_id: int) -> AlbumDetailDynamic:
+    @endpoint
+    def album_detail_dynamic(self, album_id: int) -> Flow[AlbumDetailDynamic]:
         """Get dynamic details of an album.
 
         Args:
@@ -658,18 +890,13 @@ class MusicApi:
         """
         path = "/api/album/detail/dynamic"
         params = {"id": str(album_id)}
-        result = self._request("POST", path, params)
-        return AlbumDetailDynamic(
-            onSale=result.get("onSale", False),
-            subCount=result.get("subCount", 0),
-            liked=result.get("liked", False),
-            commentCount=result.get("commentCount", 0),
-            shareCount=result.get("shareCount", 0),
-        )
+        result = yield ApiCall("POST", path, params)
+        return to_album_detail_dynamic(result)
 
+    @endpoint
     def top_song_list(
         self, cat: str = "全部", order: str = "hot", offset: int = 0, limit: int = 30
-    ) -> List[SongList]:
+    ) -> Flow[List[SongList]]:
         """Get top playlists with no track details.
 
         Args:
@@ -686,20 +913,13 @@ class MusicApi:
             "offset": str(offset),
             "limit": str(limit),
         }
-        result = self._request("POST", path, params)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Process each playlist from result directly
-            for playlist in result.get("playlists", []):
-                # Create SongList without song details for now
-                song_lists.append(to_playlist(json.dumps(playlist)))
-
-        return song_lists
+        result = yield ApiCall("POST", path, params)
+        return to_playlists(result)
 
+    @endpoint
     def top_song_list_highquality(
         self, cat: str = "全部", lasttime: int = 0, limit: int = 30
-    ) -> List[SongList]:
+    ) -> Flow[List[SongList]]:
         """Get high quality playlists.
 
         Args:
@@ -714,57 +934,34 @@ class MusicApi:
             "lasttime": str(lasttime),
             "limit": str(limit),
         }
-        result = self._request("POST", path, params)
-        song_lists = []
-
-        if result and "code" in result and result["code"] == 200:
-            # Process each high quality playlist
-            for playlist in result.get("playlists", []):
-                created_song_list = {
-                    "id": playlist.get("id", 0),
-                    "name": playlist.get("name", ""),
-                    "coverImgUrl": playlist.get("coverImgUrl", ""),
-                    "description": playlist.get("description", ""),
-                    "creator": playlist.get("creator", {}),
-                }
-                # Get songs
-                songs = to_song_info(
-                    json.dumps({"code": 200, "playlist": playlist}), "playlist"
-                )
-                song_lists.extend(to_song_list_from_songs(songs, created_song_list))
-
-        return song_lists
-
-    def toplist(self) -> List[TopList]:
+        result = yield ApiCall("POST", path, params)
+        return to_song_lists(result, result.get("playlists", []), "playlist", "playlist")
+
+    @endpoint
+    def toplist(self) -> Flow[List[TopList]]:
         """Get all toplists."""
         path = "/api/toplist"
-        result = self._request("POST", path, {})
-        toplists = []
-        for item in result.get("list", []):
-            toplist = TopList(
-                id=item["id"],
-                name=item["name"],
-                description=item.get("description", ""),
-                coverImgUrl=item.get("coverImgUrl", ""),
-                updateFrequency=item.get("updateFrequency", ""),
-                tracks=item.get("tracks", []),
-            )
-            toplists.append(toplist)
-        return toplists
+        result = yield ApiCall("POST", path, {})
+        return to_toplists(result)
 
-    def top_songs(self, list_id: int) -> PlayListDetail:
+    @endpoint
+    def top_songs(self, list_id: int) -> Flow[PlayListDetail]:
         """Get songs in a toplist.
 
         Args:
             list_id: Toplist ID
         """
-        return self.song_list_detail(list_id)
+        return (yield from self._playlist_detail(list_id, False))
 
-    def song_lyric(self, music_id: int) -> Lyrics:
+    @endpoint
+    def song_lyric(self, music_id: int) -> Flow[Lyrics]:
         """Get song lyrics.
 
         Args:
             music_id: Song ID
+
+        Raises:
+            ApiError: When the request failed
         """
         path = "/weapi/song/lyric"
         params = {
@@ -773,13 +970,10 @@ class MusicApi:
             "tv": "-1",
             "csrf_token": self._csrf_token,
         }
-        result = self._request("POST", path, params)
-        return Lyrics(
-            lrc=result.get("lrc", {}).get("lyric", ""),
-            tlyric=result.get("tlyric", {}).get("lyric", ""),
-        )
+        return to_lyrics(check_code((yield ApiCall("POST", path, params))))
 
-    def song_list_like(self, like: bool, id: int) -> bool:
+    @endpoint
+    def song_list_like(self, like: bool, id: int) -> Flow[bool]:
         """Subscribe/unsubscribe to a playlist.
 
         Args:
@@ -788,11 +982,12 @@ class MusicApi:
         """
         path = "/api/playlist/subscribe" if like else "/api/playlist/unsubscribe"
         params = {"id": str(id)}
-        result = self._request("POST", path, params)
-        msg = to_msg(json.dumps(result))
+        result = yield ApiCall("POST", path, params)
+        msg = to_msg(result)
         return msg.code == 200
 
-    def album_like(self, like: bool, id: int) -> bool:
+    @endpoint
+    def album_like(self, like: bool, id: int) -> Flow[bool]:
         """Subscribe/unsubscribe to an album.
 
         Args:
@@ -801,11 +996,12 @@ class MusicApi:
         """
         path = f"/api/album/{'sub' if like else 'unsub'}?id={id}"
         params = {"id": str(id)}
-        result = self._request("POST", path, params, append_csrf=False)
-        msg = to_msg(json.dumps(result))
+        result = yield ApiCall("POST", path, params, append_csrf=False)
+        msg = to_msg(result)
         return msg.code == 200
 
-    def homepage(self, client_type: Optional[ClientType] = None) -> str:
+    @endpoint
+    def homepage(self, client_type: Optional[ClientType] = None) -> Flow[str]:
         """Get homepage block data.
 
         Args:
@@ -813,48 +1009,19 @@ class MusicApi:
         """
         path = "/api/homepage/block/page"
         params = {"refresh": "false", "cursor": "null"}
-        result = self._request("POST", path, params)
+        result = yield ApiCall("POST", path, params)
         return json.dumps(result)
 
-    def banners(self) -> List[BannersInfo]:
+    @endpoint
+    def banners(self) -> Flow[List[BannersInfo]]:
         """Get homepage banners."""
         path = "/api/v2/banner/get"
         params = {"clientType": "pc"}
-        result = self._request("POST", path, params)
-        return to_banners_info(json.dumps(result))
-
-    def download_img(self, url: str, path: str, width: int, height: int) -> None:
-        """Download an image from network and save to local path.
+        result = yield ApiCall("POST", path, params)
+        return to_banners_info(result)
 
-        Args:
-            url: Image URL
-            path: Local save path (including filename)
-            width: Image width
-            height: Image height
-        """
-        if not os.path.exists(path):
-            image_url = f"{url}?param={width}y{height}"
-            response = self.client.get(image_url)
-            response.raise_for_status()
-
-            with open(path, "wb") as f:
-                f.write(response.content)
-
-    def download_song(self, url: str, path: str) -> None:
-        """Download a song from network and save to local path.
-
-        Args:
-            url: Song URL
-            path: Local save path (including filename)
-        """
-        if not os.path.exists(path):
-            response = self.client.get(url)
-            response.raise_for_status()
-
-            with open(path, "wb") as f:
-                f.write(response.content)
-
-    def user_radio_sublist(self, offset: int = 0, limit: int = 30) -> Dict[str, Any]:
+    @endpoint
+    def user_radio_sublist(self, offset: int = 0, limit: int = 30) -> Flow[Dict[str, Any]]:
         """Get user's subscribed radio lists.
 
         Args:
@@ -866,11 +1033,12 @@ class MusicApi:
         """
         path = "/api/djradio/get/subed"
         params = {"total": "true", "offset": str(offset), "limit": str(limit)}
-        return self._request("POST", path, params)
+        return (yield ApiCall("POST", path, params))
 
+    @endpoint
     def radio_program(
         self, radio_id: int, offset: int = 0, limit: int = 30, asc: bool = False
-    ) -> Dict[str, Any]:
+    ) -> Flow[Dict[str, Any]]:
         """Get program list for a radio station.
 
         Args:
@@ -889,14 +1057,15 @@ class MusicApi:
             "limit": str(limit),
             "asc": str(asc).lower(),
         }
-        return self._request("POST", path, params)
+        return (yield ApiCall("POST", path, params))
 
+    @endpoint
     def playmode_intelligence_list(
         self,
         song_id: int,
         sid: Optional[str] = None,
         play_list_id: Optional[str] = None,
-    ) -> Dict[str, Any]:
+    ) -> Flow[Dict[str, Any]]:
         """Get intelligent playlist based on a song (heart mode).
 
         Args:
@@ -914,4 +1083,201 @@ class MusicApi:
         if play_list_id:
             params["playlistId"] = play_list_id
 
-        return self._request("POST", path, params)
+        return (yield ApiCall("POST", path, params))
+
+
+class MusicApi(BaseMusicApi):
+    """NetEase Cloud Music API client."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        session: Optional[ApiSession] = None,
+        cache: Optional[ResponseCache] = None,
+        transport: Optional[HttpTransport] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        """Initialize client with httpx client and settings.
+
+        Args:
+            max_connections: Connection limit of a private pool; None uses the
+                shared transport
+            session: Session to share cookies with another client
+            cache: Response cache for read-only endpoints
+            transport: Transport to send requests through, defaults to the
+                process-wide shared transport
+            resilience: Retry, hedging and circuit breaker settings
+        """
+        super().__init__(session, cache, resilience)
+        self._flight = SingleFlight()  # coalesces identical in-flight requests
+        if transport is None:
+            transport = (
+                HttpTransport(max_connections=max_connections)
+                if max_connections is not None
+                else default_transport()
+            )
+        self.transport = transport
+        self.client = transport.client
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        crypto_type: CryptoApi = CryptoApi.API,
+        ua_type: str = "",
+        append_csrf: bool = True,
+        basic_url: Optional[str] = None,
+        hedge: bool = False,
+    ) -> Dict[str, Any]:
+        """Make an HTTP request to the API.
+
+        Idempotent endpoints are retried with backoff; ``hedge`` sends a
+        duplicate request when the first one is slow. Identical idempotent
+        requests running at the same time share one network request.
+        """
+        scope = self._cache_scope(basic_url)
+        cached = self._cache_get(path, params, scope)
+        if cached is not None:
+            return cached
+
+        def send():
+            return self._send(
+                method, path, params, crypto_type, ua_type, append_csrf, basic_url, hedge,
+                scope,
+            )
+
+        if is_idempotent(path):
+            return self._flight.do(flight_key(path, params, scope), send)
+        return send()
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        crypto_type: CryptoApi,
+        ua_type: str,
+        append_csrf: bool,
+        basic_url: Optional[str],
+        hedge: bool,
+        scope: str,
+    ) -> Dict[str, Any]:
+        """Send one API request and cache its response in ``scope``."""
+        url, data, headers = self._build_request(
+            path, params, crypto_type, ua_type, append_csrf, basic_url
+        )
+
+        try:
+            resp = self.resilience.send(
+                path,
+                httpx.URL(url).host,
+                lambda: self.client.request(
+                    method=method,
+                    url=url,
+                    data=data,
+                    headers=headers,
+                ),
+                hedge,
+            )
+            resp.raise_for_status()
+            self._update_cookies(resp)
+            result = resp.json()
+            self._cache_set(path, params, scope, result)
+            return result
+        except Exception as e:
+            return self._request_failed(e)
+
+    def _run(self, flow: Flow[T]) -> T:
+        """Drive an endpoint flow to completion and return its result."""
+        try:
+            calls = next(flow)
+            while True:
+                calls = flow.send(self._answer(calls))
+        except StopIteration as stop:
+            return stop.value
+
+    def _answer(self, calls: Union[ApiCall, List[ApiCall]]) -> Any:
+        """Send the requests yielded by a flow, a list of them concurrently."""
+        if isinstance(calls, ApiCall):
+            return self._request(*calls)
+        if not calls:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(len(calls), MAX_CONCURRENT_REQUESTS)
+        ) as pool:
+            return list(pool.map(lambda call: self._request(*call), calls))
+
+    def playlist_stream(
+        self,
+        songlist_id: int,
+        as_table: bool = False,
+        first_page: int = PLAYLIST_FIRST_PAGE,
+    ) -> Iterator[PlayListDetail]:
+        """Load a playlist progressively.
+
+        The first item holds the playlist metadata, all ``trackIds`` and the
+        first ``first_page`` tracks. Each following item adds one batch of
+        SONG_DETAIL_BATCH hydrated tracks. The same PlayListDetail is yielded
+        every time, after the last item its tracks are complete.
+
+        Args:
+            songlist_id: Playlist ID
+            as_table: Return the tracks as a TrackTable instead of a list
+            first_page: Number of tracks included in the first response
+
+        Yields:
+            The playlist with the tracks loaded so far
+
+        Raises:
+            ApiError: When the playlist itself could not be loaded
+        """
+        detail = self._run(self._playlist_page(songlist_id, first_page, as_table))
+        yield detail
+        for chunk in chunked(detail.trackIds[len(detail.tracks):], SONG_DETAIL_BATCH):
+            result = self._answer(self._song_detail_call(chunk))
+            self._add_playlist_batch(songlist_id, detail, chunk, result)
+            yield detail
+
+    def fetch_img(self, url: str, width: int, height: int) -> bytes:
+        """Download a server-resized image.
+
+        Args:
+            url: Image URL
+            width: Requested width in pixels
+            height: Requested height in pixels
+        Returns:
+            Encoded image bytes
+        """
+        response = self.client.get(sized_image_url(url, width, height))
+        response.raise_for_status()
+        return response.content
+
+    def download_img(self, url: str, path: str, width: int, height: int) -> None:
+        """Download an image from network and save to local path.
+
+        Args:
+            url: Image URL
+            path: Local save path (including filename)
+            width: Image width
+            height: Image height
+        """
+        if not os.path.exists(path):
+            content = self.fetch_img(url, width, height)
+
+            with open(path, "wb") as f:
+                f.write(content)
+
+    def download_song(self, url: str, path: str) -> None:
+        """Download a song from network and save to local path.
+
+        Args:
+            url: Song URL
+            path: Local save path (including filename)
+        """
+        if not os.path.exists(path):
+            response = self.client.get(url)
+            response.raise_for_status()
+
+            with open(path, "wb") as f:
+                f.write(response.content)
@@ -4,7 +4,17 @@ Constants used in the NetEase Cloud Music API.
 
 BASE_URL = "https://music.163.com"
 
-TIMEOUT = 100  # seconds
+# Timeouts (seconds) of the shared HTTP transport. Connecting and waiting for
+# a free pooled connection fail fast; reads allow slow audio servers.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+WRITE_TIMEOUT = 30
+POOL_TIMEOUT = 10
+
+# Connection pool of the shared HTTP transport
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+KEEPALIVE_EXPIRY = 120  # seconds an idle connection is kept open
 
 LINUX_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/60.0.3112.90 Safari/537.36"
 
@@ -24,3 +34,65 @@ USER_AGENT_LIST = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/51.0.2704.103 Safari/537.36",
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/42.0.2311.135 Safari/537.36 Edge/13.1058",
 ]
+
+# Response cache lifetime (seconds) of read-only endpoints. Paths ending with
+# "/" match every path under them. Endpoints not listed here, e.g. login and
+# like/subscribe requests, are never cached.
+CACHE_TTL = {
+    "/api/v6/playlist/detail": 10 * 60,
+    "/api/v1/album/": 24 * 60 * 60,
+    "/api/v3/song/detail": 24 * 60 * 60,
+    "/api/toplist": 60 * 60,
+    "/api/playlist/list": 30 * 60,
+    "/api/playlist/highquality/list": 30 * 60,
+    "/api/album/new": 60 * 60,
+    "/api/v1/artist/": 60 * 60,
+    "/api/v2/banner/get": 30 * 60,
+    "/api/search/get": 10 * 60,
+    "/api/search/suggest/keyword": 60 * 60,
+    "/weapi/song/lyric": 7 * 24 * 60 * 60,
+}
+
+CACHE_MAX_ENTRIES = 5000
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Maximum number of song IDs sent in one /api/v3/song/detail request
+SONG_DETAIL_BATCH = 500
+
+# Tracks included in the first playlist detail response of a streamed load
+PLAYLIST_FIRST_PAGE = 50
+
+# Tracks included in the playlist detail response of a complete load
+PLAYLIST_FULL_PAGE = 1000
+
+# Maximum number of batch requests running at the same time
+MAX_CONCURRENT_REQUESTS = 4
+
+# Maximum number of song IDs sent in one song url request
+SONG_URL_BATCH = 200
+
+# Bitrates tried in order when resolving song urls
+SONG_URL_BR_LADDER = (999000, 320000, 128000)
+
+# Retries of idempotent read requests: attempts including the first one and
+# the exponential backoff range (seconds), randomized with full jitter
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+
+# Per-endpoint retry budget: every request earns RETRY_BUDGET_RATIO retry
+# tokens up to RETRY_BUDGET_MAX, every retry spends one
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MAX = 10
+
+# Endpoints that are safe to send more than once. Paths ending with "/"
+# match every path under them.
+IDEMPOTENT_PATHS = tuple(CACHE_TTL) + ("/api/song/enhance/player/url",)
+
+# A host is skipped for BREAKER_RESET seconds after BREAKER_FAILURES
+# consecutive failed requests
+BREAKER_FAILURES = 5
+BREAKER_RESET = 15
+
+# Seconds without a response before a hedged request sends a duplicate
+HEDGE_DELAY = 0.3
@@ -6,7 +6,8 @@ import base64
 import json
 import random
 import hashlib
-from typing import Dict, Any, Union
+import threading
+from typing import Dict, Any, Iterable, List, Tuple, Union
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
 from Crypto.PublicKey import RSA
@@ -23,11 +24,106 @@ MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDgtQn2JZ34ZC28NWYpAUd98iZ3
 cBFK9snQXE9/DDaFt6Rr7iVZMldczhC0JNgTz+SHXT6CBHuX3e9SdB1Ua44oncaTWz7O
 BGLbCiK45wIDAQAB
 -----END PUBLIC KEY-----"""
+KEY_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+# Number of precomputed (secKey, encSecKey) pairs kept by a CryptoEngine
+WEAPI_KEY_POOL_SIZE = 32
 
 def create_key(size: int) -> str:
     """Create a random key string."""
-    chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-    return ''.join(random.choice(chars) for _ in range(size))
+    return ''.join(random.choices(KEY_CHARS, k=size))
+
+class CryptoEngine:
+    """Reusable encryption state for the API endpoints.
+
+    The RSA public key is parsed once and its cipher kept for the lifetime of
+    the engine. WEAPI only needs the server to be able to decrypt ``secKey``,
+    so the engine precomputes a pool of random secret keys together with their
+    RSA-encrypted form and draws from it, removing the RSA operation from the
+    per-request path. AES-CBC cipher objects carry chaining state and cannot be
+    reused across messages, so only their key material is cached.
+    """
+
+    def __init__(self, pool_size: int = WEAPI_KEY_POOL_SIZE):
+        """Create an engine.
+
+        Args:
+            pool_size: Number of precomputed WEAPI secret keys. The pool is
+                filled lazily on the first WEAPI request.
+        """
+        self.pool_size = max(1, pool_size)
+        self._rsa = PKCS1_v1_5.new(RSA.import_key(RSA_PUBLIC_KEY))
+        self._iv = IV.encode()
+        self._weapi_key = WEAPI_KEY.encode()
+        self._linux_api_key = LINUX_API_KEY.encode()
+        self._eapi_key = EAPIKEY.encode()
+        self._key_pool: List[Tuple[bytes, str]] = []
+        self._lock = threading.Lock()
+
+    def _encrypt_sec_key(self, sec_key: str) -> str:
+        """RSA-encrypt a reversed WEAPI secret key."""
+        return base64.b64encode(self._rsa.encrypt(sec_key[::-1].encode())).decode('utf-8')
+
+    def _sec_key(self) -> Tuple[bytes, str]:
+        """Pick a precomputed (secKey, encSecKey) pair."""
+        if not self._key_pool:
+            with self._lock:
+                if not self._key_pool:
+                    pool = []
+                    for _ in range(self.pool_size):
+                        sec_key = create_key(16)
+                        pool.append((sec_key.encode(), self._encrypt_sec_key(sec_key)))
+                    self._key_pool = pool
+        return random.choice(self._key_pool)
+
+    def _aes_encrypt(self, data: bytes, key: bytes) -> bytes:
+        """AES-CBC encrypt and base64 encode raw bytes."""
+        cipher = AES.new(key, AES.MODE_CBC, self._iv)
+        return base64.b64encode(cipher.encrypt(pad(data, 16)))
+
+    def weapi(self, params: Dict[str, Any]) -> Dict[str, str]:
+        """WeAPI encryption method."""
+        sec_key, enc_sec_key = self._sec_key()
+        enc_text = self._aes_encrypt(json.dumps(params).encode(), self._weapi_key)
+        enc_text = self._aes_encrypt(enc_text, sec_key)
+        return {
+            'params': enc_text.decode(),
+            'encSecKey': enc_sec_key
+        }
+
+    def weapi_many(self, params_list: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Encrypt the payloads of several WEAPI requests at once.
+
+        Args:
+            params_list: Request parameters, one dict per request.
+
+        Returns:
+            The encrypted form data for each request, in input order.
+        """
+        return [self.weapi(params) for params in params_list]
+
+    def linux_api(self, text: Union[Dict[str, Any], str]) -> Dict[str, str]:
+        """Linux API encryption method."""
+        if isinstance(text, dict):
+            text = json.dumps(text)
+        return {
+            "eparams": self._aes_encrypt(text.encode(), self._linux_api_key).decode()
+        }
+
+    def eapi(self, input_data: Dict[str, Any]) -> Dict[str, str]:
+        """E API encryption method."""
+        url = input_data.get('url', '')
+        text = json.dumps(input_data.get('params', {}))
+
+        message = f"nobody{url}use{text}md5forencrypt"
+        digest = hashlib.md5(message.encode()).hexdigest()
+        text_to_encrypt = f"{url}-36cd479b6b5-{text}-36cd479b6b5-{digest}"
+
+        return {
+            "params": self._aes_encrypt(text_to_encrypt.encode(), self._eapi_key).decode()
+        }
+
+# Shared engine used by the static Crypto helpers
+default_engine = CryptoEngine()
 
 class Crypto:
     """Encryption methods for different API endpoints."""
@@ -42,46 +138,19 @@ class Crypto:
     @staticmethod
     def weapi(params: Dict[str, Any]) -> Dict[str, str]:
         """WeAPI encryption method."""
-        text = json.dumps(params)
-        secKey = create_key(16)
-        
-        # First encryption
-        encText = Crypto._aes_encrypt(text, WEAPI_KEY)
-        # Second encryption
-        encText = Crypto._aes_encrypt(encText, secKey)
-        
-        # RSA encryption for key
-        secKey = secKey[::-1].encode()  # Reverse and encode key
-        rsa_key = RSA.import_key(RSA_PUBLIC_KEY)
-        cipher = PKCS1_v1_5.new(rsa_key)
-        secKey = base64.b64encode(cipher.encrypt(secKey)).decode('utf-8')
-        
-        return {
-            'params': encText,
-            'encSecKey': secKey
-        }
+        return default_engine.weapi(params)
+
+    @staticmethod
+    def weapi_many(params_list: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Encrypt several WEAPI payloads at once."""
+        return default_engine.weapi_many(params_list)
 
     @staticmethod
     def linux_api(text: Union[Dict[str, Any], str]) -> Dict[str, str]:
         """Linux API encryption method."""
-        if isinstance(text, dict):
-            text = json.dumps(text)
-            
-        data = {
-            "eparams": Crypto._aes_encrypt(text, LINUX_API_KEY)
-        }
-        return data
+        return default_engine.linux_api(text)
 
     @staticmethod
     def eapi(input_data: Dict[str, Any]) -> Dict[str, str]:
         """E API encryption method."""
-        url = input_data.get('url', '')
-        text = json.dumps(input_data.get('params', {}))
-        
-        message = f"nobody{url}use{text}md5forencrypt"
-        digest = hashlib.md5(message.encode()).hexdigest()
-        text_to_encrypt = f"{url}-36cd479b6b5-{text}-36cd479b6b5-{digest}"
-        
-        return {
-            "params": Crypto._aes_encrypt(text_to_encrypt, EAPIKEY)
-        }
+        return default_engine.eapi(input_data)
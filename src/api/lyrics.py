@@ -0,0 +1,139 @@
+"""
+LRC lyrics parsing and time lookup.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from .models import Lyrics
+
+# Translation lines whose time differs from the original line by at most this
+# many milliseconds are treated as the same line.
+TRANSLATION_TOLERANCE = 100
+
+_TIME_TAG = re.compile(r"\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+_OFFSET_TAG = re.compile(r"^\s*\[offset:\s*([+-]?\d+)\s*\]", re.IGNORECASE | re.MULTILINE)
+
+
+def lrc_offset(text: Optional[str]) -> Optional[int]:
+    """Value of the ``[offset:ms]`` tag of an LRC document, None without one."""
+    match = _OFFSET_TAG.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+def parse_lrc(text: Optional[str], default_offset: int = 0) -> List[Tuple[int, str]]:
+    """Parse LRC text into ``(milliseconds, line)`` pairs sorted by time.
+
+    A line may carry several time tags (``[00:12.00][01:02.50]text``) and
+    yields one entry per tag. ``[offset:ms]`` is applied to every entry; a
+    positive offset shows the lyrics earlier. Metadata tags and lines without
+    a time tag are skipped.
+
+    Args:
+        text: LRC document
+        default_offset: Offset used when the document has no offset tag
+    Returns:
+        Entries in display order
+    """
+    if not text:
+        return []
+    offset = lrc_offset(text)
+    if offset is None:
+        offset = default_offset
+
+    entries: List[Tuple[int, str]] = []
+    for line in text.splitlines():
+        position = 0
+        times = []
+        while True:
+            tag = _TIME_TAG.match(line, position)
+            if tag is None:
+                break
+            minutes, seconds, fraction = tag.groups()
+            ms = (int(minutes) * 60 + int(seconds)) * 1000
+            if fraction:
+                # ".5" / ".50" / ".500" are all half a second
+                ms += int(fraction.ljust(3, "0"))
+            times.append(max(0, ms - offset))
+            position = tag.end()
+        if times:
+            content = line[position:].strip()
+            entries.extend((ms, content) for ms in times)
+    entries.sort(key=lambda entry: entry[0])  # stable, keeps same-time lines in order
+    return entries
+
+
+class LyricTimeline:
+    """Time-indexed lyrics of one song.
+
+    Line start times are kept in a sorted ``array`` so ``index_at`` is a single
+    ``bisect`` call; it allocates nothing and is cheap enough to run on every
+    playback position event.
+    """
+
+    __slots__ = ("times", "lines", "translations")
+
+    def __init__(self, entries: List[Tuple[int, str]],
+                 translations: Optional[List[Tuple[int, str]]] = None):
+        """Build a timeline from parsed entries.
+
+        Args:
+            entries: Sorted ``(milliseconds, line)`` pairs of the original lyrics
+            translations: Sorted pairs of the translated lyrics, aligned to the
+                original lines by time
+        """
+        self.times = array("q", (ms for ms, _ in entries))
+        self.lines: List[str] = [line for _, line in entries]
+        self.translations: List[str] = self._align(translations or [])
+
+    @classmethod
+    def from_lyrics(cls, lyrics: Lyrics) -> "LyricTimeline":
+        """Parse the original and translated lyrics of an API response.
+
+        The translation shares the timestamps of the original lyrics, so the
+        original's offset applies to it unless it has its own.
+        """
+        offset = lrc_offset(lyrics.lrc) or 0
+        return cls(parse_lrc(lyrics.lrc), parse_lrc(lyrics.tlyric, offset))
+
+    def _align(self, translations: List[Tuple[int, str]]) -> List[str]:
+        """Match every translated line to the original line nearest in time."""
+        aligned = [""] * len(self.lines)
+        if not translations:
+            return aligned
+        by_time: Dict[int, str] = {}
+        for ms, line in translations:
+            if line:
+                by_time.setdefault(ms, line)
+        trans_times = sorted(by_time)
+        for index, ms in enumerate(self.times):
+            line = by_time.get(ms)
+            if line is None:
+                nearest = bisect_right(trans_times, ms)
+                candidates = trans_times[max(0, nearest - 1):nearest + 1]
+                close = [t for t in candidates if abs(t - ms) <= TRANSLATION_TOLERANCE]
+                if close:
+                    line = by_time[min(close, key=lambda t: abs(t - ms))]
+            if line is not None:
+                aligned[index] = line
+        return aligned
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __bool__(self) -> bool:
+        return len(self.times) > 0
+
+    def index_at(self, position: int) -> int:
+        """Index of the line shown at ``position`` milliseconds, -1 before the first line."""
+        return bisect_right(self.times, position) - 1
+
+    def line(self, index: int) -> str:
+        """Text of a line, empty for an index outside the timeline."""
+        return self.lines[index] if 0 <= index < len(self.lines) else ""
+
+    def translation(self, index: int) -> str:
+        """Translation of a line, empty when there is none."""
+        return self.translations[index] if 0 <= index < len(self.translations) else ""
@@ -2,7 +2,7 @@
 Data models for NetEase Cloud Music API responses.
 Matches the Rust implementation's model types.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -19,9 +19,12 @@ class LoginInfo:
     account: Dict[str, Any]
     profile: Optional[Dict[str, Any]] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SingerInfo:
-    """Singer/Artist information."""
+    """Singer/Artist information.
+
+    Immutable so one instance can be shared by every song of the artist.
+    """
     id: int
     name: str
     picUrl: Optional[str] = None
@@ -53,9 +56,12 @@ class Lyrics:
     lrc: Optional[str] = None
     tlyric: Optional[str] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AlbumInfo:
-    """Album information."""
+    """Album information.
+
+    Immutable so one instance can be shared by every song of the album.
+    """
     id: int
     name: str
     picUrl: str
@@ -63,7 +69,7 @@ class AlbumInfo:
     publishTime: Optional[int] = None  # timestamp in milliseconds
     artists: List[SingerInfo] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class SongInfo:
     """Song information."""
     id: int
@@ -85,7 +91,7 @@ class SongList:
     coverImgUrl: str
     playCount: int = 0
     trackCount: int = 0
-    songs: Optional[List[SongInfo]] = None
+    songs: Optional[Sequence[SongInfo]] = None  # list or TrackTable
     creator: Dict[str, Any] = field(default_factory=dict)  # User info
 
 @dataclass
@@ -114,7 +120,8 @@ class PlayListDetail:
     description: str
     tags: List[str] = field(default_factory=list)
     creator: Dict[str, Any] = field(default_factory=dict)  # User info
-    tracks: List[SongInfo] = field(default_factory=list)
+    tracks: Sequence[SongInfo] = field(default_factory=list)  # list or TrackTable
+    trackIds: List[int] = field(default_factory=list)  # IDs of all tracks, in order
 
 @dataclass
 class PlayListDetailDynamic:
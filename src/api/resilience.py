@@ -0,0 +1,348 @@
+"""
+Retries, hedged requests and circuit breaking for API requests.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from logging import info
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from .constants import (
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_BUDGET_RATIO,
+    RETRY_BUDGET_MAX,
+    IDEMPOTENT_PATHS,
+    BREAKER_FAILURES,
+    BREAKER_RESET,
+    HEDGE_DELAY,
+)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Request not sent because the host's circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    attempts: int = RETRY_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number ``retry`` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one host.
+
+    After ``failures`` failed requests in a row the breaker opens and requests
+    fail immediately. Once ``reset`` seconds have passed one trial request is
+    let through; its outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """"closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a share of the requests of an endpoint.
+
+    Each request adds ``ratio`` tokens, each retry takes one, so when an
+    endpoint is failing everywhere retries stop amplifying the load.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, maximum: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.maximum = maximum
+        self._tokens = maximum
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.maximum, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for a retry, False when the budget is spent."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def is_idempotent(path: str) -> bool:
+    """Whether an endpoint may be sent again after a failure."""
+    return any(
+        path == prefix or (prefix.endswith("/") and path.startswith(prefix))
+        for prefix in IDEMPOTENT_PATHS
+    )
+
+
+def _retryable_status(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class Resilience:
+    """Sends API requests with retries, hedging and per-host circuit breakers.
+
+    Only idempotent endpoints are retried; any endpoint may be hedged. The
+    outcome of every request is counted in ``stats``: ``success``,
+    ``failure``, ``retry``, ``budget_exhausted``, ``short_circuit``,
+    ``hedge`` (duplicate sent) and ``hedge_won`` (duplicate answered first).
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        hedge_delay: float = HEDGE_DELAY,
+        breaker_failures: int = BREAKER_FAILURES,
+        breaker_reset: float = BREAKER_RESET,
+    ):
+        """Create the resilience layer.
+
+        Args:
+            policy: Retry policy, ``RetryPolicy()`` by default
+            hedge_delay: Seconds before a hedged request sends a duplicate
+            breaker_failures: Consecutive failures that open a host's breaker
+            breaker_reset: Seconds an open breaker rejects requests
+        """
+        self.policy = policy or RetryPolicy()
+        self.hedge_delay = hedge_delay
+        self.breaker_failures = breaker_failures
+        self.breaker_reset = breaker_reset
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """Circuit breaker of a host."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    self.breaker_failures, self.breaker_reset
+                )
+            return breaker
+
+    def budget(self, path: str) -> RetryBudget:
+        """Retry budget of an endpoint."""
+        with self._lock:
+            budget = self._budgets.get(path)
+            if budget is None:
+                budget = self._budgets[path] = RetryBudget()
+            return budget
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _admit(self, host: str) -> CircuitBreaker:
+        """Breaker of the host, raising when it rejects the request."""
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            self._count("short_circuit")
+            raise CircuitOpenError(f"circuit open for {host}")
+        return breaker
+
+    def _should_retry(self, path: str, retry: int) -> bool:
+        if retry + 1 >= self.policy.attempts or not is_idempotent(path):
+            return False
+        if not self.budget(path).withdraw():
+            self._count("budget_exhausted")
+            return False
+        self._count("retry")
+        return True
+
+    def _settle(self, breaker: CircuitBreaker, response: httpx.Response) -> bool:
+        """Record a response, True when it is final."""
+        if _retryable_status(response):
+            breaker.record_failure()
+            return False
+        breaker.record_success()
+        self._count("success")
+        return True
+
+    def send(
+        self,
+        path: str,
+        host: str,
+        send: Callable[[], httpx.Response],
+        hedge: bool = False,
+    ) -> httpx.Response:
+        """Send a request, retrying idempotent endpoints on failure.
+
+        Args:
+            path: Endpoint path, selects retry eligibility and budget
+            host: Host of the request, selects the circuit breaker
+            send: Sends the request once and returns the response
+            hedge: Send a duplicate when the first attempt is slow
+        Returns:
+            The first final response; a 5xx/429 response once retries are
+            exhausted
+        Raises:
+            httpx.TransportError: When the last attempt failed to connect or
+                read, or the host's breaker is open
+        """
+        self.budget(path).deposit()
+        retry = 0
+        while True:
+            breaker = self._admit(host)
+            try:
+                response = self._send_hedged(send) if hedge else send()
+            except httpx.TransportError:
+                breaker.record_failure()
+                if not self._should_retry(path, retry):
+                    self._count("failure")
+                    raise
+            else:
+                if self._settle(breaker, response) or not self._should_retry(path, retry):
+                    if _retryable_status(response):
+                        self._count("failure")
+                    return response
+            delay = self.policy.delay(retry)
+            info(f"Retrying {path} in {delay:.2f}s (retry {retry + 1})")
+            time.sleep(delay)
+            retry += 1
+
+    def _send_hedged(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        """Send, and send again if no response arrives within hedge_delay."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8)
+            executor = self._executor
+        first = executor.submit(send)
+        done, _ = wait([first], timeout=self.hedge_delay)
+        if done:
+            return first.result()
+        self._count("hedge")
+        second = executor.submit(send)
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is second:
+                    self._count("hedge_won")
+                return response
+        assert error is not None
+        raise error
+
+    async def asend(
+        self,
+        path: str,
+        host: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        hedge: bool = False,
+    ) -> httpx.Response:
+        """Async version of ``send``."""
+        self.budget(path).deposit()
+        retry = 0
+        while True:
+            breaker = self._admit(host)
+            try:
+                response = await (self._asend_hedged(send) if hedge else send())
+            except httpx.TransportError:
+                breaker.record_failure()
+                if not self._should_retry(path, retry):
+                    self._count("failure")
+                    raise
+            else:
+                if self._settle(breaker, response) or not self._should_retry(path, retry):
+                    if _retryable_status(response):
+                        self._count("failure")
+                    return response
+            delay = self.policy.delay(retry)
+            info(f"Retrying {path} in {delay:.2f}s (retry {retry + 1})")
+            await asyncio.sleep(delay)
+            retry += 1
+
+    async def _asend_hedged(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait([first], timeout=self.hedge_delay)
+        if done:
+            return first.result()
+        self._count("hedge")
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is second:
+                        self._count("hedge_won")
+                    return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        assert error is not None
+        raise error
+
+    def snapshot(self) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """Outcome counters and the breaker state of every host seen."""
+        with self._lock:
+            stats = dict(self.stats)
+            breakers = dict(self._breakers)
+        return stats, {host: breaker.state for host, breaker in breakers.items()}
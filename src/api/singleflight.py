@@ -0,0 +1,99 @@
+"""
+Coalescing of identical in-flight requests.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .cache import cache_key
+
+T = TypeVar("T")
+
+
+def flight_key(path: str, params: Optional[Dict[str, Any]], scope: str = "") -> str:
+    """Key of a request, equal for requests that must return the same response."""
+    return cache_key(path, params, scope)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result.
+
+    The first caller of a key (the leader) runs the function; callers arriving
+    while it runs wait for it and receive the same result or exception.
+    ``leaders`` and ``shared`` count calls that ran and calls that waited.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, func: Callable[[], T]) -> T:
+        """Run ``func`` for ``key`` or join the call already running."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Async version of ``SingleFlight`` for callers on one event loop.
+
+    The call runs in its own task that every caller awaits, so cancelling one
+    caller, the first one included, only cancels that caller. The call itself
+    is cancelled once no caller is left waiting for it.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict["asyncio.Future[Any]", int] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Await ``func`` for ``key`` or join the call already running."""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.leaders += 1
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task) == 1:
+                task.cancel()  # nobody else is waiting for the call
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _finished(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        self._waiters.pop(task, None)
+        if not task.cancelled():
+            # retrieve it so an exception nobody awaited is not logged
+            task.exception()
@@ -0,0 +1,238 @@
+"""
+Columnar storage for large track lists.
+"""
+
+import threading
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from .models import AlbumInfo, SingerInfo, SongInfo
+
+
+class _Pools:
+    """Append-only value pools shared by a table and the tables sliced from it.
+
+    ``lock`` serializes writers of the pools and of every table using them.
+    """
+
+    __slots__ = ("strings", "string_index", "albums", "album_index", "artists", "artist_index",
+                 "lock")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.strings: List[str] = []
+        self.string_index: Dict[str, int] = {}
+        self.albums: List[AlbumInfo] = []
+        self.album_index: Dict[Tuple[Any, Any, Any], int] = {}
+        self.artists: List[SingerInfo] = []
+        self.artist_index: Dict[Tuple[Any, Any, Any], int] = {}
+
+    def string(self, value: Optional[str]) -> int:
+        value = value or ""
+        index = self.string_index.get(value)
+        if index is None:
+            index = self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def album(self, data: Dict[str, Any]) -> int:
+        key = (data.get("id", 0), data.get("name", ""), data.get("picUrl", ""))
+        index = self.album_index.get(key)
+        if index is None:
+            index = self.album_index[key] = len(self.albums)
+            self.albums.append(AlbumInfo(id=key[0], name=key[1], picUrl=key[2]))
+        return index
+
+    def artist(self, data: Dict[str, Any]) -> int:
+        key = (data.get("id", 0), data.get("name", ""), data.get("picUrl", ""))
+        index = self.artist_index.get(key)
+        if index is None:
+            index = self.artist_index[key] = len(self.artists)
+            self.artists.append(SingerInfo(id=key[0], name=key[1], picUrl=key[2]))
+        return index
+
+    def album_model(self, album: AlbumInfo) -> int:
+        key = (album.id, album.name, album.picUrl)
+        index = self.album_index.get(key)
+        if index is None:
+            index = self.album_index[key] = len(self.albums)
+            self.albums.append(album)
+        return index
+
+    def artist_model(self, artist: SingerInfo) -> int:
+        key = (artist.id, artist.name, artist.picUrl)
+        index = self.artist_index.get(key)
+        if index is None:
+            index = self.artist_index[key] = len(self.artists)
+            self.artists.append(artist)
+        return index
+
+
+class TrackTable(Sequence[SongInfo]):
+    """A read-mostly list of songs stored column by column.
+
+    IDs and durations live in typed arrays, names in a shared string pool,
+    albums and artists in pools of shared immutable models, and each row's
+    artists are a range of an artist index array. Indexing returns a freshly
+    built ``SongInfo``, so the table can stand in for ``List[SongInfo]``
+    (including as the play queue) while holding no per-song objects.
+
+    A table may be extended by one thread while others read it: writers hold
+    the pools' lock and append a row's ID last, and ``len`` counts IDs, so a
+    reader never sees a row whose other columns are not written yet.
+    """
+
+    def __init__(self, pools: Optional[_Pools] = None):
+        self._pools = pools or _Pools()
+        self.ids = array("q")
+        self.durations = array("q")
+        self._names = array("l")
+        self._pic_urls = array("l")
+        self._albums = array("l")
+        self._artist_offsets = array("l", [0])
+        self._artist_rows = array("l")
+        self._row_index: Optional[Dict[int, int]] = None
+
+    @classmethod
+    def from_json(cls, songs: Iterable[Dict[str, Any]]) -> "TrackTable":
+        """Build a table from parsed song entries of an API response."""
+        table = cls()
+        table.extend_json(songs)
+        return table
+
+    @classmethod
+    def from_songs(cls, songs: Iterable[SongInfo]) -> "TrackTable":
+        """Build a table from SongInfo objects."""
+        table = cls()
+        for song in songs:
+            table.append(song)
+        return table
+
+    def extend_json(self, songs: Iterable[Dict[str, Any]]) -> None:
+        """Append parsed song entries, with the same field rules as ``to_songinfo``."""
+        pools = self._pools
+        with pools.lock:
+            for song in songs:
+                self.durations.append(song.get("duration", 0) or 0)
+                self._names.append(pools.string(song.get("name", "")))
+                self._pic_urls.append(pools.string((song.get("album") or {}).get("picUrl", "")))
+                self._albums.append(pools.album(song.get("album") or song.get("al") or {}))
+                for artist in song.get("artists") or song.get("ar") or []:
+                    self._artist_rows.append(pools.artist(artist))
+                self._artist_offsets.append(len(self._artist_rows))
+                self.ids.append(song.get("id", 0))  # publishes the row
+            self._row_index = None
+
+    def append(self, song: SongInfo) -> None:
+        """Append one SongInfo."""
+        pools = self._pools
+        with pools.lock:
+            self.durations.append(song.duration or 0)
+            self._names.append(pools.string(song.name))
+            self._pic_urls.append(pools.string(song.pic_url))
+            self._albums.append(
+                pools.album_model(song.album) if song.album is not None else pools.album({})
+            )
+            for artist in song.artists:
+                self._artist_rows.append(pools.artist_model(artist))
+            self._artist_offsets.append(len(self._artist_rows))
+            self.ids.append(song.id)  # publishes the row
+            self._row_index = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> SongInfo: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "TrackTable": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[SongInfo, "TrackTable"]:
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("track index out of range")
+        return SongInfo(
+            id=self.ids[index],
+            name=self.name_at(index),
+            album=self.album_at(index),
+            duration=self.durations[index],
+            pic_url=self._pools.strings[self._pic_urls[index]],
+            artists=self.artists_at(index),
+        )
+
+    def __iter__(self) -> Iterator[SongInfo]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __contains__(self, song: object) -> bool:
+        song_id = song.id if isinstance(song, SongInfo) else song
+        return self.row_of(song_id) is not None  # type: ignore[arg-type]
+
+    def name_at(self, row: int) -> str:
+        """Song name of a row, without building a SongInfo."""
+        return self._pools.strings[self._names[row]]
+
+    def album_at(self, row: int) -> AlbumInfo:
+        """Shared album of a row."""
+        return self._pools.albums[self._albums[row]]
+
+    def artists_at(self, row: int) -> List[SingerInfo]:
+        """Shared artists of a row."""
+        artists = self._pools.artists
+        return [
+            artists[i]
+            for i in self._artist_rows[self._artist_offsets[row]:self._artist_offsets[row + 1]]
+        ]
+
+    def row_of(self, song_id: int) -> Optional[int]:
+        """Row of a song ID, or None when the song is not in the table."""
+        row_index = self._row_index
+        if row_index is None:
+            # built under the lock so a concurrent writer cannot leave it stale
+            with self._pools.lock:
+                row_index = {}
+                for row, id in enumerate(self.ids):
+                    row_index.setdefault(id, row)
+                self._row_index = row_index
+        return row_index.get(song_id)
+
+    def take(self, rows: Iterable[int]) -> "TrackTable":
+        """New table with the given rows, sharing this table's pools."""
+        table = TrackTable(self._pools)
+        for row in rows:
+            table.durations.append(self.durations[row])
+            table._names.append(self._names[row])
+            table._pic_urls.append(self._pic_urls[row])
+            table._albums.append(self._albums[row])
+            table._artist_rows.extend(
+                self._artist_rows[self._artist_offsets[row]:self._artist_offsets[row + 1]]
+            )
+            table._artist_offsets.append(len(table._artist_rows))
+            table.ids.append(self.ids[row])
+        return table
+
+    def order_by(self, column: str, reverse: bool = False) -> "TrackTable":
+        """New table sorted by "id", "name", "duration", "album" or "artist"."""
+        keys: Dict[str, Callable[[int], Any]] = {
+            "id": self.ids.__getitem__,
+            "duration": self.durations.__getitem__,
+            "name": self.name_at,
+            "album": lambda row: self.album_at(row).name,
+            "artist": lambda row: " / ".join(a.name for a in self.artists_at(row)),
+        }
+        return self.take(sorted(range(len(self)), key=keys[column], reverse=reverse))
+
+    def filter(self, keyword: str) -> "TrackTable":
+        """New table with the rows whose name, album or artists contain ``keyword``."""
+        keyword = keyword.casefold()
+        return self.take(
+            row
+            for row in range(len(self))
+            if keyword in self.name_at(row).casefold()
+            or keyword in self.album_at(row).name.casefold()
+            or any(keyword in a.name.casefold() for a in self.artists_at(row))
+        )
@@ -0,0 +1,199 @@
+"""
+Shared HTTP transport for API, image and audio traffic.
+"""
+
+import threading
+from collections import Counter
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .constants import (
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+    WRITE_TIMEOUT,
+    POOL_TIMEOUT,
+    MAX_CONNECTIONS,
+    MAX_KEEPALIVE_CONNECTIONS,
+    KEEPALIVE_EXPIRY,
+)
+
+
+def http2_available() -> bool:
+    """Whether the optional ``h2`` package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def default_timeout() -> httpx.Timeout:
+    """Separate connect, read, write and pool timeouts."""
+    return httpx.Timeout(
+        connect=CONNECT_TIMEOUT,
+        read=READ_TIMEOUT,
+        write=WRITE_TIMEOUT,
+        pool=POOL_TIMEOUT,
+    )
+
+
+def _discarding_cookie_jar() -> CookieJar:
+    """Cookie jar that never stores a cookie.
+
+    The clients are shared, so each API session sends its own cookies and
+    a login must not leak into other sessions through the client's jar.
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class HttpTransport:
+    """Keep-alive connection pools shared by every client of the app.
+
+    One ``httpx.Client`` (and, on first use, one ``httpx.AsyncClient``) is
+    built over pooled connections kept per origin, with HTTP/2 when ``h2`` is
+    installed so requests to the same host are multiplexed over one
+    connection. API calls, image downloads and audio streams all go through
+    it, so a track start reuses an open TLS connection instead of making a
+    new handshake.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        timeout: Optional[httpx.Timeout] = None,
+        http2: Optional[bool] = None,
+    ):
+        """Create the pools.
+
+        Args:
+            max_connections: Total open connections across all hosts
+            max_keepalive_connections: Idle connections kept open
+            keepalive_expiry: Seconds before an idle connection is closed
+            timeout: Timeouts, defaults to ``default_timeout()``
+            http2: Enable HTTP/2, defaults to whether ``h2`` is installed
+        """
+        self.http2 = http2_available() if http2 is None else http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout or default_timeout()
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()  # host -> requests sent
+        self._versions: Counter = Counter()  # HTTP version -> responses
+        self._transport = httpx.HTTPTransport(http2=self.http2, limits=self.limits)
+        self.client = httpx.Client(
+            transport=self._transport,
+            timeout=self.timeout,
+            cookies=_discarding_cookie_jar(),
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+        self._async_transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Async client over a separate pool with the same settings."""
+        if self._async_client is None:
+            self._async_transport = httpx.AsyncHTTPTransport(
+                http2=self.http2, limits=self.limits
+            )
+            self._async_client = httpx.AsyncClient(
+                transport=self._async_transport,
+                timeout=self.timeout,
+                cookies=_discarding_cookie_jar(),
+                follow_redirects=True,
+                event_hooks={
+                    "request": [self._on_async_request],
+                    "response": [self._on_async_response],
+                },
+            )
+        return self._async_client
+
+    def _on_request(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._requests[request.url.host] += 1
+
+    def _on_response(self, response: httpx.Response) -> None:
+        version = response.extensions.get("http_version", b"")
+        with self._lock:
+            self._versions[version.decode() if isinstance(version, bytes) else str(version)] += 1
+
+    async def _on_async_request(self, request: httpx.Request) -> None:
+        self._on_request(request)
+
+    async def _on_async_response(self, response: httpx.Response) -> None:
+        self._on_response(response)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of request counts and pooled connections.
+
+        Request and version counts come from event hooks. Pooled connections
+        are read from httpcore's pool, which is not a public interface; if
+        that fails ``connections`` is ``"unavailable"``.
+
+        Returns:
+            ``requests`` per host, responses per ``http_versions`` and, per
+            origin, the number of open, idle and HTTP/2 connections and the
+            requests they have served
+        """
+        with self._lock:
+            result: Dict[str, Any] = {
+                "http2": self.http2,
+                "requests": dict(self._requests),
+                "http_versions": dict(self._versions),
+            }
+        try:
+            result["connections"] = self._connections()
+        except Exception:
+            result["connections"] = "unavailable"
+        return result
+
+    def _connections(self) -> Dict[str, Dict[str, int]]:
+        """Open, idle and HTTP/2 connections and requests served per origin."""
+        connections: Dict[str, Dict[str, int]] = {}
+        for transport in (self._transport, self._async_transport):
+            if transport is None:
+                continue
+            for connection in list(transport._pool.connections):
+                # e.g. "'https://music.163.com:443', HTTP/2, IDLE, Request Count: 3"
+                parts = [part.strip() for part in connection.info().split(",")]
+                origin = urlsplit(parts[0].strip("'")).netloc or parts[0]
+                entry = connections.setdefault(
+                    origin, {"open": 0, "idle": 0, "http2": 0, "served": 0}
+                )
+                entry["open"] += 1
+                entry["idle"] += int(connection.is_idle())
+                entry["http2"] += int("HTTP/2" in parts)
+                count = parts[-1].rpartition(":")[2].strip()
+                entry["served"] += int(count) if count.isdigit() else 0
+        return connections
+
+    def close(self) -> None:
+        """Close all pooled connections of the sync client."""
+        self.client.close()
+
+    async def aclose(self) -> None:
+        """Close all pooled connections of the async client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+
+
+_default: Optional[HttpTransport] = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> HttpTransport:
+    """Process-wide transport used by clients created without one."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpTransport()
+        return _default
@@ -5,7 +5,7 @@ Matches the functionality from the Rust implementation.
 
 import json
 import random
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Union
 from urllib.parse import urlencode
 from .constants import USER_AGENT_LIST, LINUX_USER_AGENT
 from .models import (
@@ -17,8 +17,30 @@ from .models import (
     BannersInfo,
     PlayListDetail,
     AlbumDetail,
+    AlbumDetailDynamic,
+    PlayListDetailDynamic,
     SongList,
+    SongUrl,
+    Lyrics,
+    TopList,
 )
+from .tracks import TrackTable
+
+# A response as raw JSON text/bytes or as the already parsed dict
+JsonData = Union[str, bytes, bytearray, Dict[str, Any]]
+
+
+def load_json(data: JsonData) -> Dict[str, Any]:
+    """Parse a response once, passing already parsed data through.
+
+    Args:
+        data: Raw JSON text or bytes, or a parsed dict
+    Returns:
+        Parsed JSON object
+    """
+    if isinstance(data, (str, bytes, bytearray)):
+        return json.loads(data)
+    return data
 
 
 def choose_user_agent(ua_type: Optional[str] = None) -> str:
@@ -34,15 +56,15 @@ def choose_user_agent(ua_type: Optional[str] = None) -> str:
     return random.choice(USER_AGENT_LIST)
 
 
-def to_login_info(json_str: str) -> LoginInfo:
+def to_login_info(json_str: JsonData) -> LoginInfo:
     """Convert JSON response to LoginInfo object.
 
     Args:
-        json_str: Raw JSON response string
+        json_str: Raw JSON response or the parsed dict
     Returns:
         LoginInfo object
     """
-    data = json.loads(json_str)
+    data = load_json(json_str)
     return LoginInfo(
         code=data.get("code", -1),
         account=data.get("account", {}),
@@ -50,28 +72,28 @@ def to_login_info(json_str: str) -> LoginInfo:
     )
 
 
-def to_msg(json_str: str) -> Msg:
+def to_msg(json_str: JsonData) -> Msg:
     """Convert JSON response to Msg object.
 
     Args:
-        json_str: Raw JSON response string
+        json_str: Raw JSON response or the parsed dict
     Returns:
         Msg object
     """
-    data = json.loads(json_str)
+    data = load_json(json_str)
     return Msg(code=data.get("code", -1), msg=data.get("msg", ""))
 
 
-def to_song_id_list(json_str: str) -> List[int]:
+def to_song_id_list(json_str: JsonData) -> List[int]:
     """Convert JSON response to song ID list.
 
     Args:
-        json_str: Raw JSON response string
+        json_str: Raw JSON response or the parsed dict
     Returns:
         List of song IDs
     """
     try:
-        data = json.loads(json_str)
+        data = load_json(json_str)
         if data.get("code") == 200:
             return data.get("ids", [])
         return []
@@ -79,53 +101,181 @@ def to_song_id_list(json_str: str) -> List[int]:
         return []
 
 
-def to_songinfo(json_str: str) -> SongInfo:
+class ModelInterner:
+    """Share identical artist and album records within one conversion.
+
+    Songs of a playlist repeat the same artists and albums many times; the
+    interner returns one immutable SingerInfo/AlbumInfo per distinct record.
+    """
+
+    __slots__ = ("_artists", "_albums")
+
+    def __init__(self):
+        self._artists: Dict[Tuple[Any, Any, Any], SingerInfo] = {}
+        self._albums: Dict[Tuple[Any, Any, Any], AlbumInfo] = {}
+
+    def artist(self, data: Dict[str, Any]) -> SingerInfo:
+        """Return the shared SingerInfo for an artist entry."""
+        key = (data.get("id", 0), data.get("name", ""), data.get("picUrl", ""))
+        artist = self._artists.get(key)
+        if artist is None:
+            artist = self._artists[key] = SingerInfo(id=key[0], name=key[1], picUrl=key[2])
+        return artist
+
+    def album(self, data: Dict[str, Any]) -> AlbumInfo:
+        """Return the shared AlbumInfo for an album entry."""
+        key = (data.get("id", 0), data.get("name", ""), data.get("picUrl", ""))
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = AlbumInfo(id=key[0], name=key[1], picUrl=key[2])
+        return album
+
+
+def to_songinfo(json_str: JsonData) -> SongInfo:
     """Convert JSON response to SongInfo objects.
 
     Args:
-        json_str: Raw JSON response string
+        json_str: Raw JSON response or the parsed dict
     Returns:
         SongInfo objects
     """
-    song = json.loads(json_str)
+    return _songinfo(load_json(json_str))
+
+
+def _songinfo(song: Dict[str, Any], interner: Optional[ModelInterner] = None) -> SongInfo:
+    """Build a SongInfo from a parsed song entry.
+
+    Args:
+        song: Parsed song entry
+        interner: Shares artists and albums across the songs of one batch
+    """
+    if interner is None:
+        interner = ModelInterner()
+    album = song.get("album") or song.get("al") or {}
     return SongInfo(
         id=song.get("id", 0),
         name=song.get("name", ""),
-        album=AlbumInfo(
-            id=(song.get("album", {}) if song.get("album") else song.get("al", {})).get(
-                "id", 0
-            ),
-            name=(
-                song.get("album", {}) if song.get("album") else song.get("al", {})
-            ).get("name", ""),
-            picUrl=(
-                song.get("album", {}) if song.get("album") else song.get("al", {})
-            ).get("picUrl", ""),
-        ),
+        album=interner.album(album),
         duration=song.get("duration", 0),
-        pic_url=song.get("album", {}).get("picUrl", ""),
+        pic_url=(song.get("album") or {}).get("picUrl", ""),
         artists=[
-            SingerInfo(
-                id=artist.get("id", 0),
-                name=artist.get("name", ""),
-                picUrl=artist.get("picUrl", ""),
-            )
-            for artist in (
-                song.get("artists", []) if song.get("artists") else song.get("ar", [])
-            )
+            interner.artist(artist)
+            for artist in (song.get("artists") or song.get("ar") or [])
         ],
     )
 
 
-def to_playlist(json_str: str) -> SongList:
+def _song_items(data: Dict[str, Any], parse_type: str) -> List[Dict[str, Any]]:
+    """Locate the raw song entries of a response by its parse type."""
+    if parse_type == "playlist":
+        return (data.get("playlist") or {}).get("tracks") or []
+    if parse_type in ("album", "singer_songs"):
+        return data.get("songs") or []
+    if parse_type == "cloud":
+        return [
+            item.get("simpleSong") or {} for item in data.get("data") or []
+        ]
+    if parse_type == "recommend_songs":
+        songs = data.get("recommend")
+        if songs is None:
+            songs = (data.get("data") or {}).get("dailySongs")
+        return songs or []
+    if parse_type == "personal_fm":
+        return data.get("data") or []
+    if parse_type == "search":
+        return (data.get("result") or {}).get("songs") or []
+    if parse_type == "singer":
+        return data.get("hotSongs") or []
+    # "recommend" resources are playlists and carry no songs
+    return []
+
+
+def to_song_info(json_str: JsonData, parse_type: str) -> List[SongInfo]:
+    """Convert JSON response to a list of SongInfo objects.
+
+    Args:
+        json_str: Raw JSON response or the parsed dict
+        parse_type: Response kind, decides where the songs are located
+            ("playlist", "album", "cloud", "recommend", "recommend_songs",
+            "personal_fm", "search", "singer", "singer_songs")
+    Returns:
+        List of SongInfo objects
+    """
+    data = load_json(json_str)
+    if data.get("code", 200) != 200:
+        return []
+    interner = ModelInterner()
+    return [_songinfo(song, interner) for song in _song_items(data, parse_type)]
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most ``size`` items."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def to_songs_detail(
+    ids: List[int], results: List[Dict[str, Any]]
+) -> Tuple[List[SongInfo], List[int]]:
+    """Merge song detail responses of several batches.
+
+    Args:
+        ids: Requested song IDs
+        results: Parsed JSON responses of the batches
+    Returns:
+        Songs in the order of ``ids`` and the IDs the server returned nothing for
+    """
+    entries, missing = order_song_entries(ids, results)
+    interner = ModelInterner()
+    return [_songinfo(song, interner) for song in entries], missing
+
+
+def order_song_entries(
+    ids: List[int], results: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Collect the raw song entries of song detail responses in request order.
+
+    Args:
+        ids: Requested song IDs
+        results: Parsed JSON responses of the batches
+    Returns:
+        Song entries in the order of ``ids`` and the IDs without an entry
+    """
+    found = {}
+    for result in results:
+        for song in result.get("songs") or []:
+            found[song.get("id")] = song
+
+    entries = []
+    missing = []
+    for id in ids:
+        song = found.get(int(id))
+        if song is None:
+            missing.append(id)
+        else:
+            entries.append(song)
+    return entries, missing
+
+
+def extend_tracks(tracks: Sequence[SongInfo], songs: List[Dict[str, Any]]) -> None:
+    """Append parsed song entries to a track list or TrackTable in place."""
+    if isinstance(tracks, TrackTable):
+        tracks.extend_json(songs)
+    else:
+        interner = ModelInterner()
+        # convert first, then publish the batch in one call for concurrent readers
+        converted = [_songinfo(song, interner) for song in songs]
+        tracks.extend(converted)  # type: ignore[attr-defined]
+
+
+def to_playlist(json_str: JsonData) -> SongList:
     """Convert JSON response to SongList objects.
 
     Args:
-        json_str: Raw JSON response string
+        json_str: Raw JSON response or the parsed dict
     Returns:
         SongList objects
     """
-    playlist = json.loads(json_str)
+    playlist = load_json(json_str)
     return SongList(
         id=playlist.get("id", 0),
         name=playlist.get("name", ""),
@@ -138,6 +288,179 @@ def to_playlist(json_str: str) -> SongList:
     )
 
 
+def to_playlists(data: Dict[str, Any]) -> List[SongList]:
+    """Convert a playlist list response to SongList objects without tracks."""
+    song_lists = []
+    if data and "code" in data and data["code"] == 200:
+        for playlist in data.get("playlists", []):
+            song_lists.append(to_playlist(playlist))
+    return song_lists
+
+
+def to_song_lists(
+    data: Dict[str, Any],
+    items: List[Dict[str, Any]],
+    meta_type: str,
+    parse_type: str,
+    as_table: bool = False,
+) -> List[SongList]:
+    """Convert playlist/album entries of a response to SongList objects.
+
+    Args:
+        data: Parsed JSON response
+        items: Playlist or album entries taken from ``data``
+        meta_type: Entry kind, "playlist", "album" or "recommend"
+        parse_type: Parse type passed to ``to_song_info`` for each entry
+        as_table: Store the songs of each entry as a TrackTable
+    Returns:
+        List of SongList objects
+    """
+    song_lists = []
+    if not (data and "code" in data and data["code"] == 200):
+        return song_lists
+
+    for item in items:
+        if meta_type == "album":
+            created_song_list = {
+                "id": item.get("id", 0),
+                "name": item.get("name", ""),
+                "coverImgUrl": item.get("picUrl", ""),
+                "description": item.get("description", ""),
+                "creator": {
+                    "nickname": item.get("artist", {}).get("name", "Unknown")
+                },
+            }
+            wrapped = {"code": 200, "songs": [item]}
+        elif meta_type == "recommend":
+            created_song_list = {
+                "id": item.get("id", 0),
+                "name": item.get("name", ""),
+                "coverImgUrl": item.get("picUrl", ""),
+                "description": item.get("copywriter", ""),
+                "creator": item.get("creator", {}),
+            }
+            wrapped = {"code": 200, "recommend": [item]}
+        else:
+            created_song_list = {
+                "id": item.get("id", 0),
+                "name": item.get("name", ""),
+                "coverImgUrl": item.get("coverImgUrl", ""),
+                "description": item.get("description", ""),
+                "creator": item.get("creator", {}),
+            }
+            wrapped = {
+                "code": 200,
+                "playlist": {"tracks": item.get("tracks") or []},
+            }
+        if as_table:
+            songs = TrackTable.from_json(_song_items(wrapped, parse_type))
+        else:
+            songs = to_song_info(wrapped, parse_type)
+        song_lists.extend(to_song_list_from_songs(songs, created_song_list))
+
+    return song_lists
+
+
+def to_search_songs(data: Dict[str, Any]) -> List[SongInfo]:
+    """Convert a song search response to SongInfo objects."""
+    song_list = []
+    if data and "code" in data and data["code"] == 200:
+        interner = ModelInterner()
+        for song in data.get("result", {}).get("songs", []):
+            song_list.append(_songinfo(song, interner))
+    return song_list
+
+
+def to_search_suggest(data: Dict[str, Any]) -> List[str]:
+    """Convert a search suggestion response to suggested keywords."""
+    if not data or data.get("code") != 200:
+        return []
+    return [
+        match["keyword"]
+        for match in (data.get("result") or {}).get("allMatch") or []
+        if match.get("keyword")
+    ]
+
+
+def _song_url(item: Dict[str, Any]) -> SongUrl:
+    """Convert one entry of a song url response to a SongUrl object."""
+    return SongUrl(
+        id=item.get("id"),
+        url=item.get("url"),
+        br=item.get("br"),
+        size=item.get("size"),
+        md5=item.get("md5"),
+        type=item.get("type"),
+    )
+
+
+def to_song_url(data: Dict[str, Any]) -> SongUrl:
+    """Convert the first entry of a song url response to a SongUrl object."""
+    return _song_url(data.get("data", [])[0])
+
+
+def to_song_urls(results: List[Dict[str, Any]]) -> Dict[int, SongUrl]:
+    """Collect the playable entries of song url responses.
+
+    Args:
+        results: Parsed JSON responses of song url requests
+    Returns:
+        Mapping of song ID to SongUrl, songs without url are left out
+    """
+    urls = {}
+    for result in results:
+        for item in result.get("data") or []:
+            if item.get("url"):
+                urls[item.get("id")] = _song_url(item)
+    return urls
+
+
+def to_lyrics(data: Dict[str, Any]) -> Lyrics:
+    """Convert a lyric response to a Lyrics object."""
+    return Lyrics(
+        lrc=data.get("lrc", {}).get("lyric", ""),
+        tlyric=data.get("tlyric", {}).get("lyric", ""),
+    )
+
+
+def to_toplists(data: Dict[str, Any]) -> List[TopList]:
+    """Convert a toplist response to TopList objects."""
+    toplists = []
+    for item in data.get("list", []):
+        toplists.append(
+            TopList(
+                id=item["id"],
+                name=item["name"],
+                description=item.get("description", ""),
+                coverImgUrl=item.get("coverImgUrl", ""),
+                updateFrequency=item.get("updateFrequency", ""),
+                tracks=item.get("tracks", []),
+            )
+        )
+    return toplists
+
+
+def to_play_list_detail_dynamic(data: Dict[str, Any]) -> PlayListDetailDynamic:
+    """Convert JSON data to PlayListDetailDynamic object."""
+    return PlayListDetailDynamic(
+        subscribed=data.get("subscribed", False),
+        shareCount=data.get("shareCount", 0),
+        commentCount=data.get("commentCount", 0),
+        playCount=data.get("playCount", 0),
+    )
+
+
+def to_album_detail_dynamic(data: Dict[str, Any]) -> AlbumDetailDynamic:
+    """Convert JSON data to AlbumDetailDynamic object."""
+    return AlbumDetailDynamic(
+        onSale=data.get("onSale", False),
+        subCount=data.get("subCount", 0),
+        liked=data.get("liked", False),
+        commentCount=data.get("commentCount", 0),
+        shareCount=data.get("shareCount", 0),
+    )
+
+
 def build_linux_api_data(url: str, params: Dict[str, Any]) -> str:
     """Build data for Linux API request.
 
@@ -168,8 +491,32 @@ def build_url(base_url: str, path: str, params: Optional[Dict[str, Any]] = None)
     return url
 
 
-def to_play_list_detail(data: Dict[str, Any]) -> PlayListDetail:
-    """Convert JSON data to PlayListDetail object."""
+def sized_image_url(url: str, width: int, height: int) -> str:
+    """Build the URL of a server-resized image.
+
+    Args:
+        url: Original image URL
+        width: Requested width in pixels
+        height: Requested height in pixels
+    Returns:
+        Image URL with the ``param={width}y{height}`` resize parameter
+    """
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}param={width}y{height}"
+
+
+def to_play_list_detail(data: Dict[str, Any], as_table: bool = False) -> PlayListDetail:
+    """Convert JSON data to PlayListDetail object.
+
+    Args:
+        data: The "playlist" object of a playlist detail response
+        as_table: Return the tracks as a TrackTable instead of a list
+    """
+    if as_table:
+        tracks = TrackTable.from_json(data.get("tracks") or [])
+    else:
+        interner = ModelInterner()
+        tracks = [_songinfo(song, interner) for song in data.get("tracks") or []]
     return PlayListDetail(
         id=data.get("id", 0),
         name=data.get("name", ""),
@@ -179,7 +526,8 @@ def to_play_list_detail(data: Dict[str, Any]) -> PlayListDetail:
         description=data.get("description", ""),
         tags=data.get("tags", []),
         creator=data.get("creator", {}),
-        tracks=[to_songinfo(json.dumps(song)) for song in data.get("tracks", [])],
+        tracks=tracks,
+        trackIds=[item.get("id") for item in data.get("trackIds") or []],
     )
 
 
@@ -204,14 +552,14 @@ def to_album_detail(data: Dict[str, Any]) -> AlbumDetail:
         publishTime=album_data.get("publishTime"),
     )
 
-    songs = to_song_info(json.dumps(data), "album")
+    songs = to_song_info(data, "album")
 
     return AlbumDetail(album=album, songs=songs)
 
 
-def to_banners_info(json_str: str) -> List[BannersInfo]:
+def to_banners_info(json_str: JsonData) -> List[BannersInfo]:
     """Convert JSON response to list of BannersInfo objects."""
-    data = json.loads(json_str)
+    data = load_json(json_str)
     banners = []
     for item in data.get("banners", []):
         banner = BannersInfo(
@@ -227,7 +575,7 @@ def to_banners_info(json_str: str) -> List[BannersInfo]:
 
 
 def to_song_list_from_songs(
-    songs: List[SongInfo], playlist_info: Optional[Dict[str, Any]] = None
+    songs: Sequence[SongInfo], playlist_info: Optional[Dict[str, Any]] = None
 ) -> List[SongList]:
     """Convert a list of SongInfo objects to SongList objects.
 
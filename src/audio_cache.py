@@ -0,0 +1,168 @@
+"""本地音频缓存，按内容md5存储并限制磁盘占用"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from logging import info, warning
+from typing import Callable
+
+AUDIO_CACHE_QUOTA = 1024 * 1024 * 1024  # 默认磁盘配额 1GB
+
+
+@dataclass
+class CachedAudio:
+    """缓存中的一首歌"""
+    song_id: int
+    br: int
+    md5: str
+    size: int
+    type: str
+    path: str
+
+
+def file_md5(path: str) -> str:
+    """计算文件的md5"""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """内容寻址的音频缓存，以(歌曲ID, 码率)索引，超出配额时按LRU淘汰
+
+    on_change在歌曲变为可离线播放或不再可离线播放时以(歌曲ID, 是否已缓存)调用。
+    """
+
+    def __init__(self, root: str, quota: int = AUDIO_CACHE_QUOTA):
+        self.root = root
+        self.quota = quota
+        self.on_change: Callable[[int, bool], None] | None = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(root, "index.db"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "md5 TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "song_id INTEGER NOT NULL, br INTEGER NOT NULL, md5 TEXT NOT NULL, "
+            "type TEXT NOT NULL, PRIMARY KEY (song_id, br))"
+        )
+        self._db.commit()
+
+    def _object_path(self, md5: str) -> str:
+        return os.path.join(self.root, "objects", md5[:2], md5)
+
+    def lookup(self, song_id: int, br: int | None = None) -> CachedAudio | None:
+        """查找缓存，未指定码率时返回码率最高的一份"""
+        sql = (
+            "SELECT e.br, e.md5, o.size, e.type FROM entries e "
+            "JOIN objects o ON o.md5 = e.md5 WHERE e.song_id = ?"
+        )
+        args: tuple = (song_id,)
+        if br is not None:
+            sql += " AND e.br = ?"
+            args += (br,)
+        sql += " ORDER BY e.br DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(sql, args).fetchone()
+            if row is None:
+                return None
+            path = self._object_path(row[1])
+            if not os.path.exists(path):
+                # 文件被外部删除，清理索引
+                self._remove_object(row[1])
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE objects SET accessed = ? WHERE md5 = ?", (time.time(), row[1]))
+            self._db.commit()
+        return CachedAudio(song_id, row[0], row[1], row[2], row[3], path)
+
+    def add_file(self, song_id: int, br: int, src_path: str, type_: str = "mp3",
+                 expected_md5: str | None = None, md5: str | None = None) -> CachedAudio | None:
+        """将下载完成的文件移入缓存
+
+        :param src_path: 已下载的文件，成功后被移动到缓存目录
+        :param expected_md5: 服务器给出的md5，不一致时拒绝缓存
+        :param md5: 已计算好的文件md5，为空时重新计算
+        """
+        md5 = (md5 or file_md5(src_path)).lower()
+        if expected_md5 and expected_md5.lower() != md5:
+            warning(f"音频md5校验失败: {song_id} {md5} != {expected_md5}")
+            return None
+        size = os.path.getsize(src_path)
+        if size > self.quota:
+            return None
+
+        path = self._object_path(md5)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                os.remove(src_path)  # 相同内容已存在
+            else:
+                os.replace(src_path, path)
+            self._db.execute(
+                "INSERT OR REPLACE INTO objects (md5, size, accessed) VALUES (?, ?, ?)",
+                (md5, size, time.time()),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (song_id, br, md5, type) VALUES (?, ?, ?, ?)",
+                (song_id, br, md5, type_ or "mp3"),
+            )
+            self._evict(keep=md5)
+            self._db.commit()
+        info(f"音频已缓存: {song_id} br={br} md5={md5}")
+        if self.on_change is not None:
+            self.on_change(song_id, True)
+        return CachedAudio(song_id, br, md5, size, type_ or "mp3", path)
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def song_ids(self) -> list[int]:
+        """所有已缓存的歌曲ID"""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT DISTINCT song_id FROM entries").fetchall()]
+
+    def _remove_object(self, md5: str):
+        song_ids = [row[0] for row in self._db.execute(
+            "SELECT song_id FROM entries WHERE md5 = ?", (md5,)).fetchall()]
+        self._db.execute("DELETE FROM entries WHERE md5 = ?", (md5,))
+        self._db.execute("DELETE FROM objects WHERE md5 = ?", (md5,))
+        path = self._object_path(md5)
+        if os.path.exists(path):
+            os.remove(path)
+        if self.on_change is None:
+            return
+        for song_id in song_ids:
+            # 其他码率的缓存仍在时歌曲仍可播放
+            if self._db.execute(
+                    "SELECT 1 FROM entries WHERE song_id = ?", (song_id,)).fetchone() is None:
+                self.on_change(song_id, False)
+
+    def _evict(self, keep: str | None = None):
+        """超出配额时删除最久未使用的文件"""
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.quota:
+            return
+        for md5, size in self._db.execute(
+                "SELECT md5, size FROM objects ORDER BY accessed").fetchall():
+            if total <= self.quota:
+                break
+            if md5 == keep:
+                continue
+            self._remove_object(md5)
+            total -= size
+            info(f"音频缓存淘汰: {md5}")
@@ -0,0 +1,238 @@
+"""封面图片服务：按显示尺寸请求缩略图，磁盘缓存和内存缓存"""
+
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import info, warning
+from typing import Callable, Iterable
+
+import flet as ft
+import api
+from api.utils import sized_image_url
+
+IMAGE_CACHE_QUOTA = 64 * 1024 * 1024  # 默认磁盘配额 64MB
+IMAGE_MEMORY_QUOTA = 16 * 1024 * 1024  # 内存缓存上限 16MB
+IMAGE_SCALE = 2  # 请求的像素尺寸相对于显示尺寸的倍数，适配高分屏
+IMAGE_WORKERS = 4  # 并发下载数
+
+PLAYLIST_COVER_SIZE = 180  # 主页歌单封面
+PLAYER_COVER_SIZE = 300  # 播放页和播放对话框的封面
+
+# 1x1透明PNG，图片下载完成前的占位
+PLACEHOLDER = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+class ImageService:
+    """按显示尺寸获取图片
+
+    先查内存LRU，再查磁盘缓存，都未命中时请求服务器缩放后的图片。
+    同一图片的并发请求共用一次下载。设置base_url（本地HTTP服务的地址）后，
+    控件通过src从本地服务加载磁盘缓存中的图片。
+    """
+
+    def __init__(self, music_api: api.MusicApi, root: str,
+                 quota: int = IMAGE_CACHE_QUOTA,
+                 memory_quota: int = IMAGE_MEMORY_QUOTA,
+                 scale: float = IMAGE_SCALE):
+        self.music_api = music_api
+        self.root = root
+        self.quota = quota
+        self.memory_quota = memory_quota
+        self.scale = scale
+        self.base_url: str | None = None  # 提供/image/<key>的本地HTTP服务
+        self.hits = 0  # 内存命中
+        self.disk_hits = 0  # 磁盘命中
+        self.downloads = 0  # 网络下载次数
+        self.downloaded_bytes = 0
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._files: OrderedDict[str, int] = OrderedDict()  # 磁盘文件 -> 大小，按访问时间排序
+        self._disk_size = 0
+        self._pending: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS)
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """读取磁盘上已有的缓存文件"""
+        files = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # 上次退出时未写完的文件
+            elif os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._files[name] = size
+            self._disk_size += size
+
+    def _pixels(self, size: int) -> int:
+        return max(1, round(size * self.scale))
+
+    def _key(self, url: str, width: int, height: int) -> str:
+        return hashlib.md5(
+            sized_image_url(url, self._pixels(width), self._pixels(height)).encode()
+        ).hexdigest()
+
+    def get(self, url: str, width: int, height: int) -> bytes | None:
+        """从内存或磁盘缓存读取图片，不访问网络"""
+        if not url:
+            return None
+        return self._lookup(self._key(url, width, height))
+
+    def _lookup(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        path = os.path.join(self.root, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._disk_size -= self._files.pop(key, 0)
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def file(self, key: str) -> str | None:
+        """磁盘缓存中图片文件的路径，未缓存时返回None"""
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        return os.path.join(self.root, key)
+
+    def fetch(self, url: str, width: int, height: int) -> bytes | None:
+        """获取图片，未缓存时下载，阻塞直到完成"""
+        if not url:
+            return None
+        return self.load(url, width, height).result()
+
+    def load(self, url: str, width: int, height: int,
+             callback: Callable[[bytes | None], None] | None = None) -> Future:
+        """在后台获取图片，完成后以图片内容（失败时为None）调用callback"""
+        key = self._key(url, width, height)
+        data = self._lookup(key)
+        if data is not None:
+            future: Future = Future()
+            future.set_result(data)
+        else:
+            with self._lock:
+                future = self._pending.get(key)
+                if future is None and key in self._memory:
+                    future = Future()  # 查找后刚刚下载完成
+                    future.set_result(self._memory[key])
+                elif future is None:
+                    future = self._executor.submit(
+                        self._download, key, url, self._pixels(width), self._pixels(height))
+                    self._pending[key] = future
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    def prefetch(self, urls: Iterable[str], width: int, height: int):
+        """在后台下载图片到缓存"""
+        for url in urls:
+            if url:
+                self.load(url, width, height)
+
+    def show(self, image: ft.Image, url: str | None, width: int, height: int):
+        """把图片显示到控件：已缓存时立即设置，否则先显示占位，下载完成后刷新控件"""
+        image.data = url
+        key = self._key(url, width, height) if url else ""
+        data = self._lookup(key) if url else None
+        if data is not None:
+            self._set_source(image, key, data)
+            return
+        image.src = None
+        image.src_base64 = PLACEHOLDER
+        if not url:
+            return
+
+        def done(data: bytes | None):
+            if data is None or image.data != url:
+                return  # 下载失败或控件已显示其他图片
+            self._set_source(image, key, data)
+            if image.page:
+                image.update()
+
+        self.load(url, width, height, done)
+
+    def _set_source(self, image: ft.Image, key: str, data: bytes):
+        """优先使用本地HTTP服务的地址，图片未写入磁盘或没有本地服务时使用base64"""
+        if self.base_url is not None and self.file(key) is not None:
+            image.src = f"{self.base_url}/image/{key}"
+            image.src_base64 = None
+        else:
+            image.src = None
+            image.src_base64 = base64.b64encode(data).decode()
+
+    def _download(self, key: str, url: str, width: int, height: int) -> bytes | None:
+        try:
+            start = time.perf_counter()
+            data = self.music_api.fetch_img(url, width, height)
+            info(f"图片已下载: {url} {width}x{height} {len(data)}B "
+                 f"({time.perf_counter() - start:.3f}s)")
+        except Exception as e:
+            warning(f"图片下载失败: {url}: {str(e)}")
+            with self._lock:
+                self._pending.pop(key, None)
+            return None
+        self._store(key, data)
+        with self._lock:
+            self.downloads += 1
+            self.downloaded_bytes += len(data)
+            self._remember(key, data)
+            self._pending.pop(key, None)
+        return data
+
+    def _store(self, key: str, data: bytes):
+        """写入磁盘缓存，超出配额时删除最久未使用的文件"""
+        path = os.path.join(self.root, key)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError as e:
+            warning(f"图片缓存写入失败: {str(e)}")
+            return
+        with self._lock:
+            self._disk_size += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            while self._disk_size > self.quota and len(self._files) > 1:
+                name, size = self._files.popitem(last=False)
+                self._disk_size -= size
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, data: bytes):
+        """放入内存LRU，调用时需持有锁"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_quota and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old)
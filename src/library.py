@@ -0,0 +1,260 @@
+"""本地曲库：记录见过的歌曲和歌单，支持离线全文搜索"""
+
+import json
+import sqlite3
+import threading
+import time
+from logging import info, warning
+from typing import Iterable
+
+import api
+
+LIBRARY_SEARCH_LIMIT = 30  # 默认返回的结果数
+# bm25权重：歌名、歌手、专辑
+RANK_WEIGHTS = (10.0, 5.0, 2.0)
+
+
+def _like_pattern(text: str) -> str:
+    """包含text的LIKE模式，配合ESCAPE '\\'使用"""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class LocalLibrary:
+    """SQLite曲库
+
+    songs表保存歌曲的完整信息，songs_fts以歌曲ID为rowid索引歌名、歌手和专辑；
+    playlists和playlist_tracks保存歌单及其歌曲顺序。downloads记录本地音频缓存中
+    的歌曲，与songs分开保存，歌曲先被缓存后才记入曲库时也不会丢失；离线时优先
+    返回可以播放的歌曲。
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS songs ("
+            "id INTEGER PRIMARY KEY, name TEXT NOT NULL, duration INTEGER NOT NULL, "
+            "pic_url TEXT NOT NULL, album_id INTEGER NOT NULL, album_name TEXT NOT NULL, "
+            "album_pic TEXT NOT NULL, artists TEXT NOT NULL, seen REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS downloads (song_id INTEGER PRIMARY KEY)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS playlists ("
+            "id INTEGER PRIMARY KEY, name TEXT NOT NULL, cover TEXT NOT NULL, "
+            "description TEXT NOT NULL, creator TEXT NOT NULL, seen REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_tracks ("
+            "playlist_id INTEGER NOT NULL, position INTEGER NOT NULL, "
+            "song_id INTEGER NOT NULL, PRIMARY KEY (playlist_id, position))"
+        )
+        # trigram分词支持中文任意子串匹配，旧版SQLite没有时退回默认分词
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING "
+                "fts5(name, artists, album, tokenize='trigram')"
+            )
+            self.trigram = True
+        except sqlite3.OperationalError:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING "
+                "fts5(name, artists, album)"
+            )
+            self.trigram = False
+        self._db.commit()
+
+    def add_songs(self, songs: Iterable[api.SongInfo]):
+        """记录歌曲，已有的歌曲更新信息
+
+        搜索结果中的歌曲可能没有封面，此时保留之前记录的封面。
+        """
+        now = time.time()
+        rows = []
+        for song in songs:
+            album = song.album
+            artists = [
+                {"id": artist.id, "name": artist.name, "picUrl": artist.picUrl}
+                for artist in song.artists
+            ]
+            rows.append((
+                song.id, song.name or "", song.duration or 0, song.pic_url or "",
+                album.id if album else 0, (album.name or "") if album else "",
+                (album.picUrl or "") if album else "",
+                json.dumps(artists, ensure_ascii=False), now,
+            ))
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO songs (id, name, duration, pic_url, album_id, album_name, "
+                "album_pic, artists, seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                "duration = excluded.duration, "
+                "pic_url = coalesce(nullif(excluded.pic_url, ''), songs.pic_url), "
+                "album_id = excluded.album_id, album_name = excluded.album_name, "
+                "album_pic = coalesce(nullif(excluded.album_pic, ''), songs.album_pic), "
+                "artists = excluded.artists, "
+                "seen = excluded.seen",
+                rows,
+            )
+            self._db.executemany(
+                "DELETE FROM songs_fts WHERE rowid = ?", [(row[0],) for row in rows])
+            self._db.executemany(
+                "INSERT INTO songs_fts (rowid, name, artists, album) VALUES (?, ?, ?, ?)",
+                [
+                    (row[0], row[1],
+                     " / ".join(artist["name"] or "" for artist in json.loads(row[7])),
+                     row[5])
+                    for row in rows
+                ],
+            )
+            self._db.commit()
+
+    def add_playlist(self, playlist: api.PlayListDetail):
+        """记录歌单及其歌曲"""
+        start = time.perf_counter()
+        self.add_songs(playlist.tracks)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO playlists (id, name, cover, description, creator, seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (playlist.id, playlist.name or "", playlist.coverImgUrl or "",
+                 playlist.description or "",
+                 json.dumps(playlist.creator or {}, ensure_ascii=False), time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist.id,))
+            self._db.executemany(
+                "INSERT INTO playlist_tracks (playlist_id, position, song_id) VALUES (?, ?, ?)",
+                ((playlist.id, position, song.id)
+                 for position, song in enumerate(playlist.tracks)),
+            )
+            self._db.commit()
+        info(f"歌单已加入曲库: {playlist.id} {len(playlist.tracks)}首 "
+             f"({time.perf_counter() - start:.3f}s)")
+
+    def set_downloaded(self, song_id: int, downloaded: bool):
+        """更新歌曲是否已在本地音频缓存中"""
+        with self._lock:
+            if downloaded:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO downloads (song_id) VALUES (?)", (song_id,))
+            else:
+                self._db.execute("DELETE FROM downloads WHERE song_id = ?", (song_id,))
+            self._db.commit()
+
+    def sync_downloaded(self, song_ids: Iterable[int]):
+        """以音频缓存中的歌曲重置下载标记，启动时调用"""
+        with self._lock:
+            self._db.execute("DELETE FROM downloads")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO downloads (song_id) VALUES (?)",
+                ((song_id,) for song_id in song_ids))
+            self._db.commit()
+
+    def song(self, song_id: int) -> api.SongInfo | None:
+        """按ID获取歌曲"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._SONG_COLUMNS} FROM songs WHERE id = ?", (song_id,)).fetchone()
+        return self._song(row) if row else None
+
+    def search(self, keywords: str, offset: int = 0, limit: int = LIBRARY_SEARCH_LIMIT,
+               downloaded_only: bool = False) -> list[api.SongInfo]:
+        """离线搜索歌曲
+
+        已下载的歌曲排在前面，其次按歌名、歌手、专辑加权的bm25相关度排序。
+        """
+        keywords = " ".join(keywords.split())
+        if not keywords:
+            return []
+        start = time.perf_counter()
+        where = "AND d.song_id IS NOT NULL" if downloaded_only else ""
+        if len(keywords) >= 3 or not self.trigram:
+            # 每个词作为短语，词之间为AND
+            query = " ".join('"' + word.replace('"', '""') + '"' for word in keywords.split())
+            sql = (
+                f"SELECT {self._SONG_COLUMNS_S} FROM songs_fts f JOIN songs s ON s.id = f.rowid "
+                f"LEFT JOIN downloads d ON d.song_id = s.id "
+                f"WHERE songs_fts MATCH ? {where} "
+                f"ORDER BY d.song_id IS NOT NULL DESC, bm25(songs_fts, ?, ?, ?) LIMIT ? OFFSET ?"
+            )
+            args: tuple = (query, *RANK_WEIGHTS, limit, offset)
+        else:
+            # trigram无法匹配少于3个字符的词，直接扫描（曲库通常只有几万首）
+            pattern = _like_pattern(keywords)
+            sql = (
+                f"SELECT {self._SONG_COLUMNS_S} FROM songs_fts f JOIN songs s ON s.id = f.rowid "
+                f"LEFT JOIN downloads d ON d.song_id = s.id "
+                f"WHERE (f.name LIKE ?1 ESCAPE '\\' OR f.artists LIKE ?1 ESCAPE '\\' "
+                f"OR f.album LIKE ?1 ESCAPE '\\') {where} "
+                f"ORDER BY d.song_id IS NOT NULL DESC, f.name LIKE ?1 ESCAPE '\\' DESC, "
+                f"f.artists LIKE ?1 ESCAPE '\\' DESC, s.seen DESC LIMIT ?2 OFFSET ?3"
+            )
+            args = (pattern, limit, offset)
+        try:
+            with self._lock:
+                rows = self._db.execute(sql, args).fetchall()
+        except sqlite3.OperationalError as e:
+            warning(f"曲库搜索失败: {keywords}: {str(e)}")
+            return []
+        info(f"曲库搜索: {keywords} {len(rows)}条 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+        return [self._song(row) for row in rows]
+
+    def search_playlists(self, keywords: str, offset: int = 0,
+                         limit: int = LIBRARY_SEARCH_LIMIT) -> list[api.SongList]:
+        """离线搜索歌单名称，歌单数量少，直接扫描"""
+        keywords = " ".join(keywords.split())
+        if not keywords:
+            return []
+        pattern = _like_pattern(keywords)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.id, p.name, p.description, p.cover, p.creator, "
+                "(SELECT count(*) FROM playlist_tracks t WHERE t.playlist_id = p.id) "
+                "FROM playlists p WHERE p.name LIKE ? ESCAPE '\\' "
+                "ORDER BY p.seen DESC LIMIT ? OFFSET ?",
+                (pattern, limit, offset)).fetchall()
+        return [
+            api.SongList(id=row[0], name=row[1], description=row[2], coverImgUrl=row[3],
+                         creator=json.loads(row[4]), trackCount=row[5])
+            for row in rows
+        ]
+
+    def playlist(self, playlist_id: int) -> api.PlayListDetail | None:
+        """获取曲库中的歌单，用于离线打开"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, name, cover, description, creator FROM playlists WHERE id = ?",
+                (playlist_id,)).fetchone()
+            if row is None:
+                return None
+            tracks = self._db.execute(
+                f"SELECT {self._SONG_COLUMNS_S} FROM playlist_tracks t "
+                f"JOIN songs s ON s.id = t.song_id WHERE t.playlist_id = ? ORDER BY t.position",
+                (playlist_id,)).fetchall()
+        songs = [self._song(track) for track in tracks]
+        return api.PlayListDetail(
+            id=row[0], name=row[1], coverImgUrl=row[2], createTime=0, updateTime=0,
+            description=row[3], creator=json.loads(row[4]), tracks=songs,
+            trackIds=[song.id for song in songs],
+        )
+
+    _SONG_COLUMNS = "id, name, duration, pic_url, album_id, album_name, album_pic, artists"
+    _SONG_COLUMNS_S = ", ".join(f"s.{column}" for column in _SONG_COLUMNS.split(", "))
+
+    @staticmethod
+    def _song(row) -> api.SongInfo:
+        return api.SongInfo(
+            id=row[0],
+            name=row[1],
+            duration=row[2],
+            pic_url=row[3] or None,
+            album=api.AlbumInfo(id=row[4], name=row[5], picUrl=row[6]),
+            artists=[
+                api.SingerInfo(id=artist["id"], name=artist["name"], picUrl=artist["picUrl"])
+                for artist in json.loads(row[7])
+            ],
+        )
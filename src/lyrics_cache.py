@@ -0,0 +1,64 @@
+"""歌词缓存：按歌曲ID缓存解析好的歌词时间轴"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import warning
+from typing import Callable
+
+import api
+
+LYRICS_CACHE_SIZE = 32  # 内存中保留的歌词数量
+
+
+class LyricsCache:
+    """解析后的歌词LRU，同一首歌的并发请求共用一次下载和解析"""
+
+    def __init__(self, music_api: api.MusicApi, size: int = LYRICS_CACHE_SIZE):
+        self.music_api = music_api
+        self.size = size
+        self._lock = threading.Lock()
+        self._timelines: OrderedDict[int, api.LyricTimeline] = OrderedDict()
+        self._pending: dict[int, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def get(self, song_id: int) -> api.LyricTimeline | None:
+        """返回已缓存的歌词，不发出请求"""
+        with self._lock:
+            timeline = self._timelines.get(song_id)
+            if timeline is not None:
+                self._timelines.move_to_end(song_id)
+            return timeline
+
+    def load(self, song_id: int,
+             callback: Callable[[int, api.LyricTimeline], None] | None = None) -> Future:
+        """在后台获取歌词，完成后以(歌曲ID, 歌词)调用callback"""
+        timeline = self.get(song_id)
+        if timeline is not None:
+            future: Future = Future()
+            future.set_result(timeline)
+        else:
+            with self._lock:
+                future = self._pending.get(song_id)
+                if future is None:
+                    future = self._executor.submit(self._load, song_id)
+                    self._pending[song_id] = future
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(song_id, f.result()))
+        return future
+
+    def _load(self, song_id: int) -> api.LyricTimeline:
+        try:
+            timeline = api.LyricTimeline.from_lyrics(self.music_api.song_lyric(song_id))
+        except Exception as e:
+            # 请求失败时返回空歌词但不缓存，下次显示时重新请求
+            warning(f"歌词加载失败: {song_id}: {str(e)}")
+            with self._lock:
+                self._pending.pop(song_id, None)
+            return api.LyricTimeline([])
+        with self._lock:
+            self._pending.pop(song_id, None)
+            self._timelines[song_id] = timeline
+            while len(self._timelines) > self.size:
+                self._timelines.popitem(last=False)
+        return timeline
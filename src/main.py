@@ -9,7 +9,11 @@ import pages.playlist as playlist
 import pages.player as player
 import pages.my as my
 import pages.login as login
+from pages.loading import LoadingView
 import models
+from collections import OrderedDict
+
+VIEW_CACHE_SIZE = 8  # 最多缓存的页面数量
 
 
 class App:
@@ -19,70 +23,115 @@ class App:
     page_title = "主页"
     # 当前全部页面
     page_views = []
+    # 按路由缓存的页面，再次访问时复用已加载的数据
+    view_cache: OrderedDict[str, ft.View]
 
     def __init__(self, page: ft.Page):
         # 全局变量
         self.globals_var = models.Globals(page)
+        self.view_cache = OrderedDict()
 
         self.globals_var.page.title = "网易云音乐"
         self.globals_var.page.on_route_change = self.route_change
         self.globals_var.page.on_view_pop = self.view_pop
 
+        # 页面栈完全由路由管理，移除默认页面
+        self.globals_var.page.views.clear()
         self.globals_var.page.go("/")
 
     def route_change(self, e):
         """处理路由变化"""
         self.globals_var.music_playing.position_callbacks = []
         self.globals_var.music_playing.state_callbacks = []
-        models.info(f"前往路由: {self.globals_var.page.route}")
-        # 根据当前路由添加相应视图
-        self.troute = ft.TemplateRoute(self.globals_var.page.route)
-        if self.troute.match("/"):
-            self.globals_var.page.views.append(
-                homepage.Homepage(self.globals_var))
-        elif self.troute.match("/login"):
-            self.globals_var.page.views.append(
-                login.LoginPage(self.globals_var))
-        elif self.troute.match("/my"):
-            self.globals_var.page.views.append(
-                my.MyPage(self.globals_var))
-        elif self.troute.match("/search"):
-            self.globals_var.page.views.append(
-                search.SearchPage(self.globals_var))
-        elif self.troute.match("/search/:value"):
-            self.globals_var.page.views.append(search.SearchPage(
-                self.globals_var, self.troute.value))  # type: ignore
-        elif self.troute.match("/search_result/:query"):
-            self.globals_var.page.views.append(search.SearchResultPage(
-                self.troute.query, self.globals_var))  # type: ignore
-        elif self.troute.match("/playlist/:id"):
-            playlist_id = int(self.troute.id)  # type: ignore
-            self.globals_var.page.views.append(
-                playlist.PlaylistPage(playlist_id, self.globals_var))
-        elif self.troute.match("/player"):
-            self.globals_var.page.views.append(
-                player.PlayerPage(self.globals_var))
-        elif self.troute.match("/reload"):
-            self.globals_var.page.go(self.globals_var.page.views[-1].route)  # type: ignore
-        else:
-            # 处理未知路由，重定向到首页
-            models.warning("Unknown route, redirecting to home")
-            self.globals_var.page.go("/")
+        self.globals_var.music_playing.song_callbacks = []
+        route = self.globals_var.page.route
+        models.info(f"前往路由: {route}")
+        views = self.globals_var.page.views
 
-        # 删除最后一项重复route
-        if self.globals_var.page.views[-2].route and self.globals_var.page.route == self.globals_var.page.views[-2].route:
-            models.info(f"Removing duplicate route: {self.globals_var.page.route}")
-            del self.globals_var.page.views[-2]
+        # 返回到页面栈中已有的页面时，移除其上方的页面
+        for index, view in enumerate(views):
+            if view.route == route:
+                for covered in views[index + 1:]:
+                    self.cancel_loading(covered)
+                del views[index + 1:]
+                break
+        else:
+            view = self.get_view(route)
+            if view is None:
+                # 处理未知路由，重定向到首页
+                models.warning("Unknown route, redirecting to home")
+                self.globals_var.page.go("/")
+                return
+            views.append(view)
 
+        # 先显示页面骨架，再开始后台加载；被覆盖的页面停止加载
+        for view in views[:-1]:
+            self.cancel_loading(view)
+        top_view = views[-1]
+        if isinstance(top_view, LoadingView):
+            top_view.activate()
         self.globals_var.page.update()
+        if isinstance(top_view, LoadingView):
+            if top_view.refresh_on_show:
+                top_view.reload()
+            else:
+                top_view.start()
+
+    def get_view(self, route: str) -> ft.View | None:
+        """从缓存中取出页面，没有时创建并加入缓存"""
+        view = self.view_cache.get(route)
+        if view is not None:
+            self.view_cache.move_to_end(route)
+            models.info(f"复用页面: {route}")
+            return view
+
+        view = self.create_view(route)
+        if view is None:
+            return None
+        self.view_cache[route] = view
+        # 超出缓存数量时丢弃最久未使用且不在页面栈中的页面
+        for cached_route in list(self.view_cache):
+            if len(self.view_cache) <= VIEW_CACHE_SIZE:
+                break
+            cached = self.view_cache[cached_route]
+            if cached not in self.globals_var.page.views and cached is not view:
+                self.cancel_loading(cached)
+                del self.view_cache[cached_route]
+        return view
+
+    def create_view(self, route: str) -> ft.View | None:
+        """根据路由创建页面"""
+        troute = ft.TemplateRoute(route)
+        if troute.match("/"):
+            return homepage.Homepage(self.globals_var)
+        elif troute.match("/login"):
+            return login.LoginPage(self.globals_var)
+        elif troute.match("/my"):
+            return my.MyPage(self.globals_var)
+        elif troute.match("/search"):
+            return search.SearchPage(self.globals_var)
+        elif troute.match("/search/:value"):
+            return search.SearchPage(self.globals_var, troute.value)  # type: ignore
+        elif troute.match("/search_result/:query"):
+            return search.SearchResultPage(troute.query, self.globals_var)  # type: ignore
+        elif troute.match("/playlist/:id"):
+            return playlist.PlaylistPage(int(troute.id), self.globals_var)  # type: ignore
+        elif troute.match("/player"):
+            return player.PlayerPage(self.globals_var)
+        return None
+
+    @staticmethod
+    def cancel_loading(view):
+        """取消页面未完成的加载"""
+        if isinstance(view, LoadingView):
+            view.cancel()
 
     def view_pop(self, e):
         """处理视图弹出事件"""
-        self.globals_var.page.views.pop()
+        self.cancel_loading(self.globals_var.page.views.pop())
         top_view = self.globals_var.page.views[-1]
         self.globals_var.page.go(top_view.route)  # type: ignore
-        self.globals_var.music_playing.position_callbacks = []
-        self.globals_var.music_playing.state_callbacks = []
 
 
-ft.app(App)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(App)
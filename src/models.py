@@ -2,34 +2,53 @@ import flet as ft
 import api
 from flet import OptionalEventCallable
 import flet_audio as fa
-import requests
-import base64
+import os
+from typing import Sequence
 from player import MusicPlayerThread
+from stream import AudioStreamServer
+from audio_cache import AudioCache, AUDIO_CACHE_QUOTA
+from prefetch import QueuePrefetcher, PLAYBACK_BR_LADDER
+from image_cache import ImageService, IMAGE_CACHE_QUOTA
+from search_engine import SearchEngine
+from lyrics_cache import LyricsCache
+from library import LocalLibrary
+from ui_update import UiUpdateScheduler, UI_FPS
 from logging import debug, info, warning, error, critical
 import logging
 
 LOG_FORMAT = " %(asctime)s - %(filename)s[func:%(funcName)s line:%(lineno)d]\n%(levelname)s: %(message)s\n"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, filename="log.txt")
 
+# 应用数据目录，打包后由flet提供
+DATA_DIR = os.getenv("FLET_APP_STORAGE_DATA") or os.path.join("storage", "data")
+TEMP_DIR = os.getenv("FLET_APP_STORAGE_TEMP") or os.path.join("storage", "temp")
+
 
 class MusicPlaying:
     """全局音乐播放控制器"""
 
-    def __init__(self, page=None):
+    def __init__(self, page=None, crossfade: int = 0, ui_fps: float = UI_FPS):
         self.song_id: int | None = None
         self.song_name: str | None = None
         self.song_pic: str | None = None
         self.artists: list[api.SingerInfo] = []
 
         # 创建音乐播放线程
-        self._player = MusicPlayerThread(page=page)
+        self._player = MusicPlayerThread(page=page, crossfade=crossfade)
         self._player.add_position_callback(self.update_position)
         self._player.add_state_callback(self.update_state)
+        self._player.add_track_callback(self.update_track)
         self._player.start()
 
         # 注册回调函数列表
         self.position_callbacks: list[OptionalEventCallable] = []
         self.state_callbacks: list[OptionalEventCallable] = []
+        self.song_callbacks: list[OptionalEventCallable] = []
+        # 进度回调按帧率合并，回调返回是否需要刷新，由调度器统一调用page.update
+        self._position_updates = UiUpdateScheduler(
+            page, lambda: self.position_callbacks, ui_fps)
+        # 播放器自动切换到预加载歌曲时的处理（由Globals设置）
+        self.on_track_changed: OptionalEventCallable = None
 
     @property
     def playing_state(self) -> bool:
@@ -63,13 +82,31 @@ class MusicPlaying:
         if callback in self.state_callbacks:
             self.state_callbacks.remove(callback)
 
-    def update_position(self, position):
-        """更新播放位置"""
-        # 通知所有注册的回调
-        for callback in self.position_callbacks:
+    def add_song_callback(self, callback: OptionalEventCallable):
+        """添加歌曲信息更新回调函数"""
+        if callback not in self.song_callbacks:
+            self.song_callbacks.append(callback)
+
+    def remove_song_callback(self, callback: OptionalEventCallable):
+        """移除歌曲信息更新回调函数"""
+        if callback in self.song_callbacks:
+            self.song_callbacks.remove(callback)
+
+    def update_song(self):
+        """歌曲信息变化，通知所有注册的回调"""
+        for callback in self.song_callbacks:
             if callback is None:
                 continue
-            callback(position)
+            callback(self.song_id)
+
+    def update_track(self, song_id):
+        """播放器已自动切换到预加载的歌曲"""
+        if self.on_track_changed is not None:
+            self.on_track_changed(song_id)
+
+    def update_position(self, position):
+        """更新播放位置"""
+        self._position_updates.submit(position)
 
     def update_state(self, state):
         """更新播放状态"""
@@ -89,11 +126,29 @@ class MusicPlaying:
     ):
         """设置当前播放的歌曲信息"""
         info(f"Setting song: {song_name} (ID: {song_id})")
+        self.set_song_info(song_id, song_name, song_pic, song_artists)
+        self._player.set_song({
+            "id": song_id,
+            "src": song_src
+        })
+
+    def set_song_info(
+        self,
+        song_id: int,
+        song_name: str,
+        song_pic: str,
+        song_artists: list[api.SingerInfo],
+    ):
+        """更新当前歌曲信息并通知界面"""
         self.song_id = song_id
         self.song_name = song_name
         self.song_pic = song_pic
         self.artists = song_artists
-        self._player.set_song({
+        self.update_song()
+
+    def preload(self, song_id: int, song_src: str):
+        """预加载下一首歌曲，当前歌曲结束后无缝切换"""
+        self._player.preload({
             "id": song_id,
             "src": song_src
         })
@@ -121,8 +176,10 @@ class MusicPlaying:
     def dispose(self):
         """清理资源"""
         self._player.stop()
+        self._position_updates.cancel()
         self.position_callbacks.clear()
         self.state_callbacks.clear()
+        self.song_callbacks.clear()
 
 
 class Globals:
@@ -130,16 +187,52 @@ class Globals:
 
     music_api: api.MusicApi
     music_playing: MusicPlaying
-    music_playing_list: list[api.SongInfo] = []  # 播放列表
+    music_playing_list: Sequence[api.SongInfo] = []  # 播放列表，可为list或TrackTable
     music_playing_index: int = 0  # 当前播放列表索引
     music_playing_mode: str = "list"  # 播放模式，默认为列表循环
 
     page: ft.Page
 
     def __init__(self, p: ft.Page):
-        self.music_api = api.MusicApi()
+        self.music_api = api.MusicApi(
+            cache=api.ResponseCache(os.path.join(DATA_DIR, "api_cache.db"))
+        )
         self.page = p
-        self.music_playing = MusicPlaying(page=p)
+        self.music_playing = MusicPlaying(
+            page=p,
+            crossfade=p.client_storage.get("crossfade_ms") or 0,
+            ui_fps=p.client_storage.get("ui_fps") or UI_FPS,
+        )
+        self.music_playing.on_track_changed = self.track_changed
+        # 本地音频缓存，配额可在client_storage中配置
+        self.audio_cache = AudioCache(
+            os.path.join(DATA_DIR, "audio"),
+            self.page.client_storage.get("audio_cache_quota") or AUDIO_CACHE_QUOTA,
+        )
+        # 本地曲库，记录见过的歌曲和歌单以及是否已缓存，离线时用于搜索和播放
+        self.library = LocalLibrary(os.path.join(DATA_DIR, "library.db"))
+        self.library.sync_downloaded(self.audio_cache.song_ids())
+        self.audio_cache.on_change = self.library.set_downloaded
+        # 搜索结果缓存和边输入边搜索
+        self.search = SearchEngine(self.music_api, library=self.library)
+        # 解析后的歌词缓存
+        self.lyrics = LyricsCache(self.music_api)
+        # 封面图片缓存，按显示尺寸下载
+        self.images = ImageService(
+            self.music_api,
+            os.path.join(DATA_DIR, "images"),
+            self.page.client_storage.get("image_cache_quota") or IMAGE_CACHE_QUOTA,
+        )
+        # 本地音频代理，边下载边播放；同时提供缓存的封面图片
+        self.stream_server = AudioStreamServer(
+            os.path.join(TEMP_DIR, "audio"), self.audio_cache,
+            client=self.music_api.transport.client, images=self.images)
+        self.stream_server.start()
+        self.images.base_url = self.stream_server.base_url
+        # 播放队列预取，下一首就绪后预加载到播放器
+        self.prefetcher = QueuePrefetcher(
+            self.music_api, self.stream_server, self.audio_cache,
+            on_next_ready=self.music_playing.preload, images=self.images)
         # 检查并恢复登录状态
         self.check_and_restore_login()
 
@@ -193,25 +286,79 @@ class Globals:
     def refresh_music_playing(self):
         """刷新当前播放的歌曲"""
         if self.music_playing_list[self.music_playing_index].id == self.music_playing.song_id:
+            self.prefetcher.schedule(self.music_playing_list, self.music_playing_index)
             return
         info(f"刷新当前播放的歌曲: {self.music_playing_list[self.music_playing_index].name}")
-        song_info = self.music_api.song_detail(
-            self.music_playing_list[self.music_playing_index].id
-        )
-        song_url = self.music_api.songs_url(
-            self.music_playing_list[self.music_playing_index].id)
-        song_data = (
-            requests.get(song_url.url).content if song_url else None
-        )
-        if not song_data:
-            return
+        song_id = self.music_playing_list[self.music_playing_index].id
+        song_info = self.prefetcher.song_detail(song_id)
+        if song_info is None:
+            try:
+                song_info = self.music_api.song_detail(song_id)
+            except api.ApiError as e:
+                # 离线时使用曲库中的信息，已缓存的歌曲仍可播放
+                warning(f"获取歌曲详情失败: {song_id}: {str(e)}")
+                song_info = self.library.song(song_id) \
+                    or self.music_playing_list[self.music_playing_index]
+        self.library.add_songs([song_info])
+        cached = self.audio_cache.lookup(song_id)
+        if cached:
+            # 命中本地缓存，直接播放
+            song_src = self.stream_server.open_cached(cached)
+        else:
+            song_url = self.prefetcher.song_url(song_id)
+            if song_url is None:
+                try:
+                    song_url = self.music_api.songs_url(
+                        song_id, str(PLAYBACK_BR_LADDER[0]))
+                except api.ApiError as e:
+                    warning(f"获取歌曲地址失败: {song_id}: {str(e)}")
+                    self.song_unavailable(song_info, "网络不可用，这首歌没有离线缓存")
+                    return
+            if not song_url.url:
+                self.song_unavailable(song_info, "这首歌暂时无法播放")
+                return
+            song_src = self.stream_server.open(
+                song_url.id, song_url.url, song_url.size, song_url.type,
+                song_url.br, song_url.md5)
         self.music_playing.set_song(
             self.music_playing_list[self.music_playing_index].id,
             self.music_playing_list[self.music_playing_index].name,
-            base64.b64encode(song_data).decode("utf-8"),
-            song_info.album.picUrl if song_info.album.picUrl else "",
+            song_src,
+            song_info.album.picUrl if song_info.album and song_info.album.picUrl else "",
             song_info.artists
         )
+        # 预取后续歌曲，取消旧队列的预取
+        self.prefetcher.schedule(self.music_playing_list, self.music_playing_index)
+
+    def song_unavailable(self, song_info: api.SongInfo, message: str):
+        """无法播放选中的歌曲：停止旧歌曲，显示歌曲信息并提示原因"""
+        self.music_playing.pause()
+        self.music_playing.set_song_info(
+            song_info.id,
+            song_info.name,
+            song_info.album.picUrl if song_info.album and song_info.album.picUrl else "",
+            song_info.artists,
+        )
+        # 不记为当前歌曲，再次选中时重新尝试
+        self.music_playing.song_id = None
+        self.page.open(ft.SnackBar(ft.Text(message)))
+
+    def track_changed(self, song_id: int):
+        """播放器自动切换到下一首后同步播放队列和歌曲信息"""
+        next_index = self.music_playing_index + 1
+        if next_index >= len(self.music_playing_list) \
+                or self.music_playing_list[next_index].id != song_id:
+            return
+        self.music_playing_index = next_index
+        song = self.music_playing_list[next_index]
+        song_info = self.prefetcher.song_detail(song_id) or song
+        self.music_playing.set_song_info(
+            song_id,
+            song.name,
+            song_info.album.picUrl if song_info.album and song_info.album.picUrl else "",
+            song_info.artists,
+        )
+        self.prefetcher.schedule(self.music_playing_list, self.music_playing_index)
 
     def logout(self):
         """登出账号"""
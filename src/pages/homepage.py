@@ -2,9 +2,11 @@
 
 import flet as ft
 import models
+from image_cache import PLAYLIST_COVER_SIZE, PLAYER_COVER_SIZE
+from pages.loading import LoadingView
 
 
-class Homepage(ft.View):
+class Homepage(LoadingView):
     """主页"""
 
     def __init__(self, globals_var: models.Globals):
@@ -15,6 +17,7 @@ class Homepage(ft.View):
         super().__init__()
 
         self.api = globals_var.music_api
+        self.images = globals_var.images
         self.page = globals_var.page
         self.route = "/"
         self.adaptive = True
@@ -49,16 +52,6 @@ class Homepage(ft.View):
             ),
         )
 
-        # 主要内容区域
-        self.controls = [
-            ft.Column(
-                controls=[
-                    ft.Text("加载中...", size=20),
-                ],
-                spacing=20,
-            )
-        ]
-
         # 底部导航栏
         self.navigation_bar = ft.NavigationBar(
             destinations=[
@@ -73,13 +66,12 @@ class Homepage(ft.View):
             ),
         )
 
-        self.load_view()
+    def fetch(self):
+        """获取推荐歌单"""
+        return self.api.top_song_list()
 
-    def load_view(self):
+    def render(self, top_song_list):
         """加载主页内容"""
-        # 获取推荐歌单
-        top_song_list = self.api.top_song_list()
-
         # 创建内容列表
         content = []
 
@@ -98,13 +90,7 @@ class Homepage(ft.View):
                             ft.TextButton(
                                 content=ft.Column(
                                     controls=[
-                                        ft.Image(
-                                            src=playlist.coverImgUrl,
-                                            width=180,
-                                            height=180,
-                                            fit=ft.ImageFit.COVER,
-                                            border_radius=10,
-                                        ),
+                                        self.cover_image(playlist.coverImgUrl),
                                         ft.Text(
                                             playlist.name,
                                             no_wrap=False,
@@ -135,6 +121,17 @@ class Homepage(ft.View):
             )
         ]
 
+    def cover_image(self, url: str) -> ft.Image:
+        """歌单封面，按显示尺寸从图片缓存加载"""
+        image = ft.Image(
+            width=PLAYLIST_COVER_SIZE,
+            height=PLAYLIST_COVER_SIZE,
+            fit=ft.ImageFit.COVER,
+            border_radius=10,
+        )
+        self.images.show(image, url, PLAYLIST_COVER_SIZE, PLAYLIST_COVER_SIZE)
+        return image
+
     def to_songlist(self, songlist_id: int):
         """跳转到歌单页面"""
         self.page.go(f"/playlist/{songlist_id}")  # type: ignore
@@ -152,12 +149,14 @@ class MusicAlert(ft.AlertDialog):
         super().__init__()
         self.page = globals_var.page
         self.music_playing = globals_var.music_playing
+        self.images = globals_var.images
         self.globals = globals_var
 
         self.load_view()
 
         self.music_playing.add_position_callback(self.update_position)
         self.music_playing.add_state_callback(self.update_state)
+        self.music_playing.add_song_callback(self.update_song)
 
     def load_view(self):
         """加载音乐播放提示对话框"""
@@ -215,24 +214,28 @@ class MusicAlert(ft.AlertDialog):
                 alignment=ft.MainAxisAlignment.CENTER,
                 spacing=20,
             )
+            self.song_name_label = ft.Text(
+                self.music_playing.song_name,
+                size=24,
+                weight=ft.FontWeight.BOLD,
+                text_align=ft.TextAlign.CENTER,
+            )
+            self.cover_image = ft.Image(
+                width=PLAYER_COVER_SIZE,
+                height=PLAYER_COVER_SIZE,
+                border_radius=ft.border_radius.all(10),
+                fit=ft.ImageFit.COVER,
+            )
+            self.images.show(
+                self.cover_image, self.music_playing.song_pic,
+                PLAYER_COVER_SIZE, PLAYER_COVER_SIZE)
             self.content = ft.Container(
                 content=ft.Column(
                     controls=[
-                        ft.Text(
-                            self.music_playing.song_name,
-                            size=24,
-                            weight=ft.FontWeight.BOLD,
-                            text_align=ft.TextAlign.CENTER,
-                        ),
+                        self.song_name_label,
                         # 封面图片
                         ft.Container(
-                            content=ft.Image(
-                                src=self.music_playing.song_pic,
-                                width=300,
-                                height=300,
-                                border_radius=ft.border_radius.all(10),
-                                fit=ft.ImageFit.COVER,
-                            ),
+                            content=self.cover_image,
                             margin=ft.margin.only(bottom=40),
                             shadow=ft.BoxShadow(
                                 spread_radius=1,
@@ -277,23 +280,38 @@ class MusicAlert(ft.AlertDialog):
         self.page.go(f"/player")  # type: ignore
         self.page.close(self)  # type: ignore
 
+    def update_song(self, song_id):
+        """切换歌曲后原地更新歌曲信息"""
+        if not hasattr(self, "song_name_label"):
+            return  # 打开对话框时没有正在播放的歌曲
+        self.song_name_label.value = self.music_playing.song_name
+        self.images.show(
+            self.cover_image, self.music_playing.song_pic,
+            PLAYER_COVER_SIZE, PLAYER_COVER_SIZE)
+        self.progress_bar.value = 0
+        self.time_label.value = "00:00 / 00:00"
+        self.update()
+
     def format_time(self, seconds: float) -> str:
         """格式化时间显示"""
         minutes = int(seconds // 60)
         seconds = int(seconds % 60)
         return f"{minutes:02d}:{seconds:02d}"
 
-    def update_position(self, position):
-        """更新进度条和时间显示"""
+    def update_position(self, position) -> bool:
+        """更新进度条和时间显示，返回显示内容是否变化（由调度器统一刷新页面）"""
         duration = self.music_playing.duration
-        if duration > 0:  # type: ignore
-            # 更新进度条
-            self.progress_bar.value = (position / duration) * 100 \
-                if (position / duration) * 100 <= self.progress_bar.max \
-                else self.progress_bar.max  # type: ignore
-            # 更新时间显示
-            self.time_label.value = f"{self.format_time(position/1000)} / {self.format_time(duration/1000)}"
-            self.update()
+
+        if not duration or duration <= 0:
+            return False
+        time_text = f"{self.format_time(position/1000)} / {self.format_time(duration/1000)}"
+        if time_text == self.time_label.value:
+            return False  # 显示精度为秒，未变化时不刷新
+        # 更新进度条
+        self.progress_bar.value = min((position / duration) * 100, self.progress_bar.max)  # type: ignore
+        # 更新时间显示
+        self.time_label.value = time_text
+        return True
 
     def seek_position(self, e):
         """跳转到指定位置"""
@@ -0,0 +1,143 @@
+"""页面加载框架：先显示骨架，后台加载数据后再填充内容"""
+
+import threading
+import time
+from logging import info, error
+from typing import Any
+
+import flet as ft
+
+
+class LoadCancelled(Exception):
+    """页面已关闭，加载被取消"""
+
+
+class LoadingView(ft.View):
+    """后台加载数据的页面基类
+
+    构造时只显示skeleton()，路由把页面加入page.views后调用start()。
+    加载分为三个阶段，在后台线程中依次执行并分别计时：
+      fetch()  网络请求等耗时操作，返回数据
+      render() 根据数据创建控件，完成后刷新页面
+      finish() 首屏显示后的后续加载（可选）
+    离开页面时路由调用cancel()，各阶段之间以及check_cancelled()处停止加载；
+    未加载完成的页面再次显示时，start()重新开始加载。
+
+    路由会缓存页面，再次显示时调用activate()；refresh_on_show为True的页面
+    每次显示都重新加载数据。
+    """
+
+    refresh_on_show = False  # 每次显示时是否重新加载
+
+    def __init__(self):
+        super().__init__()
+        self.timings: dict[str, float] = {}  # 各阶段耗时（秒）
+        self.loaded = False  # 是否已完整加载
+        self._cancelled = threading.Event()
+        self._thread: threading.Thread | None = None  # 正在执行的加载线程
+        self._lock = threading.Lock()
+        self.controls = self.skeleton()
+
+    def skeleton(self) -> list[ft.Control]:
+        """数据到达前显示的内容"""
+        return [
+            ft.Column(
+                controls=[
+                    ft.ProgressRing(width=24, height=24, stroke_width=2),
+                    ft.Text("加载中...", size=20),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=20,
+            )
+        ]
+
+    def fetch(self) -> Any:
+        """获取数据，在后台线程中执行"""
+        return None
+
+    def render(self, data: Any) -> None:
+        """根据数据更新控件"""
+
+    def finish(self, data: Any) -> None:
+        """首屏显示后继续加载的内容"""
+
+    def render_error(self, e: Exception) -> None:
+        """加载失败时显示的内容"""
+        self.controls = [ft.Text(f"加载失败: {str(e)}", size=20, color="red")]
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """页面已关闭时中止加载"""
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+
+    def start(self):
+        """开始后台加载，已加载完成或正在加载时不重复加载"""
+        with self._lock:
+            if self.loaded:
+                return
+            self._cancelled.clear()
+            if self._thread is not None:
+                return  # 取消尚未生效，继续原来的加载
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def cancel(self):
+        """取消未完成的加载"""
+        self._cancelled.set()
+
+    def reload(self):
+        """重新加载数据"""
+        with self._lock:
+            self.loaded = False
+        self.start()
+
+    def activate(self):
+        """页面（再次）显示时调用，用于重新注册回调等"""
+
+    def _phase(self, name: str, func, *args):
+        self.check_cancelled()
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def _run(self):
+        """加载线程，被取消后若页面又重新显示则从头加载"""
+        while True:
+            self.timings = {}
+            interrupted = self._load()
+            with self._lock:
+                if not (interrupted and not self.cancelled):
+                    self._thread = None
+                    return
+
+    def _load(self) -> bool:
+        """执行一次加载，被取消时返回True"""
+        try:
+            data = self._phase("fetch", self.fetch)
+            self._phase("render", self.render, data)
+            self._phase("update", self.update_page)
+            self._phase("finish", self.finish, data)
+        except LoadCancelled:
+            info(f"页面加载已取消: {self.route}")
+            return True
+        except Exception as e:
+            error(f"页面加载失败: {self.route}: {str(e)}")
+            if not self.cancelled:
+                self.render_error(e)
+                self.update_page()
+            return False
+        self.loaded = True
+        info(f"页面加载完成: {self.route} " + " ".join(
+            f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.timings.items()))
+        return False
+
+    def update_page(self):
+        """把控件的变化发送到前端"""
+        if self.page and not self.cancelled:
+            self.page.update()
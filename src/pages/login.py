@@ -5,11 +5,14 @@ import models
 import qrcode
 import io
 import base64
+from pages.loading import LoadingView
 
 
-class LoginPage(ft.View):
+class LoginPage(LoadingView):
     """登录页面"""
 
+    refresh_on_show = True  # 每次进入获取新的二维码
+
     def __init__(self, globals_var: models.Globals):
         super().__init__()
 
@@ -25,16 +28,13 @@ class LoginPage(ft.View):
             title=ft.Text("登录")
         )
 
-        self.load_view()  # 加载页面内容
+    def fetch(self):
+        """获取二维码登录URL"""
+        return self.api.login_qr_create()
 
-    
-    def load_view(self):
+    def render(self, qr_code):
         """加载页面内容"""
-        import qrcode
-        import io
-        import base64
-
-        self.qr_code = self.api.login_qr_create()  # 获取二维码登录URL
+        self.qr_code = qr_code
 
         # 获取二维码
         qr = qrcode.QRCode(version=1, box_size=10, border=2)
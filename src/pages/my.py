@@ -2,11 +2,14 @@
 
 import flet as ft
 import models
+from pages.loading import LoadingView
 
 
-class MyPage(ft.View):
+class MyPage(LoadingView):
     """我的页面"""
 
+    refresh_on_show = True  # 登录状态可能在其他页面改变
+
     def __init__(self, globals_var: models.Globals):
         super().__init__()
 
@@ -35,18 +38,15 @@ class MyPage(ft.View):
             on_change=self.nav_change
         )
 
-        # 主要内容区域
-        self.controls = [
-            ft.Text("正在加载", size=20),
-        ]
+    def fetch(self):
+        """获取登录状态"""
+        return self.api.login_status()
 
-        self.load_view()  # 加载页面内容
-    
-    def load_view(self):
+    def render(self, login_info):
         """加载页面"""
-        self.controls.clear()
+        self.controls = []
 
-        if self.api.login_status().account:
+        if login_info.account:
             self.is_login = True
             self.controls.append(
                 ft.ElevatedButton(
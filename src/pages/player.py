@@ -1,19 +1,28 @@
 """音乐播放页面"""
 
 import flet as ft
+import api
 import models
+from image_cache import PLAYER_COVER_SIZE
+from pages.loading import LoadingView
 
 
-class PlayerPage(ft.View):
+class PlayerPage(LoadingView):
     """音乐播放页面"""
 
+    refresh_on_show = True  # 每次显示时切换到播放队列中选中的歌曲
+
     def __init__(self, globals_var: models.Globals):
         super().__init__()
 
         self.page = globals_var.page
         self.api = globals_var.music_api
         self.music_playing = globals_var.music_playing
+        self.images = globals_var.images
+        self.lyrics = globals_var.lyrics
         self.globals = globals_var
+        self.timeline: api.LyricTimeline | None = None  # 当前歌曲的歌词
+        self._lyric_index = -1  # 当前显示的歌词行
         self.route = f"/player"
         self.adaptive = True
         self.can_pop = True
@@ -24,18 +33,31 @@ class PlayerPage(ft.View):
             title=ft.Text(f"正在加载"),
         )
 
-        # 加载数据和视图
+        # 先用当前歌曲信息创建视图，切换歌曲在后台进行
         self.load_view()
 
-        # 注册回调
+    def activate(self):
+        """注册回调并同步当前歌曲信息"""
         self.music_playing.add_position_callback(self.update_position)
         self.music_playing.add_state_callback(self.update_state)
+        self.music_playing.add_song_callback(self.update_song)
+        self.song_name_label.value = self.music_playing.song_name
+        self.artists_label.value = self.format_artists()
+        self.show_cover()
+        self.show_lyrics()
+        self.playing_button.icon = (
+            ft.Icons.PAUSE_ROUNDED
+            if self.music_playing.playing_state
+            else ft.Icons.PLAY_ARROW_ROUNDED
+        )
 
 
-    def load_view(self) -> None:
-        """加载视图"""
+    def fetch(self):
+        """切换到播放队列中选中的歌曲，完成后通过update_song更新界面"""
         self.globals.refresh_music_playing()
 
+    def load_view(self) -> None:
+        """加载视图"""
         self.appbar = ft.AppBar()
 
         # 进度条
@@ -83,6 +105,43 @@ class PlayerPage(ft.View):
             spacing=20,
         )
 
+        # 歌曲信息，切换歌曲时原地更新
+        self.song_name_label = ft.Text(
+            self.music_playing.song_name,
+            size=24,
+            weight=ft.FontWeight.BOLD,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self.artists_label = ft.Text(
+            self.format_artists(),
+            size=16,
+            color=ft.Colors.WHITE60,
+            text_align=ft.TextAlign.CENTER,
+        )
+        # 当前歌词、翻译和下一行歌词
+        self.lyric_label = ft.Text(
+            size=18,
+            weight=ft.FontWeight.BOLD,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self.translation_label = ft.Text(
+            size=14,
+            color=ft.Colors.WHITE70,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self.next_lyric_label = ft.Text(
+            size=14,
+            color=ft.Colors.WHITE38,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self.cover_image = ft.Image(
+            width=PLAYER_COVER_SIZE,
+            height=PLAYER_COVER_SIZE,
+            border_radius=ft.border_radius.all(10),
+            fit=ft.ImageFit.COVER,
+        )
+        self.show_cover()
+
         # 构建主界面
         self.controls = [
             ft.Container(
@@ -92,23 +151,8 @@ class PlayerPage(ft.View):
                         ft.Container(
                             content=ft.Column(
                                 controls=[
-                                    ft.Text(
-                                        self.music_playing.song_name,
-                                        size=24,
-                                        weight=ft.FontWeight.BOLD,
-                                        text_align=ft.TextAlign.CENTER,
-                                    ),
-                                    ft.Text(
-                                        " / ".join(
-                                            [
-                                                artist.name
-                                                for artist in self.music_playing.artists
-                                            ]
-                                        ),
-                                        size=16,
-                                        color=ft.Colors.WHITE60,
-                                        text_align=ft.TextAlign.CENTER,
-                                    ),
+                                    self.song_name_label,
+                                    self.artists_label,
                                 ],
                                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                                 spacing=5,
@@ -117,13 +161,7 @@ class PlayerPage(ft.View):
                         ),
                         # 封面图片
                         ft.Container(
-                            content=ft.Image(
-                                src=self.music_playing.song_pic,
-                                width=300,
-                                height=300,
-                                border_radius=ft.border_radius.all(10),
-                                fit=ft.ImageFit.COVER,
-                            ),
+                            content=self.cover_image,
                             margin=ft.margin.only(bottom=40),
                             shadow=ft.BoxShadow(
                                 spread_radius=1,
@@ -131,6 +169,19 @@ class PlayerPage(ft.View):
                                 # color=ft.Colors.BLACK.with_opacity(0.5),
                             ),
                         ),
+                        # 歌词
+                        ft.Container(
+                            content=ft.Column(
+                                controls=[
+                                    self.lyric_label,
+                                    self.translation_label,
+                                    self.next_lyric_label,
+                                ],
+                                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                                spacing=5,
+                            ),
+                            margin=ft.margin.only(bottom=20),
+                        ),
                         # 进度条和时间
                         ft.Container(
                             content=ft.Column(
@@ -156,30 +207,89 @@ class PlayerPage(ft.View):
         ]
 
 
+    def show_cover(self):
+        """显示当前歌曲的封面"""
+        self.images.show(
+            self.cover_image, self.music_playing.song_pic,
+            PLAYER_COVER_SIZE, PLAYER_COVER_SIZE)
+
+    def show_lyrics(self):
+        """清空歌词并在后台加载当前歌曲的歌词"""
+        self.timeline = None
+        self._lyric_index = -1
+        self.lyric_label.value = ""
+        self.translation_label.value = ""
+        self.next_lyric_label.value = ""
+        if self.music_playing.song_id is not None:
+            self.lyrics.load(self.music_playing.song_id, self.lyrics_loaded)
+
+    def lyrics_loaded(self, song_id: int, timeline: api.LyricTimeline):
+        """歌词加载完成（在加载线程中调用）"""
+        if song_id != self.music_playing.song_id:
+            return  # 已切换到其他歌曲
+        self.timeline = timeline
+        self._lyric_index = -2  # 强制刷新
+        if self.update_lyric(self.music_playing.current_time):
+            self.update_page()
+
+    def update_lyric(self, position: int) -> bool:
+        """根据播放位置更新歌词，返回显示内容是否变化
+
+        每次进度回调都会调用，只做一次二分查找，歌词行变化时才修改控件。
+        """
+        timeline = self.timeline
+        if not timeline:
+            return False
+        index = timeline.index_at(position)
+        if index == self._lyric_index:
+            return False
+        self._lyric_index = index
+        self.lyric_label.value = timeline.line(index)
+        self.translation_label.value = timeline.translation(index)
+        self.next_lyric_label.value = timeline.line(index + 1)
+        return True
+
+    def format_artists(self) -> str:
+        """格式化歌手列表"""
+        return " / ".join(artist.name for artist in self.music_playing.artists)
+
+    def update_song(self, song_id):
+        """切换歌曲后原地更新歌曲信息，无需重建页面"""
+        self.song_name_label.value = self.music_playing.song_name
+        self.artists_label.value = self.format_artists()
+        self.show_cover()
+        self.show_lyrics()
+        self.progress_bar.value = 0
+        self.time_label.value = "00:00 / 00:00"
+        self.update()
+
     def format_time(self, seconds: float) -> str:
         """格式化时间显示"""
         minutes = int(seconds // 60)
         seconds = int(seconds % 60)
         return f"{minutes:02d}:{seconds:02d}"
 
-    def update_position(self, position):
-        """更新进度条和时间显示"""
+    def update_position(self, position) -> bool:
+        """更新进度条和时间显示，返回显示内容是否变化（由调度器统一刷新页面）"""
+        lyric_changed = self.update_lyric(position)
         duration = self.music_playing.duration
 
-        if duration > 0:  # type: ignore
-            # 更新进度条
-            self.progress_bar.value = (position / duration) * 100 \
-                if (position / duration) * 100 <= self.progress_bar.max \
-                else self.progress_bar.max   # type: ignore
-            # 更新时间显示
-            self.time_label.value = f"{self.format_time(position/1000)} / {self.format_time(duration/1000)}"
-            self.update()
+        if not duration or duration <= 0:
+            return lyric_changed
+        time_text = f"{self.format_time(position/1000)} / {self.format_time(duration/1000)}"
+        if time_text == self.time_label.value:
+            return lyric_changed  # 显示精度为秒，未变化时不刷新
+        # 更新进度条
+        self.progress_bar.value = min((position / duration) * 100, self.progress_bar.max)  # type: ignore
+        # 更新时间显示
+        self.time_label.value = time_text
+        return True
 
     def seek_position(self, e):
         """跳转到指定位置"""
         duration = self.music_playing.duration
         position = (float(e.control.value) * duration) / 100  # type: ignore
-        print(position)
+        models.debug(f"seek position: {position}")
         self.music_playing.seek(int(position))
 
     def update_state(self, state):
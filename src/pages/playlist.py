@@ -1,9 +1,13 @@
+from contextlib import closing
+from logging import warning
 import flet as ft
-from api import MusicApi
+from api import ApiError, MusicApi
 import models
+from pages.track_list import TrackListView
+from pages.loading import LoadingView
 
 
-class PlaylistPage(ft.View):
+class PlaylistPage(LoadingView):
     def __init__(self, playlist_id: int, globals_var: models.Globals):
         super().__init__()
 
@@ -21,43 +25,53 @@ class PlaylistPage(ft.View):
             title=ft.Text(f"正在加载 {playlist_id}"),
         )
 
-        self.load_view()
+    def fetch(self):
+        """获取歌单信息和前几首歌曲"""
+        # 以列式表保存歌曲，与播放队列共享
+        stream = self.api.playlist_stream(self.playlist_id, as_table=True)
+        try:
+            self.playlist = next(stream)
+        except ApiError as e:
+            # 请求失败（如离线）时打开曲库中保存的歌单
+            playlist = self.globals.library.playlist(self.playlist_id)
+            if playlist is None:
+                raise
+            warning(f"歌单加载失败，使用本地曲库: {self.playlist_id}: {str(e)}")
+            self.playlist = playlist
+            return None
+        return stream
 
-    def load_view(self) -> None:
-        """加载歌单"""
-        self.playlist = self.api.playlist_detail(self.playlist_id)
+    def render(self, stream) -> None:
+        """显示歌单：第一次请求返回后立即显示前几首"""
         self.appbar = ft.AppBar(
             title=ft.Text(f"{self.playlist.name}", no_wrap=True),
         )
 
-        results_list = ft.ListView(
-            expand=1,
-            spacing=10,
-            padding=10,
-            controls=[
-                ft.ListTile(
-                    title=ft.Text(song.name),
-                    subtitle=ft.Text(
-                        " / ".join([artist.name for artist in song.artists]),
-                        size=12,
-                        color=ft.Colors.BLACK54,
-                    ),
-                    trailing=ft.Icon(ft.Icons.PLAY_ARROW),
-                    on_click=lambda e, index=index: self.play_music(index),
-                )
-                for (index, song) in enumerate(self.playlist.tracks)
-            ],
-        )
+        self.results_list = TrackListView(self.playlist.tracks, self.play_music)
         self.controls = [
             ft.Column(
                 controls=[
                     ft.Divider(height=1),
-                    results_list,
+                    self.results_list,
                 ],
                 expand=True,
             )
         ]
 
+    def finish(self, stream):
+        """后台分批补全歌单剩余的歌曲，完成后记入本地曲库
+
+        歌曲表可能已作为播放队列共享，TrackTable逐行加锁发布，
+        界面和预取线程读取时不会看到未写完的行。
+        """
+        if stream is None:
+            return
+        with closing(stream):
+            for playlist in stream:
+                self.check_cancelled()
+                self.results_list.refresh()
+        self.globals.library.add_playlist(self.playlist)
+
     def play_music(self, playlist_index: int):
         self.globals.music_playing_list = self.playlist.tracks
         self.globals.music_playing_index = playlist_index
@@ -1,10 +1,13 @@
+import threading
+
 import flet as ft
-from api import MusicApi
 import models
+from pages.track_list import TrackListView
+from pages.loading import LoadingView
 
 
 class SearchPage(ft.View):
-    """搜索页面"""
+    """搜索页面，输入时显示搜索建议和歌曲预览"""
 
     def __init__(self, globals_var: models.Globals, default_query: str = ""):
         super().__init__()
@@ -14,6 +17,9 @@ class SearchPage(ft.View):
         self.padding = ft.padding.all(20)
         self.can_pop = True
         self.page = globals_var.page
+        self.globals = globals_var
+        self.search = globals_var.search
+        self.preview_songs: list = []
 
         self.search_field = ft.TextField(
             hint_text="搜索",
@@ -22,8 +28,14 @@ class SearchPage(ft.View):
             border_width=1,
             border=ft.InputBorder.UNDERLINE,
             value=default_query,
+            on_change=self.input_change,
+            on_submit=self.submit_search,
         )
+        self.suggestion_list = ft.Column(spacing=0)
+        self.preview_list = ft.Column(spacing=0)
         self.load_view()
+        if default_query:
+            self.search.type_ahead(default_query, self.show_suggestions)
 
     def load_view(self) -> None:
         self.appbar = ft.AppBar(
@@ -38,23 +50,78 @@ class SearchPage(ft.View):
                 alignment=ft.MainAxisAlignment.START,
             )
         )
+        self.controls = [
+            ft.Column(
+                controls=[self.suggestion_list, self.preview_list],
+                scroll=ft.ScrollMode.AUTO,
+                expand=True,
+            )
+        ]
+
+    def input_change(self, e):
+        """输入变化，停止输入后获取搜索建议"""
+        self.search.type_ahead(self.search_field.value or "", self.show_suggestions)
+
+    def show_suggestions(self, keywords: str, suggestions: list[str], songs: list):
+        """显示搜索建议和歌曲预览（在搜索线程中调用）"""
+        if self not in self.page.views:  # type: ignore
+            return  # 页面已关闭
+        self.suggestion_list.controls = [
+            ft.ListTile(
+                leading=ft.Icon(ft.Icons.SEARCH),
+                title=ft.Text(suggestion),
+                on_click=lambda e, suggestion=suggestion: self.go_result(suggestion),
+            )
+            for suggestion in suggestions or [keywords]
+        ]
+        self.preview_songs = songs
+        self.preview_list.controls = [
+            ft.ListTile(
+                title=ft.Text(song.name),
+                subtitle=ft.Text(
+                    " / ".join(artist.name for artist in song.artists),
+                    size=12,
+                    color=ft.Colors.BLACK54,
+                ),
+                trailing=ft.Icon(ft.Icons.PLAY_ARROW),
+                on_click=lambda e, index=index: self.play_music(index),
+            )
+            for index, song in enumerate(songs)
+        ]
+        self.update()
 
     def submit_search(self, e):
-        if self.search_field.value == "":
+        if not self.search_field.value:
             return
-        self.page.go(f"/search_result/{self.search_field.value}")  # type: ignore
+        self.go_result(self.search_field.value)
+
+    def go_result(self, keywords: str):
+        """前往搜索结果页"""
+        self.search.cancel()
+        self.page.go(f"/search_result/{keywords}")  # type: ignore
+
+    def play_music(self, index: int):
+        """播放预览中的歌曲"""
+        self.search.cancel()
+        self.globals.music_playing_list = list(self.preview_songs)
+        self.globals.music_playing_index = index
+        self.page.go(f"/player")  # type: ignore
 
 
-class SearchResultPage(ft.View):
+class SearchResultPage(LoadingView):
     """搜索结果展示页面"""
 
     def __init__(self, search_query: str, globals_var: models.Globals):
         super().__init__()
 
         self.api = globals_var.music_api
+        self.search = globals_var.search
         self.page = globals_var.page
         self.globals = globals_var
         self.search_query = search_query
+        self.songs: list = []
+        self._loading_more = threading.Lock()
+        self._exhausted = False  # 已加载全部结果
         self.route = f"/search_result/{search_query}"
         self.adaptive = True
         self.padding = ft.padding.all(20)
@@ -80,62 +147,58 @@ class SearchResultPage(ft.View):
             )
         )
 
-        # Initialize controls with loading indicator
-        self.controls = [
-            ft.Text("搜索中...", size=20),
-        ]
+    def skeleton(self) -> list[ft.Control]:
+        return [ft.Text("搜索中...", size=20)]
 
-        # Load search results
-        self.load_view()
+    def fetch(self):
+        """获取第一页搜索结果，通常已在输入时缓存"""
+        return self.search.search(self.search_query)
 
-    def load_view(self):
+    def render(self, songs):
         """加载搜索结果"""
-        if not self.api:
-            self.controls = [ft.Text("API未初始化", size=20, color="red")]
+        # 复制一份，加载更多时追加不影响缓存
+        self.songs = list(songs)
+        self._exhausted = len(songs) < self.search.page_size
+
+        # 如果没有结果
+        if not self.songs:
+            self.controls = [ft.Text("没有找到相关歌曲", size=20)]
             return
 
-        try:
-            # 获取搜索结果
-            self.songs = self.api.search_song(self.search_query)
-
-            # 如果没有结果
-            if not self.songs:
-                self.controls = [ft.Text("没有找到相关歌曲", size=20)]
-                return
-
-            # 创建搜索结果列表
-            results_list = ft.ListView(
-                expand=1,
-                spacing=10,
-                padding=10,
+        # 创建搜索结果列表
+        self.results_list = TrackListView(
+            self.songs, self.play_music, on_end_reached=self.load_more)
+
+        # 更新页面内容
+        self.controls = [
+            ft.Column(
                 controls=[
-                    ft.ListTile(
-                        title=ft.Text(song.name),
-                        subtitle=ft.Text(
-                            " / ".join([artist.name for artist in song.artists]),
-                            size=12,
-                            color=ft.Colors.BLACK54,
-                        ),
-                        trailing=ft.Icon(ft.Icons.PLAY_ARROW),
-                        on_click=lambda e, song=song, index=index: self.play_music(index),
-                    )
-                    for (index, song) in enumerate(self.songs)
+                    ft.Divider(height=1),
+                    self.results_list,
                 ],
+                expand=True,
             )
+        ]
 
-            # 更新页面内容
-            self.controls = [
-                ft.Column(
-                    controls=[
-                        ft.Divider(height=1),
-                        results_list,
-                    ],
-                    expand=True,
-                )
-            ]
+    def load_more(self):
+        """滚动到底部时加载下一页，下一页通常已预取"""
+        if self._exhausted or not self._loading_more.acquire(blocking=False):
+            return
+        threading.Thread(target=self._load_more, daemon=True).start()
 
+    def _load_more(self):
+        try:
+            songs = self.search.search(self.search_query, offset=len(self.songs))
+            self._exhausted = len(songs) < self.search.page_size
+            self.songs.extend(songs)
+            self.results_list.refresh()
         except Exception as e:
-            self.controls = [ft.Text(f"搜索失败: {str(e)}", size=20, color="red")]
+            models.error(f"加载更多搜索结果失败: {str(e)}")
+        finally:
+            self._loading_more.release()
+
+    def render_error(self, e: Exception):
+        self.controls = [ft.Text(f"搜索失败: {str(e)}", size=20, color="red")]
     
     def play_music(self, playlist_index: int):
         """播放歌曲"""
@@ -0,0 +1,121 @@
+"""虚拟化的歌曲列表：只为可见范围内的歌曲创建控件"""
+
+import math
+import threading
+from typing import Callable, Sequence
+
+import flet as ft
+import api
+
+ROW_HEIGHT = 66  # 每行高度（含间距），固定高度便于根据滚动位置计算行号
+OVERSCAN = 10  # 可见范围上下额外保留的行数
+INITIAL_ROWS = 30  # 尚未收到滚动事件时创建的行数
+
+
+class TrackListView(ft.ListView):
+    """歌曲列表
+
+    控件池中只保留可见窗口附近的列表项，窗口上下用占位容器撑开滚动范围；
+    滚动时按行号把离开窗口的列表项重新绑定到新进入窗口的歌曲，不再创建新控件。
+    所有列表项共用一个点击处理函数，通过data区分行号。
+    窗口到达列表末尾时调用on_end_reached，用于分页加载。
+    """
+
+    def __init__(self, tracks: Sequence[api.SongInfo], on_play: Callable[[int], None],
+                 on_end_reached: Callable[[], None] | None = None):
+        super().__init__(expand=1, spacing=0, padding=10)
+        self.tracks = tracks
+        self.on_play = on_play
+        self.on_end_reached = on_end_reached
+        self.on_scroll = self.handle_scroll
+        self.on_scroll_interval = 100
+
+        self._lock = threading.Lock()
+        self._tiles: dict[int, ft.Container] = {}  # 行号 -> 列表项
+        self._spare: list[ft.Container] = []  # 可复用的列表项
+        self._start = 0
+        self._end = 0
+        self._visible_rows = INITIAL_ROWS
+        self._first_visible = 0
+        self._top = ft.Container(height=0)
+        self._bottom = ft.Container(height=0)
+        self._render(0, min(len(tracks), INITIAL_ROWS))
+
+    def _new_tile(self) -> ft.Container:
+        return ft.Container(
+            height=ROW_HEIGHT,
+            content=ft.ListTile(
+                title=ft.Text(),
+                subtitle=ft.Text(size=12, color=ft.Colors.BLACK54),
+                trailing=ft.Icon(ft.Icons.PLAY_ARROW),
+                on_click=self.handle_click,
+            ),
+        )
+
+    def _bind(self, tile: ft.Container, row: int):
+        """将列表项绑定到指定行"""
+        song = self.tracks[row]
+        list_tile: ft.ListTile = tile.content  # type: ignore
+        list_tile.title.value = song.name  # type: ignore
+        list_tile.subtitle.value = " / ".join(  # type: ignore
+            artist.name for artist in song.artists
+        )
+        list_tile.data = row
+
+    def _render(self, start: int, end: int):
+        """只保留[start, end)范围内的列表项"""
+        for row in [row for row in self._tiles if not start <= row < end]:
+            self._spare.append(self._tiles.pop(row))
+        for row in range(start, end):
+            if row not in self._tiles:
+                tile = self._spare.pop() if self._spare else self._new_tile()
+                self._bind(tile, row)
+                self._tiles[row] = tile
+        self._start, self._end = start, end
+        self._top.height = start * ROW_HEIGHT
+        self._bottom.height = (len(self.tracks) - end) * ROW_HEIGHT
+        self.controls = [self._top] + [self._tiles[row] for row in range(start, end)] + [self._bottom]
+
+    def _window(self, first_visible: int) -> tuple[int, int]:
+        total = len(self.tracks)
+        start = max(0, min(first_visible, total) - OVERSCAN)
+        end = min(total, first_visible + self._visible_rows + OVERSCAN)
+        return start, end
+
+    def handle_scroll(self, e: ft.OnScrollEvent):
+        """根据滚动位置移动窗口"""
+        if e.viewport_dimension:
+            self._visible_rows = math.ceil(e.viewport_dimension / ROW_HEIGHT)
+        first_visible = max(0, int((e.pixels or 0) // ROW_HEIGHT))
+        with self._lock:
+            self._first_visible = first_visible
+            start, end = self._window(first_visible)
+            changed = (start, end) != (self._start, self._end)
+            if changed:
+                self._render(start, end)
+        if end >= len(self.tracks) and self.on_end_reached is not None:
+            self.on_end_reached()
+        if changed:
+            self.update()
+
+    def handle_click(self, e):
+        self.on_play(e.control.data)
+
+    def refresh(self):
+        """歌曲列表增长后更新占位和窗口"""
+        with self._lock:
+            start, end = self._window(self._first_visible)
+            self._render(start, end)
+        if self.page:
+            self.update()
+
+    def set_tracks(self, tracks: Sequence[api.SongInfo]):
+        """替换歌曲列表，已创建的列表项被复用"""
+        with self._lock:
+            self.tracks = tracks
+            self._first_visible = 0
+            self._spare.extend(self._tiles.values())
+            self._tiles.clear()
+            self._render(0, min(len(tracks), max(INITIAL_ROWS, self._visible_rows + OVERSCAN)))
+        if self.page:
+            self.update()
@@ -1,55 +1,173 @@
-
 import threading
-import queue
 import time
 import flet_audio as fa
 from typing import Optional, Callable
 from dataclasses import dataclass, field
 
+FADE_STEPS = 20  # 淡入淡出的音量调整次数
+
+# 可合并的命令分组，同组只执行最新的一条
+COMMAND_GROUPS = {
+    "play": "transport",
+    "pause": "transport",
+    "resume": "transport",
+    "seek": "seek",
+    "set_song": "set_song",
+    "preload": "preload",
+}
+# 只对当前歌曲有效的命令，之后若有新的set_song则丢弃
+SONG_SCOPED = {"play", "pause", "resume", "seek", "advance"}
+
 @dataclass
 class MusicCommand:
     """音乐播放命令"""
-    action: str  # play, pause, resume, seek, set_song
+    action: str  # play, pause, resume, seek, set_song, preload, advance, stop
     data: dict = field(default_factory=dict)  # 命令相关的数据
+    created: float = field(default_factory=time.perf_counter)  # 入队时间
+
+
+@dataclass
+class CommandStats:
+    """单类命令的处理统计"""
+    handled: int = 0
+    dropped: int = 0
+    total_latency: float = 0.0  # 入队到处理完成的总耗时（秒）
+    max_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.handled if self.handled else 0.0
+
+
+class CommandScheduler:
+    """播放命令调度器
+
+    命令到达时立即唤醒播放线程；线程每次取出所有积压的命令并合并：
+    seek只保留最新一次，play/pause/resume只保留最后的状态，
+    被新的set_song取代的歌曲及其播放控制命令直接丢弃。
+    """
+
+    def __init__(self):
+        self._pending: list[MusicCommand] = []
+        self._cond = threading.Condition()
+        self.stats: dict[str, CommandStats] = {}
+
+    def put(self, cmd: MusicCommand):
+        """添加命令并唤醒播放线程"""
+        with self._cond:
+            self._pending.append(cmd)
+            self._cond.notify()
+
+    def take(self) -> list[MusicCommand]:
+        """等待并取出合并后的命令"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending)
+            batch, self._pending = self._pending, []
+        return self._coalesce(batch)
+
+    def _coalesce(self, batch: list[MusicCommand]) -> list[MusicCommand]:
+        """合并一批命令，保持剩余命令的先后顺序"""
+        for index, cmd in enumerate(batch):
+            if cmd.action == "stop":
+                self._drop(batch[:index] + batch[index + 1:])
+                return [cmd]
+
+        last_song = max(
+            (i for i, cmd in enumerate(batch) if cmd.action == "set_song"), default=-1)
+        latest: dict[str, int] = {}
+        kept: list[int] = []
+        for index, cmd in enumerate(batch):
+            if index < last_song and cmd.action in SONG_SCOPED:
+                continue
+            group = COMMAND_GROUPS.get(cmd.action)
+            if group is None:
+                kept.append(index)
+            else:
+                latest[group] = index
+        kept.extend(latest.values())
+        kept.sort()
+        result = [batch[i] for i in kept]
+        if len(result) < len(batch):
+            kept_set = set(kept)
+            self._drop([cmd for i, cmd in enumerate(batch) if i not in kept_set])
+        return result
+
+    def _drop(self, commands: list[MusicCommand]):
+        for cmd in commands:
+            self.stats.setdefault(cmd.action, CommandStats()).dropped += 1
+
+    def record(self, cmd: MusicCommand):
+        """记录命令处理耗时"""
+        latency = time.perf_counter() - cmd.created
+        stats = self.stats.setdefault(cmd.action, CommandStats())
+        stats.handled += 1
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
 
 class MusicPlayerThread(threading.Thread):
-    """音乐播放线程"""
-    
-    def __init__(self, page=None):
+    """音乐播放线程
+
+    使用两个音频控件轮流播放：当前歌曲播放时，下一首预先加载到另一个控件，
+    播放结束时直接切换（无缝），或在结束前crossfade毫秒开始淡入淡出。
+    """
+
+    def __init__(self, page=None, crossfade: int = 0):
         super().__init__(daemon=True)
         self.page = page
-        self._command_queue = queue.Queue()
+        self._commands = CommandScheduler()
         self._running = True
         self._position_callbacks = []
         self._state_callbacks = []
-        
+        self._track_callbacks = []
+        self.crossfade = crossfade  # 淡入淡出时长（毫秒），0为无缝切换
+
         # 播放器状态
         self._current_song_id = None
         self._playing_state = False
         self._current_position = 0
         self._duration = 0
-        
-        # 创建音频播放器
-        self._audio_player = fa.Audio(
+
+        # 两个音频播放器槽位
+        self._lock = threading.RLock()
+        self._slots = [self._create_slot(0), self._create_slot(1)]
+        self._slot_songs: list[Optional[int]] = [None, None]  # 槽位中的歌曲ID
+        self._slot_durations = [0, 0]  # 槽位加载完成后的时长，0表示未就绪
+        self._active = 0  # 当前播放的槽位
+        self._fading = False  # 正在淡入淡出
+        # 已发出advance命令但尚未处理，避免重复发出；advance被新的set_song取代时由_set_song清除
+        self._advance_pending = False
+
+        # 如果提供了页面实例，将播放器添加到页面的overlay，切换页面时不会被移除
+        if page:
+            page.overlay.extend(self._slots)
+            page.update()
+
+    def _create_slot(self, index: int) -> fa.Audio:
+        """创建一个音频播放器槽位"""
+        return fa.Audio(
             volume=1,
-            on_loaded=self._on_audio_loaded,
-            on_position_changed=self._update_position,
-            on_state_changed=self._update_state,
+            on_loaded=lambda e: self._on_audio_loaded(index),
+            on_position_changed=lambda e: self._update_position(index, e),
+            on_state_changed=lambda e: self._update_state(index, e),
         )
-        
-        # 如果提供了页面实例，将播放器添加到页面
-        if page:
-            page.add(self._audio_player)
-    
+
+    @property
+    def _audio_player(self) -> fa.Audio:
+        """当前播放的音频控件"""
+        return self._slots[self._active]
+
+    @property
+    def _standby(self) -> int:
+        """预加载槽位"""
+        return 1 - self._active
+
     def run(self):
         """线程主循环"""
         while self._running:
-            try:
-                cmd = self._command_queue.get(timeout=0.1)
+            for cmd in self._commands.take():
                 self._handle_command(cmd)
-            except queue.Empty:
-                continue
-    
+                self._commands.record(cmd)
+
     def _handle_command(self, cmd: MusicCommand):
         """处理播放命令"""
         if cmd.action == "play":
@@ -62,92 +180,232 @@ class MusicPlayerThread(threading.Thread):
             self._audio_player.seek(cmd.data["position"])
         elif cmd.action == "set_song":
             self._set_song(cmd.data)
+        elif cmd.action == "preload":
+            self._preload(cmd.data)
+        elif cmd.action == "advance":
+            self._advance(cmd.data.get("fade", False))
         elif cmd.action == "stop":
             self._running = False
-            self._audio_player.release()
-    
+            for slot in self._slots:
+                slot.release()
+
+    def _load_slot(self, index: int, song_data: dict):
+        """将歌曲加载到指定槽位"""
+        player = self._slots[index]
+        player.release()
+        self._slot_songs[index] = song_data["id"]
+        self._slot_durations[index] = 0
+        player.src_base64 = None
+        player.src = song_data["src"]  # 本地音频代理地址
+        player.volume = 1
+        player.update()
+
+    def _stop_fade(self):
+        """中断淡入淡出，停止正在淡出的歌曲"""
+        if self._fading:
+            self._slots[self._standby].release()
+            self._slot_songs[self._standby] = None
+            self._slot_durations[self._standby] = 0
+            self._fading = False
+
     def _set_song(self, song_data: dict):
         """设置当前播放的歌曲"""
-        self._audio_player.release()
-        self._current_song_id = song_data["id"]
-        self._audio_player.src_base64 = song_data["src"]
-        self.page.go("/reload")  # type:ignore  # 刷新页面以更新播放器状态
-    
-    def _on_audio_loaded(self, e):
+        with self._lock:
+            self._advance_pending = False
+            self._stop_fade()
+            if self._slot_songs[self._standby] == song_data["id"]:
+                # 下一首已预加载，直接切换
+                self._switch_to(self._standby)
+                return
+            self._current_song_id = song_data["id"]
+            self._current_position = 0
+            self._duration = 0
+            self._load_slot(self._active, song_data)
+
+    def _preload(self, song_data: dict):
+        """预加载下一首歌曲到空闲槽位"""
+        with self._lock:
+            if song_data["id"] in self._slot_songs:
+                return
+            self._stop_fade()
+            self._load_slot(self._standby, song_data)
+
+    def _advance(self, fade: bool):
+        """当前歌曲结束，切换到预加载的歌曲"""
+        with self._lock:
+            self._advance_pending = False
+            if self._slot_songs[self._standby] is None:
+                return
+            self._switch_to(self._standby, fade)
+            song_id = self._current_song_id
+        for callback in self._track_callbacks:
+            callback(song_id)
+
+    def _switch_to(self, index: int, fade: bool = False):
+        """切换当前槽位，fade为True时淡入淡出"""
+        old = self._active
+        self._active = index
+        self._current_song_id = self._slot_songs[index]
+        self._duration = self._slot_durations[index]
+        self._current_position = 0
+        new_player = self._slots[index]
+        old_player = self._slots[old]
+
+        if fade and self.crossfade > 0:
+            self._fading = True
+            new_player.volume = 0
+            new_player.update()
+            new_player.play()
+            threading.Thread(
+                target=self._fade, args=(old, index), daemon=True).start()
+        else:
+            new_player.volume = 1
+            new_player.update()
+            new_player.play()
+            old_player.release()
+            self._slot_songs[old] = None
+            self._slot_durations[old] = 0
+            self._fading = False
+
+    def _fade(self, old: int, new: int):
+        """淡出旧歌曲并淡入新歌曲"""
+        interval = self.crossfade / 1000 / FADE_STEPS
+        for step in range(1, FADE_STEPS + 1):
+            with self._lock:
+                if self._active != new or not self._fading:
+                    return  # 淡入淡出过程中切换了歌曲
+                self._slots[new].volume = step / FADE_STEPS
+                self._slots[old].volume = 1 - step / FADE_STEPS
+                self._slots[new].update()
+                self._slots[old].update()
+            time.sleep(interval)
+        with self._lock:
+            if self._active == new and self._fading:
+                self._slots[old].release()
+                self._slot_songs[old] = None
+                self._slot_durations[old] = 0
+                self._fading = False
+
+    def _on_audio_loaded(self, index: int):
         """音频加载完成回调"""
-        self._duration = self._audio_player.get_duration()
-        self._audio_player.play()
-    
-    def _update_position(self, e):
+        duration = self._slots[index].get_duration() or 0
+        with self._lock:
+            self._slot_durations[index] = duration
+            if index != self._active:
+                return  # 预加载完成，等待切换
+            self._duration = duration
+        self._slots[index].play()
+
+    def _update_position(self, index: int, e):
         """更新播放位置"""
-        self._current_position = int(e.data)
+        with self._lock:
+            if index != self._active:
+                return
+            self._current_position = int(e.data)
+            # 距结束不足crossfade毫秒时开始淡入淡出；检查和设置_advance_pending需在锁内，
+            # 否则与命令线程的_advance/_switch_to交错时可能重复切换
+            if (self.crossfade > 0 and not self._fading and not self._advance_pending
+                    and self._duration > 0
+                    and self._slot_durations[self._standby] > 0
+                    and self._duration - self._current_position <= self.crossfade):
+                self._advance_pending = True
+                self._commands.put(MusicCommand("advance", {"fade": True}))
+            position = self._current_position
         for callback in self._position_callbacks:
-            callback(self._current_position)
-    
-    def _update_state(self, e):
+            callback(position)
+
+    def _update_state(self, index: int, e):
         """更新播放状态"""
+        with self._lock:
+            if index != self._active:
+                return
+            if e.data == "completed" and not self._fading and not self._advance_pending \
+                    and self._slot_songs[self._standby] is not None:
+                # 无缝切换到预加载的歌曲
+                self._advance_pending = True
+                self._commands.put(MusicCommand("advance"))
+                return
         self._playing_state = e.data == "playing"
         for callback in self._state_callbacks:
             callback(self._playing_state)
-    
+
     # 公共接口
     def play(self):
         """播放音乐"""
-        self._command_queue.put(MusicCommand("play"))
-    
+        self._commands.put(MusicCommand("play"))
+
     def pause(self):
         """暂停音乐"""
-        self._command_queue.put(MusicCommand("pause"))
-    
+        self._commands.put(MusicCommand("pause"))
+
     def resume(self):
         """恢复播放"""
-        self._command_queue.put(MusicCommand("resume"))
-    
+        self._commands.put(MusicCommand("resume"))
+
     def seek(self, position: int):
         """跳转到指定位置"""
-        self._command_queue.put(MusicCommand("seek", {"position": position}))
-    
+        self._commands.put(MusicCommand("seek", {"position": position}))
+
     def set_song(self, song_data: dict):
         """设置要播放的歌曲"""
-        self._command_queue.put(MusicCommand("set_song", song_data))
-    
+        self._commands.put(MusicCommand("set_song", song_data))
+
+    def preload(self, song_data: dict):
+        """预加载下一首歌曲"""
+        self._commands.put(MusicCommand("preload", song_data))
+
     def stop(self):
         """停止播放线程"""
-        self._command_queue.put(MusicCommand("stop"))
+        self._commands.put(MusicCommand("stop"))
         self.join()
-    
+
     def add_position_callback(self, callback: Callable):
         """添加位置更新回调"""
         if callback not in self._position_callbacks:
             self._position_callbacks.append(callback)
-    
+
     def remove_position_callback(self, callback: Callable):
         """移除位置更新回调"""
         if callback in self._position_callbacks:
             self._position_callbacks.remove(callback)
-    
+
     def add_state_callback(self, callback: Callable):
         """添加状态更新回调"""
         if callback not in self._state_callbacks:
             self._state_callbacks.append(callback)
-    
+
     def remove_state_callback(self, callback: Callable):
         """移除状态更新回调"""
         if callback in self._state_callbacks:
             self._state_callbacks.remove(callback)
-    
+
+    def add_track_callback(self, callback: Callable):
+        """添加自动切换歌曲回调，参数为新歌曲ID"""
+        if callback not in self._track_callbacks:
+            self._track_callbacks.append(callback)
+
+    def remove_track_callback(self, callback: Callable):
+        """移除自动切换歌曲回调"""
+        if callback in self._track_callbacks:
+            self._track_callbacks.remove(callback)
+
+    @property
+    def command_stats(self) -> dict[str, CommandStats]:
+        """各类命令的处理次数、丢弃次数和延迟"""
+        return self._commands.stats
+
     @property
     def current_song_id(self) -> Optional[int]:
         return self._current_song_id
-    
+
     @property
     def playing_state(self) -> bool:
         return self._playing_state
-    
+
     @property
     def current_position(self) -> int:
         return self._current_position
-    
+
     @property
     def duration(self) -> int:
-        return self._duration
\ No newline at end of file
+        return self._duration
@@ -0,0 +1,161 @@
+"""播放队列预取：提前解析后续歌曲的详情、地址和开头音频"""
+
+import threading
+import time
+from typing import Sequence
+from concurrent.futures import ThreadPoolExecutor, Future
+from logging import info, error
+
+import api
+from audio_cache import AudioCache
+from image_cache import ImageService, PLAYER_COVER_SIZE
+from stream import AudioStreamServer
+
+PREFETCH_COUNT = 2  # 预取后续歌曲的数量
+PREFETCH_SECONDS = 20  # 预取每首歌开头的秒数
+URL_TTL = 10 * 60  # 歌曲地址的有效时间（秒）
+# 播放使用的码率，依次尝试；预取与直接播放使用相同音质，缓存的文件可以共用
+PLAYBACK_BR_LADDER = (320000, 128000)
+
+
+class QueuePrefetcher:
+    """根据播放队列在后台预取后续歌曲，队列或索引变化时取消未完成的工作"""
+
+    def __init__(self, music_api: api.MusicApi, stream_server: AudioStreamServer,
+                 audio_cache: AudioCache, count: int = PREFETCH_COUNT,
+                 seconds: int = PREFETCH_SECONDS, on_next_ready=None,
+                 images: ImageService | None = None):
+        """
+        :param on_next_ready: 下一首可播放时调用，参数为(歌曲ID, 本地播放地址)
+        :param images: 图片服务，用于预取后续歌曲的封面
+        """
+        self.music_api = music_api
+        self.stream_server = stream_server
+        self.audio_cache = audio_cache
+        self.count = count
+        self.seconds = seconds
+        self.on_next_ready = on_next_ready
+        self.images = images
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._future: Future | None = None
+        self._wanted: set[int] = set()  # 当前队列状态需要预取的歌曲
+        self._opened: set[int] = set()  # 以预取上限打开的音频流
+        self._details: dict[int, api.SongInfo] = {}
+        self._urls: dict[int, tuple[api.SongUrl, float]] = {}
+
+    def schedule(self, queue: Sequence[api.SongInfo], index: int):
+        """队列或当前索引变化后调用，预取index之后的歌曲"""
+        ids = [song.id for song in queue[index + 1:index + 1 + self.count]]
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._future is not None:
+                self._future.cancel()
+            self._future = self._executor.submit(self._run, generation, ids) if ids else None
+            self._wanted = set(ids)
+            released = self._opened - self._wanted
+            self._opened &= self._wanted
+        # 不再需要的预取下载立即关闭，释放连接和带宽
+        for id in released:
+            self.stream_server.release(id)
+
+    def cancel(self):
+        """取消未完成的预取"""
+        with self._lock:
+            self._generation += 1
+            if self._future is not None:
+                self._future.cancel()
+                self._future = None
+            released, self._opened, self._wanted = self._opened, set(), set()
+        for id in released:
+            self.stream_server.release(id)
+
+    def song_detail(self, song_id: int) -> api.SongInfo | None:
+        """获取预取的歌曲详情"""
+        with self._lock:
+            return self._details.get(song_id)
+
+    def song_url(self, song_id: int) -> api.SongUrl | None:
+        """获取预取且未过期的歌曲地址"""
+        with self._lock:
+            item = self._urls.get(song_id)
+        if item is None or time.time() - item[1] > URL_TTL:
+            return None
+        return item[0]
+
+    def _stale(self, generation: int) -> bool:
+        return generation != self._generation
+
+    def _track(self, generation: int, song_id: int) -> bool:
+        """记录预取打开的音频流；队列已变化且不再需要时关闭它，返回False"""
+        with self._lock:
+            if not self._stale(generation):
+                self._opened.add(song_id)
+                return True
+            wanted = song_id in self._wanted
+        if not wanted:
+            self.stream_server.release(song_id)
+        return False
+
+    def _run(self, generation: int, ids: list[int]):
+        """预取任务，每一步之前检查是否已被新的队列状态取代"""
+        try:
+            start = time.perf_counter()
+            missing_details = [id for id in ids if id not in self._details]
+            if missing_details:
+                songs, _ = self.music_api.songs_detail(missing_details)
+                with self._lock:
+                    self._details.update((song.id, song) for song in songs)
+                    # 只保留当前需要的详情，避免无限增长
+                    for id in list(self._details)[:-4 * self.count]:
+                        del self._details[id]
+            if self._stale(generation):
+                return
+            if self.images is not None:
+                # 封面在图片服务的线程池中下载
+                with self._lock:
+                    covers = [
+                        self._details[id].album.picUrl
+                        for id in ids if id in self._details and self._details[id].album
+                    ]
+                self.images.prefetch(covers, PLAYER_COVER_SIZE, PLAYER_COVER_SIZE)
+
+            # 已缓存的歌曲无需地址和音频
+            uncached = [id for id in ids if self.audio_cache.lookup(id) is None]
+            missing_urls = [id for id in uncached if self.song_url(id) is None]
+            if missing_urls:
+                urls = self.music_api.songs_urls(missing_urls, PLAYBACK_BR_LADDER)
+                now = time.time()
+                with self._lock:
+                    self._urls = {
+                        id: item for id, item in self._urls.items()
+                        if now - item[1] <= URL_TTL
+                    }
+                    self._urls.update((id, (url, now)) for id, url in urls.items())
+
+            for position, id in enumerate(ids):
+                if self._stale(generation):
+                    return
+                cached = self.audio_cache.lookup(id) if id not in uncached else None
+                if cached is not None:
+                    src = self.stream_server.open_cached(cached)
+                else:
+                    song_url = self.song_url(id)
+                    if song_url is None or not song_url.url:
+                        continue
+                    # 码率单位为bit/s，预取开头若干秒；预加载到播放器的下一首需完整下载
+                    limit = (song_url.br or PLAYBACK_BR_LADDER[0]) // 8 * self.seconds
+                    if position == 0 and self.on_next_ready is not None:
+                        limit = None
+                    src = self.stream_server.open(
+                        song_url.id, song_url.url, song_url.size, song_url.type,
+                        song_url.br, song_url.md5, limit=limit)
+                    if limit is not None and not self._track(generation, id):
+                        return
+                if position == 0 and self.on_next_ready is not None:
+                    self.on_next_ready(id, src)
+            info(f"预取完成: {ids} ({time.perf_counter() - start:.3f}s)")
+        except Exception as e:
+            error(f"预取失败: {ids}: {str(e)}")
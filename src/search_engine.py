@@ -0,0 +1,169 @@
+"""边输入边搜索：输入防抖、过期请求丢弃、结果缓存和下一页预取"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import info, error
+from typing import Any, Callable
+
+import api
+from library import LocalLibrary
+
+SEARCH_DEBOUNCE = 0.3  # 停止输入多久后开始搜索（秒）
+SEARCH_PAGE_SIZE = 30  # 每页结果数
+SEARCH_CACHE_SIZE = 64  # 缓存的查询结果数量
+TYPE_AHEAD_RESULTS = 5  # 输入时预览的歌曲数量
+
+# 搜索类型 -> 客户端方法
+SEARCH_SONG = 1
+SEARCH_ALBUM = 10
+SEARCH_SINGER = 100
+SEARCH_SONGLIST = 1000
+SEARCH_LYRICS = 1006
+SEARCH_METHODS = {
+    SEARCH_SONG: "search_song",
+    SEARCH_ALBUM: "search_album",
+    SEARCH_SINGER: "search_singer",
+    SEARCH_SONGLIST: "search_songlist",
+    SEARCH_LYRICS: "search_lyrics",
+}
+SUGGEST = 0  # 缓存中搜索建议使用的类型
+
+
+class SearchEngine:
+    """搜索服务
+
+    结果按(关键词, 类型, 偏移)缓存在内存LRU中，相同查询的并发请求共用一次请求；
+    每次搜索后在后台预取下一页。type_ahead()在输入停止后才发出请求，
+    新的输入会使之前的请求过期，过期请求的结果不再回调。
+    设置了本地曲库时，搜到的歌曲记入曲库；请求失败时改为搜索曲库，
+    在线搜索成功但没有结果时如实返回空列表。
+    """
+
+    def __init__(self, music_api: api.MusicApi, debounce: float = SEARCH_DEBOUNCE,
+                 page_size: int = SEARCH_PAGE_SIZE, cache_size: int = SEARCH_CACHE_SIZE,
+                 library: LocalLibrary | None = None):
+        self.music_api = music_api
+        self.library = library
+        self.debounce = debounce
+        self.page_size = page_size
+        self.cache_size = cache_size
+        self.hits = 0  # 缓存命中次数
+        self.requests = 0  # 实际发出的请求数
+        self.stale = 0  # 被丢弃的过期结果数
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, int, int], list] = OrderedDict()
+        self._pending: dict[tuple[str, int, int], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=3)
+        self._generation = 0
+        self._timer: threading.Timer | None = None
+
+    @staticmethod
+    def _key(keywords: str, type_: int, offset: int) -> tuple[str, int, int]:
+        return (" ".join(keywords.split()), type_, offset)
+
+    def search(self, keywords: str, type_: int = SEARCH_SONG, offset: int = 0) -> list:
+        """搜索并等待结果，完成后预取下一页"""
+        result = self._load(self._key(keywords, type_, offset)).result()
+        if len(result) >= self.page_size:
+            self.prefetch(keywords, type_, offset + self.page_size)
+        return result
+
+    def prefetch(self, keywords: str, type_: int = SEARCH_SONG, offset: int = 0):
+        """在后台加载结果到缓存"""
+        self._load(self._key(keywords, type_, offset))
+
+    def suggest(self, keywords: str) -> list[str]:
+        """获取搜索建议"""
+        return self._load(self._key(keywords, SUGGEST, 0)).result()
+
+    def type_ahead(self, text: str, callback: Callable[[str, list[str], list[api.SongInfo]], Any]):
+        """输入变化时调用，停止输入debounce秒后获取搜索建议和歌曲预览
+
+        callback以(关键词, 搜索建议, 歌曲预览)调用；之后又有新的输入时不会调用。
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            if not text.strip():
+                return
+            self._timer = threading.Timer(
+                self.debounce, self._type_ahead, (generation, text, callback))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """取消等待中的输入搜索，已发出的请求结果将被丢弃"""
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _type_ahead(self, generation: int, text: str, callback):
+        if generation != self._generation:
+            return
+        suggestions = self._load(self._key(text, SUGGEST, 0))
+        songs = self._load(self._key(text, SEARCH_SONG, 0))
+        try:
+            result = (suggestions.result(), songs.result()[:TYPE_AHEAD_RESULTS])
+        except Exception as e:
+            error(f"搜索失败: {text}: {str(e)}")
+            return
+        if generation != self._generation:
+            with self._lock:
+                self.stale += 1
+            return
+        callback(text, *result)
+
+    def _load(self, key: tuple[str, int, int]) -> Future:
+        """从缓存获取，或提交请求；同一查询只请求一次"""
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                future: Future = Future()
+                future.set_result(result)
+                return future
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._request, key)
+                self._pending[key] = future
+            return future
+
+    def _request(self, key: tuple[str, int, int]) -> list:
+        keywords, type_, offset = key
+        start = time.perf_counter()
+        try:
+            if type_ == SUGGEST:
+                result = self.music_api.search_suggest(keywords)
+            else:
+                method = getattr(self.music_api, SEARCH_METHODS[type_])
+                result = method(keywords, offset, self.page_size)
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            if self.library is None or type_ not in (SEARCH_SONG, SEARCH_SONGLIST):
+                raise
+            # 只在请求失败时改为搜索曲库；离线结果不缓存，恢复网络后重新请求
+            error(f"搜索失败，改为搜索本地曲库: {keywords}: {str(e)}")
+            if type_ == SEARCH_SONG:
+                return self.library.search(keywords, offset, self.page_size)
+            return self.library.search_playlists(keywords, offset, self.page_size)
+        info(f"搜索: {key} {len(result)}条 ({time.perf_counter() - start:.3f}s)")
+        if self.library is not None and type_ == SEARCH_SONG and result:
+            self.library.add_songs(result)
+        with self._lock:
+            self.requests += 1
+            self._pending.pop(key, None)
+            if not result:
+                return result  # 空结果不缓存，部分接口请求失败时也返回空列表
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,443 @@
+"""本地音频流代理，边下载边播放"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import info, warning, error
+from typing import TYPE_CHECKING
+
+import httpx
+
+from api.transport import default_transport
+from audio_cache import AudioCache, CachedAudio
+
+if TYPE_CHECKING:
+    from image_cache import ImageService
+
+CHUNK_SIZE = 64 * 1024  # 每次下载/发送的字节数
+MAX_STREAMS = 4  # 同时保留的音频流数量（当前播放+预取）
+READ_TIMEOUT = 30  # 等待数据到达的最长时间（秒）
+
+MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "flac": "audio/flac",
+    "m4a": "audio/mp4",
+    "aac": "audio/aac",
+    "ogg": "audio/ogg",
+}
+
+
+class AudioStream:
+    """由本地文件支撑的音频流，下载线程写入，播放器读取"""
+
+    def __init__(self, song_id: int, url: str, path: str, size: int | None = None,
+                 type_: str | None = None, br: int | None = None, md5: str | None = None,
+                 on_complete=None, client: httpx.Client | None = None):
+        self.song_id = song_id
+        self.client = client or default_transport().client  # 共享连接池的HTTP客户端
+        self.url = url
+        self.path = path
+        self.total = size or None  # 总字节数，未知时为None
+        self.type = type_ or "mp3"
+        self.mime = MIME_TYPES.get(self.type.lower(), "audio/mpeg")
+        self.br = br
+        self.md5 = md5  # 服务器给出的md5
+        self.digest: str | None = None  # 下载内容的md5
+        self.available = 0  # 已写入文件的字节数
+        self.complete = False
+        self.failed = False
+        self.owned = True  # 文件是否属于本音频流（缓存中的文件不可删除）
+        self.limit: int | None = None  # 下载上限，用于预取开头部分
+        self.readers = 0  # 正在读取文件的请求数
+        self._on_complete = on_complete
+        self._handed_over = False  # 是否已交给on_complete
+        self._moving = False  # on_complete正在移动文件，新的读取者需等待
+        self._cancelled = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._download, daemon=True)
+
+    @classmethod
+    def from_cache(cls, entry: CachedAudio) -> "AudioStream":
+        """由缓存文件创建已完成的音频流"""
+        stream = cls(entry.song_id, "", entry.path, entry.size, entry.type,
+                     entry.br, entry.md5)
+        stream.digest = entry.md5
+        stream.available = entry.size
+        stream.complete = True
+        stream.owned = False
+        return stream
+
+    def start(self):
+        """开始后台下载"""
+        open(self.path, "wb").close()
+        self._thread.start()
+
+    def cancel(self):
+        """取消下载并删除文件"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+        self._remove_if_idle()
+
+    def set_limit(self, limit: int | None):
+        """设置下载上限（字节），None表示下载完整文件"""
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    def _download(self):
+        """下载线程，按块写入文件；到达上限时断开连接，上限提高后用Range续传"""
+        digest = hashlib.md5()
+        try:
+            with open(self.path, "wb") as f:
+                while not self.complete:
+                    with self._cond:
+                        self._cond.wait_for(
+                            lambda: self._cancelled or self.limit is None
+                            or self.available < self.limit)
+                        if self._cancelled:
+                            break
+                    headers = {"Range": f"bytes={self.available}-"} if self.available else {}
+                    with self.client.stream("GET", self.url, headers=headers) as resp:
+                        resp.raise_for_status()
+                        if self.available and resp.status_code != 206:
+                            # 服务器不支持续传，从头开始
+                            f.seek(0)
+                            f.truncate()
+                            digest = hashlib.md5()
+                            with self._cond:
+                                self.available = 0
+                        length = resp.headers.get("Content-Length")
+                        if length and length.isdigit():
+                            with self._cond:
+                                self.total = self.available + int(length)
+                        expected = self.total
+                        finished = True
+                        for chunk in resp.iter_bytes(CHUNK_SIZE):
+                            f.write(chunk)
+                            f.flush()
+                            digest.update(chunk)
+                            with self._cond:
+                                self.available += len(chunk)
+                                self._cond.notify_all()
+                                if self._cancelled or (
+                                        self.limit is not None and self.available >= self.limit):
+                                    finished = False
+                                    break
+                    if finished:
+                        if expected is not None and self.available != expected:
+                            raise IOError(f"数据不完整: {self.available}/{expected} bytes")
+                        with self._cond:
+                            self.complete = True
+                            self.total = self.available
+                            self.digest = digest.hexdigest()
+                            self._cond.notify_all()
+            if self.complete:
+                info(f"音频下载完成: {self.song_id} ({self.available} bytes)")
+                self._hand_over()
+        except Exception as e:
+            error(f"音频下载失败: {self.song_id}: {str(e)}")
+            with self._cond:
+                self.failed = True
+                self._cond.notify_all()
+        self._remove_if_idle()
+
+    def _hand_over(self):
+        """下载完成且没有读取者时调用on_complete
+
+        on_complete会把文件移入缓存，Windows上无法移动仍被打开的文件，
+        因此有读取者时推迟到最后一个读取者结束。
+        """
+        with self._cond:
+            if (not self.complete or self.readers or self._handed_over
+                    or self._on_complete is None):
+                return
+            self._handed_over = True
+            self._moving = True
+        try:
+            self._on_complete(self)
+        finally:
+            with self._cond:
+                self._moving = False
+                self._cond.notify_all()
+
+    def _remove_if_idle(self):
+        """已取消的下载在下载线程和读取者都结束后删除文件"""
+        with self._cond:
+            if not self._cancelled or not self.owned or self.readers:
+                return
+        downloading = self._thread.is_alive() and self._thread is not threading.current_thread()
+        if not downloading and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def wait_for(self, offset: int) -> int:
+        """等待直到offset之后有数据可读，返回可读到的位置"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.available > offset or self.complete
+                or self.failed or self._cancelled,
+                timeout=READ_TIMEOUT,
+            )
+            return self.available
+
+    def wait_for_total(self) -> int | None:
+        """等待直到得知总长度"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.total is not None or self.failed or self._cancelled,
+                timeout=READ_TIMEOUT,
+            )
+            return self.total
+
+    def iter_range(self, start: int, end: int | None):
+        """按块读取[start, end]范围的数据，数据未到达时等待"""
+        position = start
+        with self._cond:
+            self._cond.wait_for(lambda: not self._moving)
+            self.readers += 1
+            path = self.path
+        try:
+            with open(path, "rb") as f:
+                while end is None or position <= end:
+                    available = self.wait_for(position)
+                    if available <= position:
+                        return  # 已结束或超时
+                    stop = available if end is None else min(available, end + 1)
+                    f.seek(position)
+                    while position < stop:
+                        data = f.read(min(CHUNK_SIZE, stop - position))
+                        if not data:
+                            return
+                        position += len(data)
+                        yield data
+        finally:
+            with self._cond:
+                self.readers -= 1
+            self._hand_over()
+            self._remove_if_idle()
+
+
+def _image_type(data: bytes) -> str:
+    """根据文件头判断图片类型"""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """代理请求处理"""
+
+    server: "_StreamHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        image_match = re.fullmatch(r"/image/([0-9a-f]{32})", self.path.split("?")[0])
+        if image_match:
+            self._send_image(image_match.group(1))
+            return
+        match = re.fullmatch(r"/song/(\d+)", self.path.split("?")[0])
+        stream = self.server.owner.get(int(match.group(1))) if match else None
+        if stream is None:
+            self.send_error(404)
+            return
+
+        total = stream.wait_for_total()
+        if stream.failed or total is None:
+            self.send_error(502)
+            return
+
+        start, end = 0, total - 1
+        range_header = self.headers.get("Range")
+        range_match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header or "")
+        if range_match and (range_match.group(1) or range_match.group(2)):
+            if range_match.group(1):
+                start = int(range_match.group(1))
+                if range_match.group(2):
+                    end = min(int(range_match.group(2)), total - 1)
+            else:
+                start = max(total - int(range_match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{total}")
+                self.send_header("Content-Length", "0")  # 保持连接时客户端据此结束读取
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", stream.mime)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        try:
+            with closing(stream.iter_range(start, end)) as chunks:
+                for data in chunks:
+                    self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 播放器中途断开（如拖动进度条）
+
+    def _send_image(self, key: str):
+        """发送磁盘缓存中的封面图片"""
+        images = self.server.owner.images
+        path = images.file(key) if images is not None else None
+        try:
+            if path is None:
+                raise FileNotFoundError(key)
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.send_error(404)  # 未缓存或刚被淘汰
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", _image_type(data))
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "max-age=86400")
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StreamHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "AudioStreamServer"
+
+
+class AudioStreamServer:
+    """本地HTTP音频代理，播放器通过src读取正在下载的音频
+
+    同时以/image/<key>提供图片服务中已缓存的封面，图片控件以src加载，
+    不必把图片以base64随控件更新发送。
+    """
+
+    def __init__(self, cache_dir: str, cache: AudioCache | None = None,
+                 host: str = "127.0.0.1", port: int = 0,
+                 client: httpx.Client | None = None,
+                 images: "ImageService | None" = None):
+        """
+        :param client: 下载音频使用的HTTP客户端，与API共用连接池
+        :param images: 提供封面图片的图片服务
+        """
+        self.cache_dir = cache_dir
+        self.cache = cache
+        self.images = images
+        self.client = client or default_transport().client
+        os.makedirs(cache_dir, exist_ok=True)
+        self._streams: OrderedDict[int, AudioStream] = OrderedDict()
+        self._lock = threading.Lock()
+        self._server = _StreamHTTPServer((host, port), _StreamHandler)
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """启动代理服务器"""
+        self._thread.start()
+        info(f"音频代理已启动: {self.base_url}")
+
+    def stop(self):
+        """停止代理服务器并清理音频流"""
+        self._server.shutdown()
+        with self._lock:
+            for stream in self._streams.values():
+                stream.cancel()
+            self._streams.clear()
+
+    def get(self, song_id: int) -> AudioStream | None:
+        with self._lock:
+            return self._streams.get(song_id)
+
+    def open(self, song_id: int, url: str, size: int | None = None,
+             type_: str | None = None, br: int | None = None,
+             md5: str | None = None, limit: int | None = None) -> str:
+        """开始下载歌曲并返回播放器可用的本地地址
+
+        :param limit: 只下载开头limit字节（预取），再次以limit=None打开时继续下载
+        """
+        with self._lock:
+            stream = self._streams.get(song_id)
+            if stream is None or stream.failed or (stream.url != url and not stream.complete):
+                if stream is not None:
+                    stream.cancel()
+                path = os.path.join(self.cache_dir, f"{song_id}.part")
+                stream = AudioStream(song_id, url, path, size, type_, br, md5,
+                                     on_complete=self._store, client=self.client)
+                stream.limit = limit
+                self._streams[song_id] = stream
+                if limit is not None:
+                    # 预取的音频流优先淘汰，避免挤掉正在播放的歌曲
+                    self._streams.move_to_end(song_id, last=False)
+                stream.start()
+            elif limit is None:
+                stream.set_limit(None)
+            if limit is None:
+                self._add(stream)
+            else:
+                self._trim()
+        return f"{self.base_url}/song/{song_id}"
+
+    def release(self, song_id: int):
+        """关闭只用于预取的音频流，播放器打开的完整下载和已完成的音频流不受影响"""
+        with self._lock:
+            stream = self._streams.get(song_id)
+            if stream is None or stream.limit is None or stream.complete:
+                return
+            del self._streams[song_id]
+        stream.cancel()
+
+    def open_cached(self, entry: CachedAudio) -> str:
+        """播放缓存中的歌曲，不产生网络请求"""
+        with self._lock:
+            stream = self._streams.get(entry.song_id)
+            if stream is None or not stream.complete:
+                if stream is not None:
+                    stream.cancel()
+                stream = AudioStream.from_cache(entry)
+                self._streams[entry.song_id] = stream
+            self._add(stream)
+        return f"{self.base_url}/song/{entry.song_id}"
+
+    def _add(self, stream: AudioStream):
+        """记录最近使用的音频流"""
+        self._streams.move_to_end(stream.song_id)
+        self._trim()
+
+    def _trim(self):
+        """只保留最近的几个音频流以限制磁盘占用"""
+        while len(self._streams) > MAX_STREAMS:
+            _, old = self._streams.popitem(last=False)
+            old.cancel()
+
+    def _store(self, stream: AudioStream):
+        """下载完成且没有读取者后校验并移入音频缓存"""
+        if self.cache is None or stream.br is None:
+            return
+        if not stream.complete or stream.available != stream.total:
+            return  # 只下载了开头（预取）或不完整的文件不能缓存
+        with self._lock:
+            if self._streams.get(stream.song_id) is not stream:
+                return  # 已被淘汰，文件已删除
+            entry = self.cache.add_file(
+                stream.song_id, stream.br, stream.path, stream.type,
+                expected_md5=stream.md5, md5=stream.digest)
+            if entry is not None:
+                stream.path = entry.path
+                stream.owned = False
@@ -0,0 +1,76 @@
+"""界面更新调度：合并高频的播放进度事件，限制刷新频率"""
+
+import threading
+import time
+from logging import error
+from typing import Callable
+
+UI_FPS = 5  # 进度界面每秒最多刷新次数
+
+
+class UiUpdateScheduler:
+    """按帧率节流的界面更新
+
+    播放进度事件只记录最新位置，每帧最多分发一次；回调只修改控件属性并返回
+    显示内容是否变化，所有回调执行完后如有变化统一调用一次page.update。
+    """
+
+    def __init__(self, page, callbacks: Callable[[], list], fps: float = UI_FPS):
+        """
+        :param callbacks: 返回当前回调列表的函数，回调参数为播放位置，返回是否需要刷新
+        """
+        self.page = page
+        self.callbacks = callbacks
+        self.interval = 1 / fps if fps > 0 else 0
+        self._lock = threading.Lock()
+        self._value = None
+        self._last_flush = 0.0
+        self._timer: threading.Timer | None = None
+        self.flushes = 0  # 实际刷新次数
+        self.skipped = 0  # 被合并或无变化的事件数
+
+    def submit(self, value):
+        """提交最新的值，距上次刷新不足一帧时延迟到帧末"""
+        with self._lock:
+            if self._value is not None:
+                self.skipped += 1  # 上一个值尚未显示就被覆盖
+            self._value = value
+            wait = self._last_flush + self.interval - time.monotonic()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """分发最新的值，有控件变化时刷新页面"""
+        with self._lock:
+            self._timer = None
+            value, self._value = self._value, None
+            if value is None:
+                return
+            self._last_flush = time.monotonic()
+        changed = False
+        for callback in list(self.callbacks()):
+            if callback is None:
+                continue
+            try:
+                changed = bool(callback(value)) or changed
+            except Exception as e:
+                error(f"界面更新回调失败: {str(e)}")
+        if not changed:
+            self.skipped += 1
+            return
+        self.flushes += 1
+        if self.page is not None:
+            self.page.update()
+
+    def cancel(self):
+        """取消等待中的刷新"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._value = None
@@ -0,0 +1,34 @@
+import os
+import sys
+
+# the app modules import each other as top-level modules from src/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+import api
+from api.resilience import RetryPolicy
+from api.transport import HttpTransport
+
+
+@pytest.fixture
+def mock_transport(monkeypatch):
+    """Factory of HttpTransports whose connections are answered by ``handler``."""
+
+    def make(handler) -> HttpTransport:
+        monkeypatch.setattr(httpx, "HTTPTransport", lambda **_: httpx.MockTransport(handler))
+        return HttpTransport(http2=False)
+
+    return make
+
+
+@pytest.fixture
+def mock_api(mock_transport):
+    """Factory of MusicApi clients whose requests are answered by ``handler``."""
+
+    def make(handler, **kwargs) -> api.MusicApi:
+        kwargs.setdefault("resilience", api.Resilience(RetryPolicy(attempts=1)))
+        return api.MusicApi(transport=mock_transport(handler), **kwargs)
+
+    return make
@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+import pytest
+
+from audio_cache import AudioCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AudioCache(str(tmp_path / "cache"), quota=1000)
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_add_file_moves_into_content_addressed_store(cache, tmp_path):
+    src = write(tmp_path, "1.part", b"a" * 100)
+    entry = cache.add_file(1, 320000, src, "mp3")
+    assert entry.md5 == hashlib.md5(b"a" * 100).hexdigest()
+    assert not os.path.exists(src)
+    assert os.path.exists(entry.path)
+    assert cache.lookup(1) == entry
+
+
+def test_same_content_is_stored_once(cache, tmp_path):
+    first = cache.add_file(1, 320000, write(tmp_path, "1.part", b"a" * 100))
+    second = cache.add_file(2, 128000, write(tmp_path, "2.part", b"a" * 100))
+    assert first.path == second.path
+    assert cache.total_size() == 100
+    assert sorted(cache.song_ids()) == [1, 2]
+
+
+def test_rejects_md5_mismatch(cache, tmp_path):
+    src = write(tmp_path, "1.part", b"a" * 100)
+    assert cache.add_file(1, 320000, src, expected_md5="0" * 32) is None
+    assert cache.lookup(1) is None
+    assert os.path.exists(src)  # left to the caller
+
+
+def test_lookup_prefers_highest_bitrate(cache, tmp_path):
+    cache.add_file(1, 128000, write(tmp_path, "low", b"l" * 10))
+    cache.add_file(1, 320000, write(tmp_path, "high", b"h" * 20))
+    assert cache.lookup(1).br == 320000
+    assert cache.lookup(1, 128000).size == 10
+    assert cache.lookup(1, 999000) is None
+
+
+def test_evicts_least_recently_used_over_quota(cache, tmp_path):
+    changes = []
+    cache.on_change = lambda song_id, cached: changes.append((song_id, cached))
+    cache.add_file(1, 320000, write(tmp_path, "1", b"1" * 400))
+    cache.add_file(2, 320000, write(tmp_path, "2", b"2" * 400))
+    cache.lookup(1)  # 2 is now the least recently used
+    cache.add_file(3, 320000, write(tmp_path, "3", b"3" * 400))
+    assert cache.lookup(2) is None
+    assert cache.lookup(1) is not None and cache.lookup(3) is not None
+    assert cache.total_size() == 800
+    assert (2, False) in changes and (3, True) in changes
+
+
+def test_lookup_forgets_files_deleted_outside(cache, tmp_path):
+    entry = cache.add_file(1, 320000, write(tmp_path, "1", b"x" * 10))
+    os.remove(entry.path)
+    assert cache.lookup(1) is None
+    assert cache.song_ids() == []
@@ -0,0 +1,89 @@
+import time
+
+import httpx
+
+import api
+from api.cache import cache_key
+from api.transport import HttpTransport
+
+PLAYLIST = "/api/v6/playlist/detail"
+OK = {"code": 200, "value": 1}
+
+
+def make_cache(**kwargs) -> api.ResponseCache:
+    return api.ResponseCache(":memory:", ttl={PLAYLIST: 60, "/api/v1/album/": 60}, **kwargs)
+
+
+def test_cache_key_is_canonical():
+    assert cache_key("/p", {"b": 1, "a": "x", "csrf_token": "t"}) == cache_key("/p", {"a": "x", "b": "1"})
+    assert cache_key("/p", {"a": 1}, "one") != cache_key("/p", {"a": 1}, "two")
+
+
+def test_get_returns_stored_response():
+    cache = make_cache()
+    cache.set(PLAYLIST, {"id": 1}, OK)
+    assert cache.get(PLAYLIST, {"id": 1}) == OK
+    assert cache.get(PLAYLIST, {"id": 2}) is None
+
+
+def test_only_successful_responses_of_cacheable_endpoints_are_stored():
+    cache = make_cache()
+    cache.set(PLAYLIST, {"id": 1}, {"code": -1, "msg": "offline"})
+    cache.set("/api/login", {}, OK)
+    assert cache.get(PLAYLIST, {"id": 1}) is None
+    assert cache.get("/api/login", {}) is None
+
+
+def test_prefix_ttl():
+    cache = make_cache()
+    assert cache.ttl_for("/api/v1/album/42") == 60
+    assert cache.ttl_for("/api/v1/other") == 0
+
+
+def test_expired_entries_are_dropped():
+    cache = api.ResponseCache(":memory:", ttl={PLAYLIST: 1})
+    cache.set(PLAYLIST, {"id": 1}, OK)
+    cache._db.execute("UPDATE responses SET expires = ?", (time.time() - 1,))
+    assert cache.get(PLAYLIST, {"id": 1}) is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = make_cache(max_entries=2)
+    cache.set(PLAYLIST, {"id": 1}, OK)
+    time.sleep(0.01)
+    cache.set(PLAYLIST, {"id": 2}, OK)
+    time.sleep(0.01)
+    cache.get(PLAYLIST, {"id": 1})  # 1 is now more recent than 2
+    time.sleep(0.01)
+    cache.set(PLAYLIST, {"id": 3}, OK)
+    assert cache.get(PLAYLIST, {"id": 1}) == OK
+    assert cache.get(PLAYLIST, {"id": 2}) is None
+    assert cache.get(PLAYLIST, {"id": 3}) == OK
+
+
+def test_scopes_are_separate():
+    cache = make_cache()
+    cache.set(PLAYLIST, {"id": 1}, OK, scope="alice@host")
+    assert cache.get(PLAYLIST, {"id": 1}, scope="alice@host") == OK
+    assert cache.get(PLAYLIST, {"id": 1}, scope="bob@host") is None
+    cache.clear()
+    assert cache.get(PLAYLIST, {"id": 1}, scope="alice@host") is None
+
+
+def test_client_does_not_share_responses_across_accounts():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"code": 200, "playlist": {"id": 1, "name": str(len(requests))}})
+
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    music_api = api.MusicApi(transport=transport, cache=make_cache())
+    assert music_api.playlist_detail(1).name == "1"
+    assert music_api.playlist_detail(1).name == "1"  # cached
+    music_api._cookies = {"MUSIC_U": "token"}
+    assert music_api.playlist_detail(1).name == "2"
+    music_api._cookies = None
+    assert music_api.playlist_detail(1).name == "1"
+    assert len(requests) == 2
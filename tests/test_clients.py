@@ -0,0 +1,123 @@
+import asyncio
+import json
+from urllib.parse import parse_qsl
+
+import httpx
+import pytest
+
+import api
+from api.resilience import RetryPolicy
+from api.transport import HttpTransport
+
+CALLS = [
+    ("login", ("13800000000", "secret")),
+    ("login_qr_check", ("key",)),
+    ("songs_detail", (list(range(1, 1200)),)),
+    ("songs_urls", (list(range(1, 450)),)),
+    ("playlist_detail", (7,)),
+    ("search_song", ("keywords",)),
+    ("song_lyric", (3,)),
+    ("album_like", (False, 4)),
+]
+
+
+def recording_handler(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        form = dict(parse_qsl(request.content.decode()))
+        requests.append((request.url.path, form))
+        body = {"code": 200}
+        if request.url.path == "/api/v6/playlist/detail":
+            body["playlist"] = {"id": 7, "name": "p", "tracks": [{"id": 1, "name": "1"}],
+                                "trackIds": [{"id": id} for id in range(1, 1300)]}
+        elif request.url.path == "/api/v3/song/detail":
+            ids = [int(item["id"]) for item in json.loads(form["c"])]
+            body["songs"] = [{"id": id, "name": str(id)} for id in ids if id % 7]
+        elif request.url.path == "/api/song/enhance/player/url":
+            body["data"] = [{"id": id, "url": f"u{id}" if id % 3 or form["br"] != "999000"
+                             else None, "br": int(form["br"])}
+                            for id in json.loads(form["ids"])]
+        return httpx.Response(200, json=body)
+
+    return handler
+
+
+def resilience():
+    return api.Resilience(RetryPolicy(attempts=1))
+
+
+def run_sync(name, args):
+    requests = []
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(recording_handler(requests)))
+    result = getattr(api.MusicApi(transport=transport, resilience=resilience()), name)(*args)
+    return result, requests
+
+
+def run_async(name, args):
+    requests = []
+
+    async def main():
+        transport = HttpTransport()
+        transport._async_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(recording_handler(requests)))
+        music_api = api.AsyncMusicApi(transport=transport, resilience=resilience())
+        return await getattr(music_api, name)(*args)
+
+    return asyncio.run(main()), requests
+
+
+def ordered(requests):
+    return sorted(requests, key=lambda request: json.dumps(request, sort_keys=True))
+
+
+@pytest.mark.parametrize("name, args", CALLS)
+def test_sync_and_async_clients_share_endpoints(name, args):
+    sync_result, sync_requests = run_sync(name, args)
+    async_result, async_requests = run_async(name, args)
+    assert repr(sync_result) == repr(async_result)
+    assert ordered(sync_requests) == ordered(async_requests)
+
+
+
+def test_songs_detail_batches_and_reports_missing():
+    (songs, missing), requests = run_sync("songs_detail", ([5, 14, 3, 7],))
+    assert [song.id for song in songs] == [5, 3]
+    assert missing == [14, 7]
+    assert len(requests) == 1
+
+
+def test_songs_detail_sends_batches_of_song_detail_batch():
+    (songs, missing), requests = run_sync("songs_detail", (list(range(1, 1200)),))
+    assert sorted(len(json.loads(form["c"])) for _, form in requests) == [199, 500, 500]
+    assert [song.id for song in songs] == [id for id in range(1, 1200) if id % 7]
+    assert missing == [id for id in range(1, 1200) if not id % 7]
+
+
+def test_song_detail_raises_for_a_missing_song():
+    with pytest.raises(api.ApiError) as error:
+        run_sync("song_detail", (7,))
+    assert error.value.code == 404
+    assert run_sync("song_detail", (8,))[0].id == 8
+
+
+def test_songs_urls_walks_the_bitrate_ladder():
+    urls, requests = run_sync("songs_urls", (list(range(1, 450)),))
+    assert len(urls) == 449
+    assert [form["br"] for _, form in requests] == ["999000"] * 3 + ["320000"]
+    assert urls[3].br == 320000 and urls[4].br == 999000
+
+
+def test_songs_urls_sends_each_id_once_per_bitrate():
+    urls, requests = run_sync("songs_urls", ([1, 1, 2, 3], (320000, 128000)))
+    assert [json.loads(form["ids"]) for _, form in requests] == [[1, 2, 3]]
+    assert set(urls) == {1, 2, 3}
+
+
+def test_songs_url_raises_without_an_entry():
+    def handler(request):
+        return httpx.Response(200, json={"code": 200, "data": []})
+
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    with pytest.raises(api.ApiError):
+        api.MusicApi(transport=transport, resilience=resilience()).songs_url(1)
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from api import utils
+from api.utils import (
+    load_json,
+    to_play_list_detail,
+    to_search_songs,
+    to_song_info,
+    to_songinfo,
+    to_songs_detail,
+)
+
+SONG = {
+    "id": 347230,
+    "name": "晴天",
+    "duration": 269000,
+    "album": {"id": 34720, "name": "叶惠美", "picUrl": "http://p/34720.jpg"},
+    "artists": [{"id": 6452, "name": "周杰伦", "picUrl": None}],
+}
+# the same song as returned by the v3 endpoints, with "al"/"ar" keys
+SONG_V3 = {
+    "id": 347230,
+    "name": "晴天",
+    "dt": 269000,
+    "al": {"id": 34720, "name": "叶惠美", "picUrl": "http://p/34720.jpg"},
+    "ar": [{"id": 6452, "name": "周杰伦"}],
+}
+
+
+@pytest.fixture
+def no_reparse(monkeypatch):
+    """Fail if a converter parses JSON it was already given as a dict."""
+    def loads(*args, **kwargs):
+        raise AssertionError("parsed JSON was parsed again")
+    monkeypatch.setattr(utils.json, "loads", loads)
+
+
+@pytest.mark.parametrize("raw", [json.dumps(SONG), json.dumps(SONG).encode(), SONG])
+def test_to_songinfo_accepts_text_bytes_and_dicts(raw):
+    song = to_songinfo(raw)
+    assert (song.id, song.name, song.duration) == (347230, "晴天", 269000)
+    assert song.album.name == "叶惠美"
+    assert song.pic_url == "http://p/34720.jpg"
+    assert [artist.name for artist in song.artists] == ["周杰伦"]
+
+
+def test_load_json_passes_dicts_through(no_reparse):
+    assert load_json(SONG) is SONG
+
+
+def test_to_songinfo_reads_v3_keys(no_reparse):
+    song = to_songinfo(SONG_V3)
+    assert song.album.id == 34720
+    assert [artist.id for artist in song.artists] == [6452]
+
+
+def test_to_songinfo_without_album_or_artists(no_reparse):
+    song = to_songinfo({"id": 1, "name": "x"})
+    assert song.album.id == 0
+    assert song.artists == []
+    assert song.pic_url == ""
+
+
+def test_playlist_detail_converts_parsed_tracks(no_reparse):
+    tracks = [dict(SONG_V3, id=i, name=f"song {i}") for i in range(1000)]
+    detail = to_play_list_detail({
+        "id": 7, "name": "big", "tracks": tracks,
+        "trackIds": [{"id": i} for i in range(1000)],
+    })
+    assert [song.id for song in detail.tracks] == list(range(1000))
+    assert detail.trackIds == list(range(1000))
+    assert detail.tracks[999].name == "song 999"
+
+
+def test_song_info_parse_types(no_reparse):
+    assert [s.id for s in to_song_info({"code": 200, "songs": [SONG]}, "album")] == [347230]
+    assert [s.id for s in to_song_info(
+        {"code": 200, "data": [{"simpleSong": SONG_V3}]}, "cloud")] == [347230]
+    assert [s.id for s in to_song_info(
+        {"code": 200, "data": {"dailySongs": [SONG_V3]}}, "recommend_songs")] == [347230]
+    assert [s.id for s in to_song_info(
+        {"code": 200, "result": {"songs": [SONG]}}, "search")] == [347230]
+    assert to_song_info({"code": 301, "songs": [SONG]}, "album") == []
+    assert to_song_info({"code": 200, "recommend": [{"id": 1}]}, "recommend") == []
+
+
+def test_search_songs_and_songs_detail(no_reparse):
+    assert [s.id for s in to_search_songs({"code": 200, "result": {"songs": [SONG]}})] \
+        == [347230]
+    assert to_search_songs({"code": 400}) == []
+    songs, missing = to_songs_detail(
+        [2, 1, 3], [{"songs": [dict(SONG_V3, id=1)]}, {"songs": [dict(SONG_V3, id=2)]}])
+    assert [song.id for song in songs] == [2, 1]
+    assert missing == [3]
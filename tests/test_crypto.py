@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import json
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import unpad
+
+from api.encrypt import EAPIKEY, IV, KEY_CHARS, LINUX_API_KEY, WEAPI_KEY, Crypto, CryptoEngine
+
+PARAMS = {"ids": "[347230]", "br": 999000, "csrf_token": "", "s": "晴天"}
+
+
+def aes_decrypt(text: str, key: str) -> str:
+    cipher = AES.new(key.encode(), AES.MODE_CBC, IV.encode())
+    return unpad(cipher.decrypt(base64.b64decode(text)), 16).decode()
+
+
+def legacy_weapi_params(params, sec_key: str) -> str:
+    """The params the pre-engine weapi produced for a given secKey."""
+    text = Crypto._aes_encrypt(json.dumps(params), WEAPI_KEY)
+    return Crypto._aes_encrypt(text, sec_key)
+
+
+def legacy_linux_api(text) -> dict:
+    if isinstance(text, dict):
+        text = json.dumps(text)
+    return {"eparams": Crypto._aes_encrypt(text, LINUX_API_KEY)}
+
+
+def legacy_eapi(input_data) -> dict:
+    url = input_data.get("url", "")
+    text = json.dumps(input_data.get("params", {}))
+    digest = hashlib.md5(f"nobody{url}use{text}md5forencrypt".encode()).hexdigest()
+    return {"params": Crypto._aes_encrypt(
+        f"{url}-36cd479b6b5-{text}-36cd479b6b5-{digest}", EAPIKEY)}
+
+
+def test_weapi_matches_legacy_for_pooled_key():
+    engine = CryptoEngine(pool_size=1)
+    result = engine.weapi(PARAMS)
+    [(sec_key, enc_sec_key)] = engine._key_pool
+    sec_key = sec_key.decode()
+    assert len(sec_key) == 16 and set(sec_key) <= set(KEY_CHARS)
+    assert result["encSecKey"] == enc_sec_key
+    assert result["params"] == legacy_weapi_params(PARAMS, sec_key)
+    assert json.loads(aes_decrypt(aes_decrypt(result["params"], sec_key), WEAPI_KEY)) == PARAMS
+
+
+def test_weapi_enc_sec_key_is_rsa_sized():
+    engine = CryptoEngine(pool_size=2)
+    engine.weapi(PARAMS)
+    assert len(engine._key_pool) == 2
+    for _, enc_sec_key in engine._key_pool:
+        # 1024-bit RSA key, so 128-byte ciphertext
+        assert len(base64.b64decode(enc_sec_key)) == 128
+
+
+def test_weapi_many_preserves_order():
+    engine = CryptoEngine(pool_size=4)
+    params_list = [{"id": i, "csrf_token": ""} for i in range(10)]
+    results = engine.weapi_many(params_list)
+    keys = {enc: sec.decode() for sec, enc in engine._key_pool}
+    decrypted = [
+        json.loads(aes_decrypt(aes_decrypt(r["params"], keys[r["encSecKey"]]), WEAPI_KEY))
+        for r in results
+    ]
+    assert decrypted == params_list
+
+
+def test_linux_api_matches_legacy():
+    engine = CryptoEngine()
+    payload = {"method": "POST", "url": "https://music.163.com/api/song/lyric",
+               "params": {"id": 347230, "lv": -1}}
+    assert engine.linux_api(payload) == legacy_linux_api(payload)
+    assert engine.linux_api("plain text") == legacy_linux_api("plain text")
+
+
+def test_eapi_matches_legacy():
+    engine = CryptoEngine()
+    payload = {"url": "/api/song/enhance/player/url", "params": PARAMS}
+    assert engine.eapi(payload) == legacy_eapi(payload)
+    assert engine.eapi({}) == legacy_eapi({})
+
+
+def test_static_helpers_use_default_engine():
+    payload = {"url": "/api/v1/search", "params": PARAMS}
+    assert Crypto.eapi(payload) == legacy_eapi(payload)
+    assert Crypto.linux_api(payload) == legacy_linux_api(payload)
+    result = Crypto.weapi(PARAMS)
+    assert set(result) == {"params", "encSecKey"}
@@ -0,0 +1,107 @@
+import base64
+import os
+import threading
+
+import flet as ft
+import httpx
+import pytest
+
+from image_cache import PLACEHOLDER, ImageService
+from stream import AudioStreamServer
+from test_singleflight import wait_until
+
+PNG = base64.b64decode(PLACEHOLDER)
+COVER = "https://p1.music.126.net/cover.jpg"
+
+
+class FakeApi:
+    def __init__(self, data=PNG):
+        self.data = data
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def fetch_img(self, url, width, height):
+        self.calls.append((url, width, height))
+        self.gate.wait(5)
+        if self.data is None:
+            raise IOError("offline")
+        return self.data
+
+
+@pytest.fixture
+def images(tmp_path):
+    service = ImageService(FakeApi(), str(tmp_path / "images"), scale=2)
+    yield service
+    service._executor.shutdown()
+
+
+@pytest.fixture
+def served(images, tmp_path):
+    server = AudioStreamServer(str(tmp_path / "audio"), images=images)
+    server.start()
+    images.base_url = server.base_url
+    yield images
+    server.stop()
+
+
+def test_downloads_once_at_display_scale(images):
+    futures = [images.load(COVER, 100, 50) for _ in range(5)]
+    assert all(future.result(5) == PNG for future in futures)
+    assert images.music_api.calls == [(COVER, 200, 100)]
+    assert images.fetch(COVER, 100, 50) == PNG
+    assert images.hits >= 1
+
+
+def test_disk_cache_survives_restart(images, tmp_path):
+    images.fetch(COVER, 100, 100)
+    reopened = ImageService(FakeApi(None), str(tmp_path / "images"))
+    assert reopened.get(COVER, 100, 100) == PNG
+    assert reopened.disk_hits == 1
+
+
+def test_disk_quota_evicts_oldest(tmp_path):
+    service = ImageService(FakeApi(b"x" * 100), str(tmp_path / "images"), quota=250)
+    for index in range(4):
+        service.fetch(f"{COVER}?{index}", 10, 10)
+    assert len(os.listdir(tmp_path / "images")) == 2
+    assert service.get(f"{COVER}?3", 10, 10) is not None
+
+
+def test_show_uses_local_server_url(served):
+    image = ft.Image()
+    served.fetch(COVER, 100, 100)
+    served.show(image, COVER, 100, 100)
+    assert image.src.startswith(f"{served.base_url}/image/")
+    assert image.src_base64 is None
+    response = httpx.get(image.src, timeout=5)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/png"
+    assert response.content == PNG
+    assert httpx.get(f"{served.base_url}/image/{'0' * 32}", timeout=5).status_code == 404
+
+
+def test_show_placeholder_until_downloaded(served):
+    served.music_api.gate.clear()
+    image = ft.Image()
+    served.show(image, COVER, 100, 100)
+    assert image.src is None and image.src_base64 == PLACEHOLDER
+    served.music_api.gate.set()
+    wait_until(lambda: image.src is not None)
+    assert image.src.startswith(f"{served.base_url}/image/")
+
+
+def test_show_falls_back_to_base64_without_server(images):
+    image = ft.Image()
+    images.fetch(COVER, 100, 100)
+    images.show(image, COVER, 100, 100)
+    assert image.src is None
+    assert image.src_base64 == base64.b64encode(PNG).decode()
+
+
+def test_show_keeps_placeholder_on_failure(tmp_path):
+    service = ImageService(FakeApi(None), str(tmp_path / "images"))
+    image = ft.Image()
+    service.show(image, COVER, 100, 100)
+    wait_until(lambda: not service._pending)
+    assert image.src_base64 == PLACEHOLDER
@@ -0,0 +1,93 @@
+import pytest
+
+import api
+from library import LocalLibrary
+
+
+def song(id: int, name: str, artist: str, album: str = "Album") -> api.SongInfo:
+    return api.SongInfo(
+        id=id,
+        name=name,
+        album=api.AlbumInfo(id=id * 10, name=album, picUrl=f"http://p/{id}.jpg"),
+        duration=1000,
+        artists=[api.SingerInfo(id=id * 100, name=artist)],
+    )
+
+
+@pytest.fixture
+def library(tmp_path):
+    library = LocalLibrary(str(tmp_path / "library.db"))
+    library.add_songs([
+        song(1, "晴天", "周杰伦", "叶惠美"),
+        song(2, "七里香", "周杰伦", "七里香"),
+        song(3, "Yesterday Once More", "Carpenters", "Now & Then"),
+        song(4, "Then and Now", "Someone", "Other"),
+    ])
+    return library
+
+
+def names(songs) -> list[str]:
+    return [song.name for song in songs]
+
+
+def test_search_matches_name_artist_and_album(library):
+    assert set(names(library.search("周杰伦"))) == {"晴天", "七里香"}
+    assert names(library.search("叶惠美")) == ["晴天"]
+    assert names(library.search("once more")) == ["Yesterday Once More"]
+
+
+def test_name_matches_rank_above_album_matches(library):
+    assert names(library.search("then")) == ["Then and Now", "Yesterday Once More"]
+
+
+def test_short_queries_fall_back_to_substring(library):
+    assert names(library.search("晴")) == ["晴天"]
+    assert names(library.search("%")) == []
+
+
+def test_search_returns_full_models(library):
+    result = library.search("晴天")[0]
+    assert result == library.song(1)
+    assert result.album.name == "叶惠美"
+    assert result.artists[0].name == "周杰伦"
+
+
+def test_downloaded_songs_rank_first(library):
+    library.set_downloaded(2, True)
+    assert names(library.search("周杰伦")) == ["七里香", "晴天"]
+    assert names(library.search("周杰伦", downloaded_only=True)) == ["七里香"]
+    library.set_downloaded(2, False)
+    assert library.search("周杰伦", downloaded_only=True) == []
+
+
+def test_download_before_indexing_is_kept(library):
+    library.set_downloaded(5, True)
+    library.add_songs([song(5, "新歌曲", "新歌手")])
+    assert names(library.search("新歌曲", downloaded_only=True)) == ["新歌曲"]
+
+
+def test_sync_downloaded(library):
+    library.set_downloaded(1, True)
+    library.sync_downloaded([3])
+    assert names(library.search("周杰伦", downloaded_only=True)) == []
+    assert names(library.search("Carpenters", downloaded_only=True)) == ["Yesterday Once More"]
+
+
+def test_update_keeps_cover_when_new_data_has_none(library):
+    library.add_songs([api.SongInfo(
+        id=1, name="晴天", duration=1000,
+        album=api.AlbumInfo(id=10, name="叶惠美", picUrl=""), artists=[])])
+    assert library.song(1).album.picUrl == "http://p/1.jpg"
+    assert library.search("周杰伦") == [library.song(2)]  # artists were replaced
+
+
+def test_playlists(library):
+    library.add_playlist(api.PlayListDetail(
+        id=7, name="我喜欢的音乐", coverImgUrl="c", createTime=0, updateTime=0,
+        description="", tracks=[library.song(3), library.song(1)]))
+    playlist = library.playlist(7)
+    assert names(playlist.tracks) == ["Yesterday Once More", "晴天"]
+    assert playlist.trackIds == [3, 1]
+    assert library.playlist(8) is None
+    found = library.search_playlists("喜欢")
+    assert [(p.id, p.trackCount) for p in found] == [(7, 2)]
@@ -0,0 +1,115 @@
+import threading
+
+import flet as ft
+
+from pages.loading import LoadingView
+from test_singleflight import wait_until
+
+
+class RecordingView(LoadingView):
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.fetch_gate = threading.Event()
+        self.fetch_gate.set()
+        self.fetch_entered = threading.Event()
+        self.finish_gate = threading.Event()
+        self.finish_gate.set()
+        super().__init__()
+
+    def skeleton(self):
+        return [ft.Text("skeleton")]
+
+    def fetch(self):
+        self.fetch_entered.set()
+        self.fetch_gate.wait(5)
+        self.calls.append("fetch")
+        if self.fail:
+            raise RuntimeError("offline")
+        return len(self.calls)
+
+    def render(self, data):
+        self.calls.append(("render", data))
+        self.controls = [ft.Text(f"data {data}")]
+
+    def finish(self, data):
+        self.finish_gate.wait(5)
+        self.check_cancelled()
+        self.calls.append("finish")
+
+    def idle(self) -> bool:
+        return self._thread is None
+
+
+def test_skeleton_is_shown_before_loading():
+    view = RecordingView()
+    assert view.controls[0].value == "skeleton"
+    assert view.calls == [] and not view.loaded
+
+
+def test_phases_run_in_order_in_the_background():
+    view = RecordingView()
+    view.fetch_gate.clear()
+    view.start()
+    view.fetch_entered.wait(5)
+    assert view.controls[0].value == "skeleton"  # start() did not block on fetch
+    view.fetch_gate.set()
+    wait_until(lambda: view.loaded)
+    assert view.calls == ["fetch", ("render", 1), "finish"]
+    assert view.controls[0].value == "data 1"
+    assert set(view.timings) == {"fetch", "render", "update", "finish"}
+
+
+def test_start_does_not_reload_a_loaded_view():
+    view = RecordingView()
+    view.start()
+    wait_until(lambda: view.loaded and view.idle())
+    view.start()
+    wait_until(view.idle)
+    assert view.calls.count("fetch") == 1
+
+
+def test_cancel_stops_between_phases_and_start_restarts():
+    view = RecordingView()
+    view.fetch_gate.clear()
+    view.start()
+    view.fetch_entered.wait(5)
+    view.cancel()
+    view.fetch_gate.set()
+    wait_until(view.idle)
+    assert view.calls == ["fetch"] and not view.loaded
+    view.start()
+    wait_until(lambda: view.loaded)
+    assert view.calls == ["fetch", "fetch", ("render", 2), "finish"]
+
+
+def test_shown_again_before_cancel_took_effect_resumes():
+    view = RecordingView()
+    view.finish_gate.clear()
+    view.start()
+    wait_until(lambda: ("render", 1) in view.calls)
+    thread = view._thread
+    view.cancel()
+    view.start()  # shown again before the cancelled finish() noticed
+    assert view._thread is thread
+    view.finish_gate.set()
+    wait_until(lambda: view.loaded and view.idle())
+    assert view.calls == ["fetch", ("render", 1), "finish"]
+
+
+def test_failure_renders_the_error():
+    view = RecordingView(fail=True)
+    view.start()
+    wait_until(view.idle)
+    assert not view.loaded
+    assert "offline" in view.controls[0].value
+
+
+def test_reload_fetches_again_after_loading():
+    view = RecordingView()
+    view.start()
+    wait_until(lambda: view.loaded and view.idle())
+    view.reload()
+    wait_until(lambda: view.loaded and view.idle() and view.calls.count("finish") == 2)
+    assert view.calls == ["fetch", ("render", 1), "finish", "fetch", ("render", 4), "finish"]
+    assert view.controls[0].value == "data 4"
@@ -0,0 +1,61 @@
+import api
+from api.lyrics import lrc_offset
+
+
+def test_parse_lrc_sorts_lines_and_skips_metadata():
+    text = "[ti:Song]\n[00:02.50]second\n[00:01.00]first\nno tag\n[00:03]third"
+    assert api.parse_lrc(text) == [(1000, "first"), (2500, "second"), (3000, "third")]
+
+
+def test_parse_lrc_fraction_precision():
+    assert api.parse_lrc("[00:01.5]a\n[00:01.05]b\n[00:01.005]c") == [
+        (1005, "c"), (1050, "b"), (1500, "a")]
+
+
+def test_parse_lrc_multiple_tags_per_line():
+    text = "[00:01.00][00:10.00]chorus\n[00:05.00]verse"
+    assert api.parse_lrc(text) == [(1000, "chorus"), (5000, "verse"), (10000, "chorus")]
+
+
+def test_parse_lrc_offset():
+    assert lrc_offset("[offset:+500]") == 500
+    assert lrc_offset("[00:01.00]x") is None
+    assert api.parse_lrc("[offset:500]\n[00:01.00]a\n[00:00.20]b") == [(0, "b"), (500, "a")]
+    assert api.parse_lrc("[00:01.00]a", default_offset=-250) == [(1250, "a")]
+
+
+def test_parse_lrc_empty():
+    assert api.parse_lrc(None) == []
+    assert api.parse_lrc("") == []
+
+
+def test_index_at():
+    timeline = api.LyricTimeline(api.parse_lrc("[00:01.00]a\n[00:02.00]b\n[00:03.00]c"))
+    assert len(timeline) == 3
+    assert timeline.index_at(0) == -1
+    assert timeline.index_at(1000) == 0
+    assert timeline.index_at(2999) == 1
+    assert timeline.index_at(10000) == 2
+    assert timeline.line(-1) == ""
+    assert timeline.line(1) == "b"
+
+
+def test_translation_alignment_within_tolerance():
+    lyrics = api.Lyrics(
+        lrc="[00:01.00]one\n[00:02.00]two\n[00:03.00]three",
+        tlyric="[00:01.00]eins\n[00:02.05]zwei\n[00:03.50]drei",
+    )
+    timeline = api.LyricTimeline.from_lyrics(lyrics)
+    assert [timeline.translation(i) for i in range(3)] == ["eins", "zwei", ""]
+
+
+def test_translation_uses_offset_of_original():
+    lyrics = api.Lyrics(lrc="[offset:1000]\n[00:02.00]a", tlyric="[00:02.00]b")
+    timeline = api.LyricTimeline.from_lyrics(lyrics)
+    assert timeline.index_at(1000) == 0
+    assert timeline.translation(0) == "b"
+
+
+def test_empty_timeline_is_false():
+    assert not api.LyricTimeline([])
+    assert api.LyricTimeline([]).index_at(100) == -1
@@ -0,0 +1,69 @@
+import dataclasses
+
+import pytest
+
+import api
+from api.utils import ModelInterner, to_play_list_detail, to_songinfo
+
+
+def track(id: int, album_id: int, *artist_ids: int) -> dict:
+    return {
+        "id": id,
+        "name": f"song {id}",
+        "al": {"id": album_id, "name": f"album {album_id}", "picUrl": ""},
+        "ar": [{"id": artist, "name": f"artist {artist}"} for artist in artist_ids],
+    }
+
+
+def test_models_have_no_instance_dict():
+    song = to_songinfo(track(1, 10, 100))
+    for obj in (song, song.album, song.artists[0]):
+        assert not hasattr(obj, "__dict__")
+
+
+def test_artists_and_albums_are_frozen():
+    song = to_songinfo(track(1, 10, 100))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        song.album.name = "other"  # type: ignore[misc]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        song.artists[0].name = "other"  # type: ignore[misc]
+
+
+def test_song_attributes_stay_writable():
+    song = to_songinfo(track(1, 10, 100))
+    song.url = "http://m/1.mp3"
+    song.lyric = "[00:00.00]"
+    assert (song.url, song.lyric) == ("http://m/1.mp3", "[00:00.00]")
+    assert dataclasses.replace(song, name="renamed").album is song.album
+    with pytest.raises(AttributeError):
+        song.extra = 1  # type: ignore[attr-defined]
+
+
+def test_playlist_shares_artists_and_albums():
+    detail = to_play_list_detail({"tracks": [
+        track(1, 10, 100, 101),
+        track(2, 10, 101),
+        track(3, 11, 100),
+    ]})
+    first, second, third = detail.tracks
+    assert first.album is second.album
+    assert first.album is not third.album
+    assert first.artists[0] is third.artists[0]
+    assert first.artists[1] is second.artists[0]
+
+
+def test_interner_keys_on_the_whole_record():
+    interner = ModelInterner()
+    artist = interner.artist({"id": 1, "name": "a", "picUrl": "x"})
+    assert interner.artist({"id": 1, "name": "a", "picUrl": "x"}) is artist
+    # a renamed or re-imaged record is a different object, not a stale one
+    assert interner.artist({"id": 1, "name": "b", "picUrl": "x"}).name == "b"
+    assert interner.artist({"id": 1, "name": "a", "picUrl": "y"}).picUrl == "y"
+    album = interner.album({"id": 2, "name": "al"})
+    assert isinstance(album, api.AlbumInfo)
+    assert (album.id, album.name, album.picUrl) == (2, "al", "")
+    assert interner.album({"id": 2, "name": "al", "picUrl": ""}) is album
+
+
+def test_separate_conversions_do_not_share():
+    assert to_songinfo(track(1, 10, 100)).album is not to_songinfo(track(2, 10, 100)).album
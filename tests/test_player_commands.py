@@ -0,0 +1,91 @@
+import threading
+from types import SimpleNamespace
+
+from player import CommandScheduler, MusicCommand, MusicPlayerThread
+
+
+def actions(commands) -> list[str]:
+    return [cmd.action for cmd in commands]
+
+
+def coalesce(*commands: MusicCommand) -> tuple[list[MusicCommand], CommandScheduler]:
+    scheduler = CommandScheduler()
+    for cmd in commands:
+        scheduler.put(cmd)
+    return scheduler.take(), scheduler
+
+
+def test_only_latest_seek_and_transport_are_kept():
+    result, scheduler = coalesce(
+        MusicCommand("seek", {"position": 1}),
+        MusicCommand("pause"),
+        MusicCommand("seek", {"position": 2}),
+        MusicCommand("resume"),
+    )
+    assert actions(result) == ["seek", "resume"]
+    assert result[0].data["position"] == 2
+    assert scheduler.stats["seek"].dropped == 1
+    assert scheduler.stats["pause"].dropped == 1
+
+
+def test_set_song_supersedes_commands_of_the_previous_song():
+    result, scheduler = coalesce(
+        MusicCommand("set_song", {"id": 1}),
+        MusicCommand("advance", {"fade": True}),
+        MusicCommand("seek", {"position": 5}),
+        MusicCommand("set_song", {"id": 2}),
+        MusicCommand("play"),
+    )
+    assert actions(result) == ["set_song", "play"]
+    assert result[0].data["id"] == 2
+    assert scheduler.stats["advance"].dropped == 1
+
+
+def test_stop_drops_everything_else():
+    result, _ = coalesce(MusicCommand("play"), MusicCommand("stop"), MusicCommand("seek"))
+    assert actions(result) == ["stop"]
+
+
+def test_preload_is_kept_next_to_set_song():
+    result, _ = coalesce(
+        MusicCommand("preload", {"id": 3}),
+        MusicCommand("set_song", {"id": 2}),
+        MusicCommand("preload", {"id": 4}),
+    )
+    assert actions(result) == ["set_song", "preload"]
+    assert result[1].data["id"] == 4
+
+
+def near_end_player() -> MusicPlayerThread:
+    player = MusicPlayerThread(crossfade=1000)
+    player._slot_songs = [1, 2]
+    player._slot_durations = [10000, 8000]
+    player._duration = 10000
+    return player
+
+
+def test_concurrent_position_updates_queue_one_advance():
+    player = near_end_player()
+    barrier = threading.Barrier(8)
+
+    def update():
+        barrier.wait()
+        for position in range(9000, 9500, 10):
+            player._update_position(0, SimpleNamespace(data=str(position)))
+
+    threads = [threading.Thread(target=update) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert actions(player._commands._pending) == ["advance"]
+    player._update_state(0, SimpleNamespace(data="completed"))
+    assert actions(player._commands._pending) == ["advance"]  # already pending
+
+
+def test_no_advance_while_fading():
+    player = near_end_player()
+    player._fading = True
+    player._update_position(0, SimpleNamespace(data="9500"))
+    player._update_state(0, SimpleNamespace(data="completed"))
+    assert player._commands._pending == []
@@ -0,0 +1,73 @@
+import json
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+import api
+from api.constants import SONG_DETAIL_BATCH
+
+
+def song(id: int) -> dict:
+    return {"id": id, "name": f"song {id}", "al": {"id": 1, "name": "album", "picUrl": ""},
+            "ar": [{"id": 2, "name": "singer"}]}
+
+
+def playlist_handler(track_ids, missing=(), fail_first=False):
+    detail_batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+        if request.url.path == "/api/v6/playlist/detail":
+            if fail_first:
+                return httpx.Response(200, json={"code": 404, "msg": "gone"})
+            n = int(form["n"])
+            return httpx.Response(200, json={"code": 200, "playlist": {
+                "id": 7, "name": "list",
+                "tracks": [song(id) for id in track_ids[:n]],
+                "trackIds": [{"id": id} for id in track_ids],
+            }})
+        ids = [int(item["id"]) for item in json.loads(form["c"])]
+        detail_batches.append(ids)
+        return httpx.Response(200, json={"code": 200, "songs": [
+            song(id) for id in reversed(ids) if id not in missing]})
+
+    return handler, detail_batches
+
+
+@pytest.mark.parametrize("as_table", [False, True])
+def test_stream_yields_first_page_then_batches(mock_api, as_table):
+    track_ids = list(range(1, 1201))
+    handler, batches = playlist_handler(track_ids)
+    stream = mock_api(handler).playlist_stream(7, as_table=as_table, first_page=50)
+    first = next(stream)
+    assert first.name == "list"
+    assert len(first.tracks) == 50
+    assert first.trackIds == track_ids
+    sizes = [len(playlist.tracks) for playlist in stream]
+    assert sizes == [50 + SONG_DETAIL_BATCH, 50 + 2 * SONG_DETAIL_BATCH, 1200]
+    assert [len(batch) for batch in batches] == [SONG_DETAIL_BATCH, SONG_DETAIL_BATCH, 150]
+    assert [track.id for track in first.tracks] == track_ids  # in playlist order
+    assert isinstance(first.tracks, api.TrackTable) == as_table
+
+
+def test_stream_skips_missing_songs(mock_api):
+    handler, _ = playlist_handler(list(range(1, 101)), missing={60, 70})
+    stream = mock_api(handler).playlist_stream(7, first_page=50)
+    *_, playlist = stream
+    assert len(playlist.tracks) == 98
+    assert 60 not in [track.id for track in playlist.tracks]
+
+
+def test_playlist_detail_loads_everything(mock_api):
+    handler, batches = playlist_handler(list(range(1, 1601)))
+    playlist = mock_api(handler).playlist_detail(7)
+    assert [track.id for track in playlist.tracks] == list(range(1, 1601))
+    assert sorted(len(batch) for batch in batches) == [100, 500]
+
+
+def test_failed_playlist_raises_api_error(mock_api):
+    handler, _ = playlist_handler([1], fail_first=True)
+    with pytest.raises(api.ApiError) as error:
+        next(mock_api(handler).playlist_stream(7))
+    assert error.value.code == 404
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+import api
+from audio_cache import CachedAudio
+from prefetch import PLAYBACK_BR_LADDER, PREFETCH_SECONDS, QueuePrefetcher
+
+
+def song(id: int) -> api.SongInfo:
+    return api.SongInfo(id=id, name=f"song {id}", duration=1000,
+                        album=api.AlbumInfo(id=1, name="album", picUrl=""), artists=[])
+
+
+class FakeApi:
+    def __init__(self):
+        self.detail_calls = []
+        self.url_calls = []
+
+    def songs_detail(self, ids):
+        self.detail_calls.append(list(ids))
+        return [song(id) for id in ids], []
+
+    def songs_urls(self, ids, br_ladder):
+        assert br_ladder == PLAYBACK_BR_LADDER
+        self.url_calls.append(list(ids))
+        return {id: api.SongUrl(id=id, url=f"https://cdn/{id}.mp3", br=320000, size=10 ** 7,
+                                md5="", type="mp3")
+                for id in ids}
+
+
+class FakeStreams:
+    def __init__(self):
+        self.opened = {}
+        self.released = []
+        self.cached = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def open(self, song_id, url, size, type_, br, md5, limit=None):
+        self.entered.set()
+        self.gate.wait(5)
+        self.opened[song_id] = limit
+        return f"http://local/song/{song_id}"
+
+    def open_cached(self, entry):
+        self.cached.append(entry.song_id)
+        return f"http://local/song/{entry.song_id}"
+
+    def release(self, song_id):
+        self.released.append(song_id)
+
+
+class FakeCache:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+
+    def lookup(self, song_id, br=None):
+        if song_id in self.cached:
+            return CachedAudio(song_id, 320000, "md5", 1, "mp3", f"/cache/{song_id}")
+        return None
+
+
+@pytest.fixture
+def make_prefetcher():
+    def make(cached=(), on_next_ready=None):
+        music_api, streams = FakeApi(), FakeStreams()
+        prefetcher = QueuePrefetcher(music_api, streams, FakeCache(cached),
+                                     count=2, on_next_ready=on_next_ready)
+        return prefetcher, music_api, streams
+
+    return make
+
+
+def run(prefetcher, queue, index):
+    prefetcher.schedule(queue, index)
+    if prefetcher._future is not None:
+        prefetcher._future.result(5)
+
+
+def test_prefetches_following_songs(make_prefetcher):
+    ready = []
+    prefetcher, music_api, streams = make_prefetcher(
+        on_next_ready=lambda id, src: ready.append((id, src)))
+    queue = [song(id) for id in range(1, 6)]
+    run(prefetcher, queue, 0)
+    assert music_api.detail_calls == [[2, 3]]
+    assert music_api.url_calls == [[2, 3]]
+    # the next song is downloaded completely, later ones only their first seconds
+    assert streams.opened == {2: None, 3: 320000 // 8 * PREFETCH_SECONDS}
+    assert ready == [(2, "http://local/song/2")]
+    assert prefetcher.song_detail(3).name == "song 3"
+    assert prefetcher.song_url(3).url == "https://cdn/3.mp3"
+
+
+def test_cached_songs_need_no_url(make_prefetcher):
+    prefetcher, music_api, streams = make_prefetcher(cached={2})
+    run(prefetcher, [song(id) for id in range(1, 4)], 0)
+    assert music_api.url_calls == [[3]]
+    assert streams.cached == [2]
+    assert list(streams.opened) == [3]
+
+
+def test_known_details_and_urls_are_reused(make_prefetcher):
+    prefetcher, music_api, _ = make_prefetcher()
+    queue = [song(id) for id in range(1, 6)]
+    run(prefetcher, queue, 0)
+    run(prefetcher, queue, 1)
+    assert music_api.detail_calls == [[2, 3], [4]]
+    assert music_api.url_calls == [[2, 3], [4]]
+
+
+def test_queue_change_releases_old_prefetches(make_prefetcher):
+    prefetcher, _, streams = make_prefetcher()
+    run(prefetcher, [song(id) for id in range(1, 4)], 0)
+    assert set(streams.opened) == {2, 3}
+    run(prefetcher, [song(1), song(3), song(9)], 0)
+    assert streams.released == [2]  # 3 is still wanted
+    prefetcher.cancel()
+    assert sorted(streams.released) == [2, 3, 9]
+
+
+def test_stream_opened_after_queue_change_is_released(make_prefetcher):
+    prefetcher, _, streams = make_prefetcher()
+    streams.gate.clear()
+    prefetcher.schedule([song(id) for id in range(1, 4)], 0)
+    future = prefetcher._future
+    assert streams.entered.wait(5)
+    prefetcher.cancel()  # the running task is opening song 2
+    streams.gate.set()
+    future.result(5)
+    assert list(streams.opened) == [2]
+    assert streams.released == [2]
@@ -0,0 +1,181 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+import api
+from api.resilience import CircuitBreaker, RetryBudget, RetryPolicy, Resilience, is_idempotent
+from api.transport import HttpTransport
+
+IDEMPOTENT = "/api/v3/song/detail"
+NOT_IDEMPOTENT = "/api/login/cellphone"
+NO_DELAY = RetryPolicy(attempts=3, base_delay=0, max_delay=0)
+
+
+def response(status: int) -> httpx.Response:
+    return httpx.Response(status, request=httpx.Request("POST", "https://music.163.com/"))
+
+
+def sequence(*outcomes):
+    """send() returning the given statuses or raising the given exceptions in order."""
+    calls = []
+
+    def send():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return response(outcome)
+
+    return send, calls
+
+
+def test_is_idempotent():
+    assert is_idempotent(IDEMPOTENT)
+    assert is_idempotent("/api/v1/album/123")
+    assert not is_idempotent(NOT_IDEMPOTENT)
+
+
+def test_retry_policy_delay_is_capped():
+    policy = RetryPolicy(attempts=5, base_delay=1, max_delay=3)
+    for retry in range(10):
+        assert 0 <= policy.delay(retry) <= 3
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, reset=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"  # the success reset the count
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failures=1, reset=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"  # a failed trial opens it again
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, maximum=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_retries_idempotent_endpoint_until_success():
+    resilience = Resilience(NO_DELAY)
+    send, calls = sequence(503, httpx.ConnectError("reset"), 200)
+    assert resilience.send(IDEMPOTENT, "music.163.com", send).status_code == 200
+    assert len(calls) == 3
+    assert resilience.stats["retry"] == 2
+    assert resilience.stats["success"] == 1
+
+
+def test_does_not_retry_other_endpoints():
+    resilience = Resilience(NO_DELAY)
+    send, calls = sequence(httpx.ConnectError("reset"), 200)
+    with pytest.raises(httpx.ConnectError):
+        resilience.send(NOT_IDEMPOTENT, "music.163.com", send)
+    assert len(calls) == 1
+    assert resilience.stats["failure"] == 1
+
+
+def test_returns_last_error_response_when_attempts_run_out():
+    resilience = Resilience(NO_DELAY)
+    send, calls = sequence(500, 500, 500)
+    assert resilience.send(IDEMPOTENT, "music.163.com", send).status_code == 500
+    assert len(calls) == 3
+    assert resilience.stats["failure"] == 1
+
+
+def test_exhausted_budget_stops_retries():
+    resilience = Resilience(NO_DELAY)
+    resilience.budget(IDEMPOTENT)._tokens = 0
+    send, calls = sequence(503, 200)
+    assert resilience.send(IDEMPOTENT, "music.163.com", send).status_code == 503
+    assert len(calls) == 1
+    assert resilience.stats["budget_exhausted"] == 1
+
+
+def test_open_breaker_short_circuits_requests():
+    resilience = Resilience(RetryPolicy(attempts=1), breaker_failures=2, breaker_reset=60)
+    send, calls = sequence(httpx.ConnectError("a"), httpx.ConnectError("b"), 200)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            resilience.send(IDEMPOTENT, "music.163.com", send)
+    with pytest.raises(api.CircuitOpenError):
+        resilience.send(IDEMPOTENT, "music.163.com", send)
+    assert len(calls) == 2
+    assert resilience.stats["short_circuit"] == 1
+    # other hosts have their own breaker
+    ok, _ = sequence(200)
+    assert resilience.send(IDEMPOTENT, "interface3.music.163.com", ok).status_code == 200
+
+
+def test_hedged_request_returns_the_faster_duplicate():
+    resilience = Resilience(NO_DELAY, hedge_delay=0.01)
+    release = threading.Event()
+    calls = []
+
+    def send():
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5)  # the first attempt hangs
+        return response(200)
+
+    try:
+        assert resilience.send(IDEMPOTENT, "music.163.com", send, hedge=True).status_code == 200
+    finally:
+        release.set()
+    assert len(calls) == 2
+    assert resilience.stats["hedge"] == 1
+    assert resilience.stats["hedge_won"] == 1
+
+
+def test_client_retries_server_errors_through_transport():
+    statuses = [502, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json={"code": 200, "songs": [
+            {"id": 1, "name": "a", "dt": 1000, "al": {"id": 2, "name": "b", "picUrl": ""},
+             "ar": [{"id": 3, "name": "c"}]},
+        ]})
+
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    music_api = api.MusicApi(transport=transport, resilience=Resilience(NO_DELAY))
+    assert music_api.song_detail(1).name == "a"
+    assert statuses == []
+
+
+def test_client_reports_connection_failure_as_api_error():
+    def handler(request):
+        raise httpx.ConnectError("offline")
+
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    music_api = api.MusicApi(transport=transport, resilience=Resilience(NO_DELAY))
+    with pytest.raises(api.ApiError) as error:
+        music_api.song_detail(1)
+    assert error.value.code == -1
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from pages.loading import LoadingView
+
+pytest.importorskip("qrcode")  # imported by the login page
+import main  # noqa: E402
+
+
+class CountingView(LoadingView):
+    def __init__(self, route: str):
+        super().__init__()
+        self.route = route
+        self.starts = 0
+        self.reloads = 0
+        self.activations = 0
+
+    def start(self):
+        self.starts += 1
+
+    def reload(self):
+        self.reloads += 1
+
+    def activate(self):
+        self.activations += 1
+
+
+class RefreshingView(CountingView):
+    refresh_on_show = True
+
+
+class FakePage:
+    def __init__(self):
+        self.route = "/"
+        self.views = []
+        self.app = None
+
+    def update(self):
+        pass
+
+    def go(self, route):
+        self.route = route
+        self.app.route_change(None)
+
+
+@pytest.fixture
+def app():
+    app = main.App.__new__(main.App)
+    page = FakePage()
+    page.app = app
+    app.globals_var = SimpleNamespace(page=page, music_playing=SimpleNamespace())
+    app.view_cache = OrderedDict()
+    app.created = []
+
+    def create_view(route):
+        if route == "/unknown":
+            return None
+        view = (RefreshingView if route == "/my" else CountingView)(route)
+        app.created.append(view)
+        return view
+
+    app.create_view = create_view
+    return app
+
+
+def routes(app) -> list:
+    return [view.route for view in app.globals_var.page.views]
+
+
+def test_going_back_to_a_stacked_route_truncates(app):
+    page = app.globals_var.page
+    page.go("/")
+    page.go("/playlist/1")
+    page.go("/player")
+    page.go("/")
+    assert routes(app) == ["/"]
+    assert len(app.created) == 3
+    assert app.created[0].starts == 2
+    assert app.created[2].cancelled
+
+
+def test_cached_view_is_reused_with_its_state(app):
+    page = app.globals_var.page
+    page.go("/")
+    page.go("/playlist/1")
+    playlist = page.views[-1]
+    app.view_pop(None)
+    page.go("/playlist/1")
+    assert page.views[-1] is playlist
+    assert [view.route for view in app.created] == ["/", "/playlist/1"]
+    assert playlist.starts == 2 and playlist.activations == 2
+
+
+def test_refresh_on_show_reloads_every_visit(app):
+    page = app.globals_var.page
+    page.go("/my")
+    page.go("/")
+    page.go("/my")
+    my = app.view_cache["/my"]
+    assert my.reloads == 2 and my.starts == 0
+
+
+def test_cache_evicts_least_recent_views_outside_the_stack(app):
+    page = app.globals_var.page
+    page.go("/")
+    for i in range(main.VIEW_CACHE_SIZE + 2):
+        page.go(f"/playlist/{i}")
+        app.view_pop(None)
+    assert len(app.view_cache) == main.VIEW_CACHE_SIZE
+    assert "/" in app.view_cache  # still in the page stack
+    assert "/playlist/0" not in app.view_cache
+    assert f"/playlist/{main.VIEW_CACHE_SIZE + 1}" in app.view_cache
+
+
+def test_unknown_route_redirects_home(app):
+    page = app.globals_var.page
+    page.go("/unknown")
+    assert routes(app) == ["/"]
+    assert "/unknown" not in app.view_cache
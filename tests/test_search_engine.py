@@ -0,0 +1,164 @@
+import threading
+
+import pytest
+
+import api
+from library import LocalLibrary
+from search_engine import SEARCH_SONGLIST, SearchEngine
+from test_singleflight import wait_until
+
+
+def song(id: int, name: str) -> api.SongInfo:
+    return api.SongInfo(id=id, name=name, duration=1000,
+                        album=api.AlbumInfo(id=1, name="album", picUrl=""),
+                        artists=[api.SingerInfo(id=2, name="singer")])
+
+
+class FakeApi:
+    def __init__(self, songs=None, fail=False):
+        self.songs = songs if songs is not None else {}
+        self.fail = fail
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def _check(self):
+        self.gate.wait(5)
+        if self.fail:
+            raise api.ApiError(-1, "offline")
+
+    def search_song(self, keywords, offset, limit):
+        self.calls.append((keywords, offset))
+        self._check()
+        matches = [song for song in self.songs.get(keywords, [])]
+        return matches[offset:offset + limit]
+
+    def search_songlist(self, keywords, offset, limit):
+        self.calls.append((keywords, offset))
+        self._check()
+        return []
+
+    def search_suggest(self, keywords):
+        self.calls.append((keywords, "suggest"))
+        self._check()
+        return [f"{keywords} suggestion"]
+
+
+@pytest.fixture
+def library(tmp_path):
+    library = LocalLibrary(str(tmp_path / "library.db"))
+    library.add_songs([song(1, "offline hit")])
+    return library
+
+
+def test_failed_request_falls_back_to_library(library):
+    engine = SearchEngine(FakeApi(fail=True), library=library)
+    assert [s.name for s in engine.search("offline hit")] == ["offline hit"]
+    assert engine.search("offline hit", SEARCH_SONGLIST) == []
+    assert not engine._cache  # offline results are not cached
+
+
+def test_empty_online_result_does_not_use_library(library):
+    engine = SearchEngine(FakeApi(), library=library)
+    assert engine.search("offline hit") == []
+
+
+def test_online_results_are_recorded_in_library(library):
+    engine = SearchEngine(FakeApi({"new": [song(5, "new song")]}), library=library)
+    engine.search("new")
+    assert [s.id for s in library.search("new song")] == [5]
+
+
+def test_failure_without_library_raises():
+    engine = SearchEngine(FakeApi(fail=True))
+    with pytest.raises(api.ApiError):
+        engine.search("anything")
+
+
+def numbered(count: int) -> list:
+    return [song(i, f"song {i}") for i in range(count)]
+
+
+def test_results_are_cached_by_normalized_keywords():
+    fake = FakeApi({"a b": [song(1, "x")]})
+    engine = SearchEngine(fake)
+    engine.search("a b")
+    assert [s.id for s in engine.search("  a   b ")] == [1]
+    assert fake.calls == [("a b", 0)]
+    assert (engine.requests, engine.hits) == (1, 1)
+
+
+def test_concurrent_searches_share_one_request():
+    fake = FakeApi({"q": [song(1, "x")]})
+    fake.gate.clear()
+    engine = SearchEngine(fake)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(engine.search("q")))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: fake.calls)
+    fake.gate.set()
+    for thread in threads:
+        thread.join()
+    assert fake.calls == [("q", 0)]
+    assert results[0] is results[1] is results[2]
+
+
+def test_full_page_prefetches_the_next_one():
+    fake = FakeApi({"q": numbered(5)})
+    engine = SearchEngine(fake, page_size=2)
+    assert [s.id for s in engine.search("q")] == [0, 1]
+    wait_until(lambda: ("q", 1, 2) in engine._cache)
+    assert [s.id for s in engine.search("q", offset=2)] == [2, 3]
+    wait_until(lambda: ("q", 1, 4) in engine._cache)
+    assert [s.id for s in engine.search("q", offset=4)] == [4]  # short page, no prefetch
+    assert fake.calls == [("q", 0), ("q", 2), ("q", 4)]
+
+
+def test_cache_evicts_least_recently_used():
+    fake = FakeApi({k: [song(1, k)] for k in "abc"})
+    engine = SearchEngine(fake, cache_size=2)
+    engine.search("a")
+    engine.search("b")
+    engine.search("a")
+    engine.search("c")
+    assert [key[0] for key in engine._cache] == ["a", "c"]
+
+
+def test_type_ahead_debounces_input():
+    fake = FakeApi({"abc": numbered(10)})
+    engine = SearchEngine(fake, debounce=0.05)
+    results = []
+    for text in ("a", "ab", "abc"):
+        engine.type_ahead(text, lambda *args: results.append(args))
+    wait_until(lambda: results)
+    text, suggestions, songs = results[0]
+    assert (text, suggestions) == ("abc", ["abc suggestion"])
+    assert [s.id for s in songs] == [0, 1, 2, 3, 4]
+    assert {keywords for keywords, _ in fake.calls} == {"abc"}
+
+
+def test_stale_type_ahead_results_are_dropped():
+    fake = FakeApi({"old": numbered(1)})
+    fake.gate.clear()
+    engine = SearchEngine(fake, debounce=0)
+    results = []
+    engine.type_ahead("old", lambda *args: results.append(args))
+    wait_until(lambda: fake.calls)
+    engine.type_ahead("", lambda *args: results.append(args))  # input cleared
+    fake.gate.set()
+    wait_until(lambda: engine.stale == 1)
+    assert results == []
+    assert ("old", 1, 0) in engine._cache  # the response still fills the cache
+
+
+def test_cancel_stops_pending_type_ahead():
+    fake = FakeApi()
+    engine = SearchEngine(fake, debounce=0.05)
+    results = []
+    engine.type_ahead("q", lambda *args: results.append(args))
+    engine.cancel()
+    engine.type_ahead("   ", lambda *args: results.append(args))
+    threading.Event().wait(0.15)
+    assert results == [] and fake.calls == []
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import api
+from api.singleflight import flight_key
+from api.transport import HttpTransport
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_flight_key_ignores_csrf_and_parameter_order():
+    assert flight_key("/p", {"a": 1, "b": 2, "csrf_token": "x"}) == flight_key("/p", {"b": "2", "a": "1"})
+    assert flight_key("/p", {"a": 1}, "user@host") != flight_key("/p", {"a": 1}, "other@host")
+
+
+def test_concurrent_callers_share_one_call():
+    flight = api.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(None)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", func)))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flight.do("k", func)))
+               for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    wait_until(lambda: flight.shared == 4)
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join(5)
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert (flight.leaders, flight.shared) == (1, 4)
+
+
+def test_error_reaches_every_caller_and_key_is_released():
+    flight = api.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    wait_until(lambda: flight.shared == 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 2
+    assert flight.do("k", lambda: "again") == "again"  # next call runs again
+
+
+def test_async_callers_share_one_call():
+    async def main():
+        flight = api.AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        results = await asyncio.gather(*[flight.do("k", func) for _ in range(5)])
+        return results, calls, flight
+
+    results, calls, flight = asyncio.run(main())
+    assert results == [1] * 5
+    assert len(calls) == 1
+    assert (flight.leaders, flight.shared) == (1, 4)
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    async def main():
+        flight = api.AsyncSingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", func))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("k", func))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await leader, waiter
+
+    result, waiter = asyncio.run(main())
+    assert result == "done"
+    assert waiter.cancelled()
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    async def main():
+        flight = api.AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(None)
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", func))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("k", func))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter, leader, calls
+
+    result, leader, calls = asyncio.run(main())
+    assert result == "done"
+    assert leader.cancelled()
+    assert len(calls) == 1
+
+
+def test_call_is_cancelled_when_every_caller_is():
+    async def main():
+        flight = api.AsyncSingleFlight()
+        finished = []
+
+        async def func():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                finished.append("cancelled")
+                raise
+
+        callers = [asyncio.ensure_future(flight.do("k", func)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return finished, flight
+
+    finished, flight = asyncio.run(main())
+    assert finished == ["cancelled"]
+    assert not flight._calls and not flight._waiters
+
+
+def test_client_coalesces_identical_requests():
+    requests = []
+    release = threading.Event()
+
+    def handler(request):
+        requests.append(request)
+        release.wait(5)
+        return httpx.Response(200, json={"code": 200, "playlist": {"id": 1, "name": "p"}})
+
+    transport = HttpTransport()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    music_api = api.MusicApi(transport=transport)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(music_api.playlist_detail(1)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: music_api._flight.shared == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(requests) == 1
+    assert [playlist.name for playlist in results] == ["p"] * 8
+
+
+def test_async_client_coalesces_identical_requests():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"code": 200, "playlist": {"id": 1, "name": "p"}})
+
+    async def main():
+        transport = HttpTransport()
+        transport._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        music_api = api.AsyncMusicApi(transport=transport)
+        return await asyncio.gather(*[music_api.playlist_detail(1) for _ in range(8)])
+
+    results = asyncio.run(main())
+    assert len(requests) == 1
+    assert [playlist.name for playlist in results] == ["p"] * 8
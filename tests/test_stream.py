@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import threading
+
+import httpx
+import pytest
+
+from audio_cache import AudioCache
+from stream import CHUNK_SIZE, AudioStreamServer
+from test_singleflight import wait_until
+
+BODY = bytes(range(256)) * 1200  # 300KB
+URL = "https://m701.music.126.net/song.mp3"
+
+
+def audio_handler(body=BODY, truncate=False, gate=None):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.headers.get("Range"))
+        if gate is not None:
+            gate.wait(5)
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", request.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+        data = body[start:]
+        headers = {"Content-Length": str(len(data))}
+        if truncate:
+            data = data[: len(data) // 2]
+        return httpx.Response(206 if start else 200, headers=headers, content=data)
+
+    return handler, requests
+
+
+@pytest.fixture
+def make_server(tmp_path):
+    servers = []
+
+    def make(handler, cache=True):
+        server = AudioStreamServer(
+            str(tmp_path / "streams"),
+            AudioCache(str(tmp_path / "cache")) if cache else None,
+            client=httpx.Client(transport=httpx.MockTransport(handler)))
+        server.start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+def fetch(url, range_header=None):
+    headers = {"Range": range_header} if range_header else {}
+    return httpx.get(url, headers=headers, timeout=5)
+
+
+def test_serves_whole_file_and_ranges(make_server):
+    handler, _ = audio_handler()
+    server = make_server(handler, cache=False)
+    url = server.open(1, URL, size=len(BODY))
+    response = fetch(url)
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+    response = fetch(url, "bytes=100-199")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(BODY)}"
+    assert response.content == BODY[100:200]
+
+    assert fetch(url, "bytes=1000-").content == BODY[1000:]
+    assert fetch(url, "bytes=-10").content == BODY[-10:]
+    response = fetch(url, f"bytes={len(BODY)}-")
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(BODY)}"
+    assert fetch(server.base_url + "/song/2").status_code == 404
+
+
+def test_completed_stream_moves_into_cache(make_server):
+    handler, _ = audio_handler()
+    server = make_server(handler)
+    url = server.open(1, URL, size=len(BODY), br=320000,
+                      md5=hashlib.md5(BODY).hexdigest())
+    assert fetch(url).content == BODY
+    wait_until(lambda: server.cache.lookup(1) is not None)
+    entry = server.cache.lookup(1)
+    assert entry.md5 == hashlib.md5(BODY).hexdigest()
+    assert not os.path.exists(os.path.join(server.cache_dir, "1.part"))
+    assert fetch(url, "bytes=0-9").content == BODY[:10]  # now read from the cache
+
+
+def test_store_waits_for_open_readers(make_server):
+    gate = threading.Event()
+    handler, _ = audio_handler(gate=gate)
+    server = make_server(handler)
+    server.open(1, URL, size=len(BODY), br=320000)
+    stream = server.get(1)
+    reader = stream.iter_range(0, None)
+    gate.set()
+    assert next(reader) == BODY[:CHUNK_SIZE]
+    wait_until(lambda: stream.complete)
+    assert server.cache.lookup(1) is None  # the reader still holds the .part file
+    assert b"".join(reader) == BODY[CHUNK_SIZE:]
+    reader.close()
+    assert server.cache.lookup(1) is not None
+    assert stream.path != os.path.join(server.cache_dir, "1.part")
+
+
+def test_prefetched_head_is_not_cached(make_server):
+    handler, requests = audio_handler()
+    server = make_server(handler)
+    server.open(1, URL, size=len(BODY), br=320000, limit=CHUNK_SIZE)
+    stream = server.get(1)
+    wait_until(lambda: stream.available >= CHUNK_SIZE)
+    assert not stream.complete
+    assert server.cache.lookup(1) is None
+
+    url = server.open(1, URL, size=len(BODY), br=320000)  # resumes with a Range request
+    assert fetch(url).content == BODY
+    wait_until(lambda: server.cache.lookup(1) is not None)
+    assert requests == [None, f"bytes={CHUNK_SIZE}-"]
+    assert server.cache.lookup(1).size == len(BODY)
+
+
+def test_truncated_download_fails_and_is_not_cached(make_server):
+    handler, _ = audio_handler(truncate=True)
+    server = make_server(handler)
+    server.open(1, URL, br=320000)
+    stream = server.get(1)
+    wait_until(lambda: stream.failed)
+    assert not stream.complete
+    assert server.cache.lookup(1) is None
+
+
+def test_release_closes_only_prefetch_streams(make_server):
+    handler, _ = audio_handler()
+    server = make_server(handler, cache=False)
+    server.open(1, URL, size=len(BODY), limit=CHUNK_SIZE)
+    server.open(2, URL, size=len(BODY))
+    prefetched = server.get(1)
+    wait_until(lambda: prefetched.available >= CHUNK_SIZE)
+    server.release(1)
+    server.release(2)
+    assert server.get(1) is None
+    assert server.get(2) is not None
+    wait_until(lambda: not os.path.exists(prefetched.path))
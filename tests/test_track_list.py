@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import api
+from pages.track_list import INITIAL_ROWS, OVERSCAN, ROW_HEIGHT, TrackListView
+
+
+def songs(count: int, start: int = 0) -> list:
+    return [
+        api.SongInfo(
+            id=i, name=f"song {i}", album=api.AlbumInfo(id=0, name="", picUrl=""),
+            duration=0, artists=[api.SingerInfo(id=1, name="a"), api.SingerInfo(id=2, name="b")],
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def view(tracks, **kwargs) -> TrackListView:
+    track_list = TrackListView(tracks, on_play=kwargs.pop("on_play", lambda row: None), **kwargs)
+    track_list.update = lambda: None  # not mounted on a page
+    return track_list
+
+
+def tiles(track_list: TrackListView) -> list:
+    return track_list.controls[1:-1]
+
+
+def rows(track_list: TrackListView) -> list:
+    return [tile.content.data for tile in tiles(track_list)]
+
+
+def scroll(track_list: TrackListView, row: int, viewport_rows: int = 10):
+    track_list.handle_scroll(SimpleNamespace(
+        pixels=row * ROW_HEIGHT, viewport_dimension=viewport_rows * ROW_HEIGHT))
+
+
+def test_only_initial_rows_are_created():
+    track_list = view(songs(1000))
+    assert rows(track_list) == list(range(INITIAL_ROWS))
+    top, bottom = track_list.controls[0], track_list.controls[-1]
+    assert top.height == 0
+    assert bottom.height == (1000 - INITIAL_ROWS) * ROW_HEIGHT
+    tile = tiles(track_list)[1].content
+    assert (tile.title.value, tile.subtitle.value) == ("song 1", "a / b")
+
+
+def test_scroll_recycles_tiles():
+    track_list = view(songs(1000))
+    created = {id(tile) for tile in tiles(track_list)}
+    scroll(track_list, 500)
+    assert rows(track_list) == list(range(500 - OVERSCAN, 500 + 10 + OVERSCAN))
+    assert track_list.controls[0].height == (500 - OVERSCAN) * ROW_HEIGHT
+    assert {id(tile) for tile in tiles(track_list)} <= created
+    assert tiles(track_list)[OVERSCAN].content.title.value == "song 500"
+
+
+def test_click_reports_the_bound_row():
+    played = []
+    track_list = view(songs(100), on_play=played.append)
+    scroll(track_list, 50)
+    tile = tiles(track_list)[0].content
+    track_list.handle_click(SimpleNamespace(control=tile))
+    assert played == [50 - OVERSCAN]
+
+
+def test_end_reached_and_refresh_after_growth():
+    reached = []
+    tracks = songs(40)
+    track_list = view(tracks, on_end_reached=lambda: reached.append(True))
+    scroll(track_list, 5)
+    assert reached == []
+    scroll(track_list, 30)
+    assert reached == [True]
+    tracks.extend(songs(40, start=40))
+    track_list.refresh()
+    assert rows(track_list)[-1] == 30 + 10 + OVERSCAN - 1
+    assert track_list.controls[-1].height == (80 - 50) * ROW_HEIGHT
+
+
+def test_set_tracks_reuses_tiles():
+    track_list = view(songs(100))
+    scroll(track_list, 60)
+    created = {id(tile) for tile in tiles(track_list)}
+    track_list.set_tracks(songs(5, start=1000))
+    assert rows(track_list) == list(range(5))
+    assert {id(tile) for tile in tiles(track_list)} <= created
+    assert tiles(track_list)[0].content.title.value == "song 1000"
+    assert track_list.controls[-1].height == 0
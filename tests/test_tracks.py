@@ -0,0 +1,94 @@
+import threading
+
+import api
+from api.tracks import TrackTable
+
+
+def entry(id: int, name: str, album: str, *artists: str, duration: int = 1000) -> dict:
+    return {
+        "id": id,
+        "name": name,
+        "dt": duration,
+        "duration": duration,
+        "al": {"id": sum(map(ord, album)), "name": album, "picUrl": f"http://p/{album}"},
+        "ar": [{"id": sum(map(ord, artist)), "name": artist} for artist in artists],
+    }
+
+
+def table() -> TrackTable:
+    return TrackTable.from_json([
+        entry(1, "b song", "Album A", "Singer X"),
+        entry(2, "a song", "Album B", "Singer Y", "Singer X", duration=3000),
+        entry(3, "c song", "Album A", "Singer Z", duration=2000),
+    ])
+
+
+def test_rows_build_songs():
+    tracks = table()
+    assert len(tracks) == 3
+    song = tracks[1]
+    assert isinstance(song, api.SongInfo)
+    assert (song.id, song.name, song.duration) == (2, "a song", 3000)
+    assert song.album.name == "Album B"
+    assert [artist.name for artist in song.artists] == ["Singer Y", "Singer X"]
+    assert tracks[-1].id == 3
+    assert [song.id for song in tracks] == [1, 2, 3]
+
+
+def test_albums_and_artists_are_shared():
+    tracks = table()
+    assert tracks[0].album is tracks[2].album
+    assert tracks[0].artists[0] is tracks[1].artists[1]
+
+
+def test_slice_take_and_contains():
+    tracks = table()
+    assert [song.id for song in tracks[1:]] == [2, 3]
+    assert [song.id for song in tracks.take([2, 0])] == [3, 1]
+    assert 2 in tracks
+    assert tracks.row_of(3) == 2
+    assert tracks.row_of(9) is None
+
+
+def test_order_by_and_filter():
+    tracks = table()
+    assert [song.id for song in tracks.order_by("name")] == [2, 1, 3]
+    assert [song.id for song in tracks.order_by("duration", reverse=True)] == [2, 3, 1]
+    assert [song.id for song in tracks.order_by("album")] == [1, 3, 2]
+    assert [song.id for song in tracks.filter("album a")] == [1, 3]
+    assert [song.id for song in tracks.filter("singer x")] == [1, 2]
+
+
+def test_append_and_from_songs():
+    tracks = TrackTable.from_songs(list(table()))
+    assert [song.name for song in tracks] == ["b song", "a song", "c song"]
+    tracks.append(api.SongInfo(id=4, name="no album", album=None, duration=0))  # type: ignore[arg-type]
+    assert tracks[3].album.name == ""
+    assert tracks.row_of(4) == 3
+
+
+def test_readers_never_see_partial_rows():
+    tracks = TrackTable()
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            try:
+                if len(tracks):
+                    tracks[len(tracks) - 1]
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for start in range(0, 20000, 100):
+        tracks.extend_json(entry(id, f"s{id}", f"al{id % 7}", f"ar{id % 5}")
+                           for id in range(start, start + 100))
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert len(tracks) == 20000
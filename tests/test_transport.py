@@ -0,0 +1,58 @@
+import httpx
+
+import api
+from api import transport as transport_module
+from api.transport import HttpTransport
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"code": 200})
+
+
+def test_stats_counts_requests_per_host(mock_transport):
+    transport = mock_transport(ok)
+    transport.client.get("https://music.163.com/a")
+    transport.client.get("https://music.163.com/b")
+    transport.client.get("https://p1.music.126.net/c.jpg")
+    stats = transport.stats()
+    assert stats["requests"] == {"music.163.com": 2, "p1.music.126.net": 1}
+    assert sum(stats["http_versions"].values()) == 3
+
+
+def test_stats_reports_unavailable_pool(mock_transport):
+    # MockTransport has no httpcore pool to inspect
+    assert mock_transport(ok).stats()["connections"] == "unavailable"
+
+
+def test_stats_reads_real_pool():
+    transport = HttpTransport(http2=False)
+    assert transport.stats()["connections"] == {}
+    transport.close()
+
+
+def test_session_cookies_are_sent_per_client(mock_transport):
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.headers.get("Cookie", ""))
+        headers = [("Set-Cookie", "__csrf=token; Path=/"), ("Set-Cookie", "MUSIC_U=user; Path=/")]
+        return httpx.Response(200, json={"code": 200, "songs": []}, headers=headers)
+
+    transport = mock_transport(handler)
+    logged_in = api.MusicApi(transport=transport)
+    other = api.MusicApi(transport=transport)
+    logged_in.banners()
+    logged_in.banners()
+    other._cookies = None  # a second session must not pick up the first login
+    other.toplist()
+    assert sent[0] == ""
+    assert "MUSIC_U=user" in sent[1] and "__csrf=token" in sent[1]
+    assert sent[2] == ""
+    assert not transport.client.cookies
+
+
+def test_max_connections_none_uses_shared_transport():
+    assert api.MusicApi().transport is transport_module.default_transport()
+    private = api.MusicApi(max_connections=2).transport
+    assert private is not transport_module.default_transport()
+    assert private.limits.max_connections == 2
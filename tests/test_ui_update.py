@@ -0,0 +1,63 @@
+from test_singleflight import wait_until
+from ui_update import UiUpdateScheduler
+
+
+class FakePage:
+    def __init__(self):
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+def test_first_value_is_shown_immediately():
+    page, seen = FakePage(), []
+    scheduler = UiUpdateScheduler(page, lambda: [lambda v: seen.append(v) or True], fps=5)
+    scheduler.submit(1)
+    assert seen == [1]
+    assert page.updates == 1
+
+
+def test_values_within_a_frame_are_coalesced():
+    page, seen = FakePage(), []
+    scheduler = UiUpdateScheduler(page, lambda: [lambda v: seen.append(v) or True], fps=20)
+    for value in range(1, 6):
+        scheduler.submit(value)
+    assert seen == [1]
+    wait_until(lambda: seen == [1, 5])
+    assert page.updates == 2
+    assert scheduler.skipped == 3
+
+
+def test_page_is_updated_once_and_only_on_change():
+    page = FakePage()
+    callbacks = [lambda v: True, lambda v: True, lambda v: False, None]
+    scheduler = UiUpdateScheduler(page, lambda: callbacks, fps=0)
+    scheduler.submit(1)
+    assert page.updates == 1
+    callbacks[:2] = [lambda v: False, lambda v: False]
+    scheduler.submit(2)
+    assert page.updates == 1
+    assert (scheduler.flushes, scheduler.skipped) == (1, 1)
+
+
+def test_failing_callback_does_not_block_others():
+    page, seen = FakePage(), []
+
+    def broken(value):
+        raise ValueError("broken")
+
+    scheduler = UiUpdateScheduler(page, lambda: [broken, lambda v: seen.append(v) or True], fps=0)
+    scheduler.submit(3)
+    assert seen == [3]
+    assert page.updates == 1
+
+
+def test_cancel_drops_the_pending_value():
+    page, seen = FakePage(), []
+    scheduler = UiUpdateScheduler(page, lambda: [lambda v: seen.append(v) or True], fps=20)
+    scheduler.submit(1)
+    scheduler.submit(2)
+    scheduler.cancel()
+    scheduler.flush()
+    assert seen == [1]